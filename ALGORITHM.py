@@ -29,6 +29,10 @@ from Crypto.Util.Padding import unpad
 from base64 import b64decode
 from tr_functions import *
 from utility_multiprocessing import Account_detail, delete_JSON
+from discord_notifier import notify
+from latency_histogram import LATENCY
+from metrics import METRICS
+import clock
 
 logger = logging.getLogger()
 
@@ -47,10 +51,20 @@ class STRATEGY:
         _sell_order_hoga (float): 매도 호가
         _buy_order_hoga (float): 매수 호가
         _buy_start_time (datetime): 매수 시작 시간
+        _order_dispatcher (callable): 주문 전송 위임 함수 (side, strategy, order), None 이면 직접 전송
+        _store (WriteBehindStore): 종목 정보/상태 전이/체결 write-behind 저장소, None 이면 직접 파일 기록
+        _quotes (QuoteTable): 워커의 공유 메모리 시세 테이블 (사용하지 않으면 None)
+        REALTIME_FIELDS (dict): 전략이 사용하는 TR별 실시간 필드 {TR_ID: {이름: 필드 위치}}
     """
-    def __init__(self, info, code):
+    REALTIME_FIELDS = {
+        "H0STASP0": {"askp1": 3, "bidp1": 13},  # 매도호가1, 매수호가1
+        "H0STCNT0": {"stck_prpr": 2},           # 주식현재가
+    }
+
+    def __init__(self, info, code, store=None):
         self._info = info
         self._code = code
+        self._store = store
         self._l = logger.getChild(self._code)
         self._STOCKS_DIR_PATH = self._info['STOCKS_DIR_PATH']
         self._stock_info = self._Read_Stock_Info()
@@ -59,6 +73,8 @@ class STRATEGY:
         self._sell_order_hoga = float(self._stock_info['sell_price_ori'])
         self._buy_order_hoga = None
         self._buy_start_time = datetime.datetime.strptime(self._stock_info['timepoint_trading_start'], "%Y-%m-%d %H:%M:%S")
+        self._order_dispatcher = None
+        self._quotes = None
         
         self._Set_Initial_State()
         # print(self._stock_info['name'], self._stock_info['state'], self._stock_info['positions'], self._positions)
@@ -148,7 +164,7 @@ class STRATEGY:
         Returns:
             bool: 매수 신호 여부
         """
-        t_now = datetime.datetime.now()
+        t_now = clock.now()
         buy_start_time = datetime.datetime.strptime(self._stock_info['timepoint_trading_start'], "%Y-%m-%d %H:%M:%S")
         if ((self._stock_info['state'] == 'TO_BUY') and 
             (self._current_price <= int(self._stock_info['buy_price_ori'])) and
@@ -183,23 +199,55 @@ class STRATEGY:
     
     def _On_Realtime_Stock_Monitor(self, data):
         """
-        실시간 시세 모니터링 처리
-        - 호가 정보 처리
-        - 체결 정보 처리
-        - VI 정보 처리
+        실시간 시세 모니터링 처리 (단일 레코드 프레임)
+        
+        Args:
+            data (list): 실시간 데이터 ('|'로 분리된 수신 문자열)
+        """
+        self._On_Realtime_Tick(data[1], data[3].split('^'))
+
+    def _On_Realtime_Stock_Batch(self, tr_id0, records):
+        """
+        한 프레임에 묶여 온 이 종목의 레코드 일괄 처리
+        - 호가는 마지막 레코드만 반영 (앞선 호가는 어차피 덮어쓰임)
+        - 체결/VI는 모든 레코드를 순서대로 처리 (틱마다 매매 신호 확인)
+        
+        Args:
+            tr_id0 (str): TR ID
+            records (list): 필드 리스트의 리스트
+        """
+        if tr_id0 == "H0STASP0":
+            self._On_Realtime_Tick(tr_id0, records[-1])
+        else:
+            for body_data in records:
+                self._On_Realtime_Tick(tr_id0, body_data)
+
+    def _On_Realtime_Fields_Batch(self, tr_id0, values_list):
+        """
+        FieldParser 로 추출한 이 종목의 레코드 일괄 처리 (호가는 마지막 레코드만 반영)
+        
+        Args:
+            tr_id0 (str): TR ID
+            values_list (list): REALTIME_FIELDS 순서의 int 튜플 리스트
+        """
+        if tr_id0 == "H0STASP0":
+            self._On_Realtime_Fields(tr_id0, values_list[-1])
+        else:
+            for values in values_list:
+                self._On_Realtime_Fields(tr_id0, values)
+
+    def _On_Realtime_Fields(self, tr_id0, values):
+        """
+        실시간 호가/체결 레코드 1건 처리 (REALTIME_FIELDS 에 선언한 필드만 int로 전달됨)
         
         Args:
-            data (list): 실시간 데이터
+            tr_id0 (str): TR ID
+            values (tuple): REALTIME_FIELDS[tr_id0] 선언 순서의 int 값
         """
-        tr_id0 = data[1]
-        body_data = data[3].split('^')
         if tr_id0 == "H0STASP0":  # [실전/모의투자] 실시간 주식호가
-            self._buy_order_hoga = int(body_data[13]) # 매수호가
-            self._sell_order_hoga = int(body_data[3]) # 매도호가                
-            # time.sleep(1)
-            pass
+            self._sell_order_hoga, self._buy_order_hoga = values # 매도호가, 매수호가
         elif tr_id0 == "H0STCNT0":  # [실전/모의투자] 실시간 주식체결가
-            self._current_price = int(body_data[2])
+            self._current_price = values[0]
             # print("%-8s%-8s%-8s%-8s%-8s%-8s%-8s" %(self._stock_info['name'], 
             #            self._stock_info['state'],
             #            self._stock_info['buy_price_ori'],
@@ -208,7 +256,10 @@ class STRATEGY:
             #             self._Checkup_Buy_Signal(), 
             #             self._Checkup_Sell_Signal()))
             # 매수 조건
-            if self._Checkup_Buy_Signal():
+            t0 = time.perf_counter_ns()
+            buy_signal = self._Checkup_Buy_Signal()
+            LATENCY.record('signal', time.perf_counter_ns() - t0)
+            if buy_signal:
                 self._stock_info['buy_qty_submitted'] = math.trunc(int(self._stock_info['buy_amount'])//self._current_price)
                 MESSAGE = f"[매수] {self._stock_info['name']}({self._current_price}<={self._stock_info['buy_price_ori']}) {self._stock_info['buy_qty_submitted']}주 주문"
                 self._Send_Message(msg=MESSAGE)
@@ -216,13 +267,31 @@ class STRATEGY:
                 # self._Transition_State("BUY_SUBMITTED")
             else: pass
             # 매도 조건
-            if self._Checkup_Sell_Signal():
+            t0 = time.perf_counter_ns()
+            sell_signal = self._Checkup_Sell_Signal()
+            LATENCY.record('signal', time.perf_counter_ns() - t0)
+            if sell_signal:
                 MESSAGE = f"[매도] {self._stock_info['name']}({self._current_price}>={self._stock_info['sell_price_modi']}) {self._stock_info['positions']}주 주문"
                 self._Send_Message(msg=MESSAGE)
                 self._Submit_Sell()
                 # self._Transition_State("SELL_SUBMITTED")
             else: pass
             # print(self._stock_info['name'], self._stock_info['state'], self._stock_info['positions'], self._positions)
+
+    def _On_Realtime_Tick(self, tr_id0, body_data):
+        """
+        실시간 시세 레코드 1건 처리
+        - 호가 정보 처리
+        - 체결 정보 처리
+        - VI 정보 처리
+        
+        Args:
+            tr_id0 (str): TR ID
+            body_data (list): 레코드 필드 리스트
+        """
+        if tr_id0 in self.REALTIME_FIELDS:
+            offsets = self.REALTIME_FIELDS[tr_id0].values()
+            self._On_Realtime_Fields(tr_id0, tuple(int(body_data[i]) for i in offsets))
         elif tr_id0 == "H0STVI0":  # [실전/모의투자] 실시간 VI 정보
             vi_type = body_data[0]  # VI 종류 (1: 상승, 2: 하락)
             vi_price = int(body_data[1])  # VI 가격
@@ -261,6 +330,7 @@ class STRATEGY:
                 self._Transition_State("BUY_SUBMITTED")
                 # self._Write_Stock_Info()
             elif 접수여부== '2': # 주문 확인
+                self._Record_Fill('BUY', 체결수량, 체결단가, 체결시간)
                 self._stock_info['positions'] = int(self._stock_info['positions']) + int(체결수량)
                 MESSAGE = f"[매수확인] %s(%s) %s원: %s주 %s주보유" % (종목명, 종목코드, int(체결단가), int(체결수량), self._stock_info['positions'])
                 # self._l.info(MESSAGE)
@@ -285,6 +355,7 @@ class STRATEGY:
                 self._stock_info['positions'] = int(주문수량)
                 self._Transition_State("SELL_SUBMITTED")
             elif 접수여부 == '2': # 주문 확인
+                self._Record_Fill('SELL', 체결수량, 체결단가, 체결시간)
                 temp = int(self._stock_info['positions'])
                 self._stock_info['positions'] = temp - int(체결수량)
                 MESSAGE = f"[매도확인] %s(%s) %s원: %s주 %s주보유" % (종목명, 종목코드, int(체결단가), int(체결수량), self._stock_info['positions'])
@@ -303,9 +374,15 @@ class STRATEGY:
         return self._Write_Stock_Info()
     
     def _Transition_State(self, NEW_STATE):
+        if self._store is not None and self._stock_info.get('state') != NEW_STATE:
+            self._store.record_transition(self._code, self._stock_info.get('state'), NEW_STATE)
         self._stock_info['state'] = NEW_STATE
         self._Write_Stock_Info()
 
+    def _Record_Fill(self, side, qty, price, fill_time):
+        if self._store is not None:
+            self._store.record_fill(self._code, side, qty, price, fill_time)
+
 # [ TR Functions ]           
     def _Inquire_Balance(self):
         try:
@@ -351,35 +428,86 @@ class STRATEGY:
             self._l.error(f"Response data: {response_data if 'response_data' in locals() else 'No response data'}")
             return None
         
+    def _Quote(self):
+        """시세 테이블의 이 종목 최신 시세 {last, ask, bid, volume, trade_time, ...} (테이블이 없으면 None)"""
+        return self._quotes.read(self._code) if self._quotes is not None else None
+
     def _Inquire_Asking_Price_Exp_CCN(self):
         res = inquire_asking_price_exp_ccn(self._code)
         return res
     
     def _Submit_Buy(self):
-        res = order_cash_Buy(**self._info, code=self._code, qty=str(self._stock_info['buy_qty_submitted']), price=str(self._current_price), side='market')
-        if res['rt_cd'] == '0':
-            MESSAGE = f"[매수주문성공] %s(%s) %s" % (self._stock_info['name'], self._code, str(res['msg1']))
+        LATENCY.since_tick('tick_to_order')
+        order = dict(code=self._code, qty=str(self._stock_info['buy_qty_submitted']), price=str(self._current_price), side='market')
+        if self._order_dispatcher is not None:
+            # 주문 전송은 워커의 주문 태스크가 담당하고 결과는 _On_Buy_Result 로 돌아옴
+            self._Transition_State('BUY_SUBMITTED')
+            self._order_dispatcher('BUY', self, order)
+            return True
+        res = order_cash_Buy(**self._info, **order)
+        LATENCY.since_tick('tick_to_ack')
+        return self._On_Buy_Result(res)
+
+    def _On_Buy_Result(self, res, dispatched=False):
+        """
+        매수 주문 응답 처리
+
+        Args:
+            res (dict): 주문 응답 JSON
+            dispatched (bool): 워커의 주문 태스크가 보낸 주문의 응답 여부
+                (_Submit_Buy 가 이미 BUY_SUBMITTED 로 바꿨고, 응답보다 먼저 온 체결 통보가 상태를 바꿨을 수 있으므로
+                상태가 BUY_SUBMITTED 일 때만 실패를 되돌림)
+        """
+        METRICS.inc('kis_orders_total', (('side', 'BUY'), ('rt_cd', res.get('rt_cd', '')), ('msg_cd', res.get('msg_cd', ''))))
+        if dispatched and self._stock_info['state'] != 'BUY_SUBMITTED':
+            return res.get('rt_cd') == '0'
+        if res.get('rt_cd') == '0':
+            MESSAGE = f"[매수주문성공] %s(%s) %s" % (self._stock_info['name'], self._code, str(res.get('msg1', '')))
             # self._l.info(MESSAGE)
             # self._Send_Message(MESSAGE)
-            self._Transition_State('BUY_SUBMITTED')
+            if not dispatched:
+                self._Transition_State('BUY_SUBMITTED')
             return True
         else:
-            MESSAGE = f"[매수주문실패] %s(%s) %s" % (self._stock_info['name'], self._code, str(res['msg1']))
+            MESSAGE = f"[매수주문실패] %s(%s) %s" % (self._stock_info['name'], self._code, str(res.get('msg1', '')))
             # self._l.info(MESSAGE)
             # self._Send_Message(MESSAGE)           
             self._Transition_State('TO_BUY')
             return False
 
     def _Submit_Sell(self):
-        res = order_cash_Sell(**self._info, code=self._code, qty=str(self._stock_info['positions']), price=str(self._current_price),  side='market')
-        if res['rt_cd'] == '0':
-            MESSAGE = f"[매도주문성공] %s(%s) %s" % (self._stock_info['name'], self._code, str(res['msg1']))
+        LATENCY.since_tick('tick_to_order')
+        order = dict(code=self._code, qty=str(self._stock_info['positions']), price=str(self._current_price), side='market')
+        if self._order_dispatcher is not None:
+            self._Transition_State('SELL_SUBMITTED')
+            self._order_dispatcher('SELL', self, order)
+            return True
+        res = order_cash_Sell(**self._info, **order)
+        LATENCY.since_tick('tick_to_ack')
+        return self._On_Sell_Result(res)
+
+    def _On_Sell_Result(self, res, dispatched=False):
+        """
+        매도 주문 응답 처리
+
+        Args:
+            res (dict): 주문 응답 JSON
+            dispatched (bool): 워커의 주문 태스크가 보낸 주문의 응답 여부
+                (_Submit_Sell 가 이미 SELL_SUBMITTED 로 바꿨고, 응답보다 먼저 온 체결 통보가 상태를 바꿨을 수 있으므로
+                상태가 SELL_SUBMITTED 일 때만 실패를 되돌림)
+        """
+        METRICS.inc('kis_orders_total', (('side', 'SELL'), ('rt_cd', res.get('rt_cd', '')), ('msg_cd', res.get('msg_cd', ''))))
+        if dispatched and self._stock_info['state'] != 'SELL_SUBMITTED':
+            return res.get('rt_cd') == '0'
+        if res.get('rt_cd') == '0':
+            MESSAGE = f"[매도주문성공] %s(%s) %s" % (self._stock_info['name'], self._code, str(res.get('msg1', '')))
             # self._l.info(MESSAGE)
             # self._Send_Message(MESSAGE)
-            self._Transition_State('SELL_SUBMITTED')
+            if not dispatched:
+                self._Transition_State('SELL_SUBMITTED')
             return True
         else:
-            MESSAGE = f"[매도주문실패] %s(%s) %s" % (self._stock_info['name'], self._code, str(res['msg1']))
+            MESSAGE = f"[매도주문실패] %s(%s) %s" % (self._stock_info['name'], self._code, str(res.get('msg1', '')))
             # self._l.info(MESSAGE)
             # self._Send_Message(MESSAGE)  
             self._Transition_State('TO_SELL')
@@ -387,41 +515,48 @@ class STRATEGY:
 
 # [ Basic Functions ]   
     def _Out_Of_Market(self):
-        today = datetime.datetime.today().weekday()
+        today = clock.now().weekday()
         market_time_over = self._NOW().time() >= pd.Timestamp('15:30').time()
         return (today==5 or today==6 or market_time_over)
     
     def _Send_Message(self, msg, timestamp='True'):
-        now = datetime.datetime.now()
+        t0 = time.perf_counter_ns()
+        now = clock.now()
         # message = f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {str(msg)}"
         # message_discode = {"content": f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {str(msg)}"}
         if timestamp == 'True':
             message = f"[{now.strftime('%H:%M:%S')}]{str(msg)}"
-            message_discode = {"content": message}
         elif timestamp == 'False':
             message = f"{str(msg)}"
-            message_discode = {"content": message}
         else: pass
-        requests.post(self._info['DISCORD_WEBHOOK_URL'], data=message_discode)
+        notify(self._info['DISCORD_WEBHOOK_URL'], message)  # 매매 스레드는 전송을 기다리지 않음
         print(self._info['NAME'], message)
+        LATENCY.record('notify', time.perf_counter_ns() - t0)
 
     def _Write_Stock_Info(self):
+        if self._store is not None:
+            return self._store.put(self._code, self._stock_info)  # 파일 기록은 저장소 스레드가 담당
         file = os.path.join(self._STOCKS_DIR_PATH, f'{self._code}.json')
         with open(file, 'w', encoding='utf-8') as f:
             return json.dump(self._stock_info, f, ensure_ascii=False, indent="\t", sort_keys=True)
 
     def _Read_Stock_Info(self):
+        if self._store is not None:
+            self._stock_info = self._store.get(self._code)
+            return self._stock_info
         file = os.path.join(self._STOCKS_DIR_PATH, f'{self._code}.json')
         with open(file, 'r', encoding='utf-8') as f:
             self._stock_info = json.load(f)
         return self._stock_info
     
     def _Delete_Stock_Info_JSON(self):
+        if self._store is not None:
+            return self._store.delete(self._code)
         filename = os.path.join(self._STOCKS_DIR_PATH, f'{self._code}.json')
         delete_JSON(filename)
                
     def _NOW(self):
-        return pd.Timestamp.now(tz='Asia/Seoul')
+        return clock.now_kst()
 
     
 
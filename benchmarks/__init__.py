@@ -0,0 +1,6 @@
+"""
+실시간 매매 경로 성능 측정용 벤치마크 모음
+
+실행 예:
+    python -m benchmarks.bench_tr_session
+"""
@@ -0,0 +1,115 @@
+"""
+AsyncOuterWorker 틱 수신 ~ 주문 전송 지연 측정 (합성 버스트)
+
+가짜 웹소켓이 초당 N개(기본 5,000)의 H0STCNT0 프레임을 전달하고,
+전략 대역이 일정 틱마다 매수 주문을 내며, 주문 코루틴 대역은 왕복 지연(기본 5ms)을 흉내낸다.
+수신 태스크에서 찍은 시각부터 주문 태스크가 전송을 시작한 시각까지를 측정한다.
+
+실행:
+    python -m benchmarks.bench_async_worker [msgs_per_sec] [seconds]
+"""
+
+import sys
+import time
+import asyncio
+import collections
+
+from main_multiprocessing import AsyncOuterWorker
+from realtime_frames import build_parsers
+from benchmarks.frames import cnt_record, make_frame
+from benchmarks.harness import summarize
+
+CODES = ["069920", "236810", "005930", "000660", "035420"]
+ORDER_EVERY = 50        # 종목별 N틱마다 주문
+ORDER_RTT = 0.005       # 주문 왕복 지연(초)
+
+
+class _FakeWebSocket:
+    """일정 속도로 프레임을 돌려주는 웹소켓 대역 (끝나면 EOFError)"""
+    def __init__(self, frames, rate):
+        self._frames = frames
+        self._interval = 1.0 / rate
+        self._idx = 0
+        self._t0 = None
+
+    def recv(self):
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        if self._idx >= len(self._frames):
+            time.sleep(0.5)  # 진행 중인 주문이 끝날 시간
+            raise EOFError
+        delay = self._t0 + self._idx * self._interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        data = self._frames[self._idx]
+        self._idx += 1
+        return data
+
+
+class _BurstStrategy:
+    """일정 틱마다 매수 주문을 위임하는 전략 대역"""
+    REALTIME_FIELDS = {"H0STCNT0": {"stck_prpr": 2}}
+
+    def __init__(self, code):
+        self._code = code
+        self._order_dispatcher = None
+        self._ticks = 0
+        self.results = 0
+
+    def _On_Realtime_Fields(self, tr_id0, values):
+        self._ticks += 1
+        if self._ticks % ORDER_EVERY == 0:
+            self._order_dispatcher('BUY', self, dict(code=self._code, qty="1", price=str(values[0]), side='market'))
+
+    def _On_Realtime_Fields_Batch(self, tr_id0, values_list):
+        for values in values_list:
+            self._On_Realtime_Fields(tr_id0, values)
+
+    def _On_Buy_Result(self, res, dispatched=False):
+        self.results += 1
+
+
+async def _fake_order(**kwargs):
+    await asyncio.sleep(ORDER_RTT)
+    return {"rt_cd": "0", "msg1": "OK"}
+
+
+async def _run(worker):
+    worker._frames = asyncio.Queue(maxsize=worker.FRAME_QUEUE_SIZE)
+    worker._orders = asyncio.Queue(maxsize=worker.ORDER_QUEUE_SIZE)
+    worker._order_tasks = set()
+    worker._order_latency_ns = collections.deque(maxlen=1000000)
+    worker._tick_ns = 0
+    try:
+        await asyncio.gather(worker._Read_Frames(), worker._Dispatch_Frames(), worker._Dispatch_Orders())
+    except EOFError:
+        pass
+
+
+def main(rate=5000, seconds=5):
+    n = int(rate * seconds)
+    frames = [make_frame("H0STCNT0", [cnt_record(CODES[i % len(CODES)], 10000 + i % 7)]) for i in range(n)]
+
+    worker = AsyncOuterWorker.__new__(AsyncOuterWorker)
+    worker._info = {"NAME": "bench"}
+    worker._Stock_Algo = {code: _BurstStrategy(code) for code in CODES}
+    for algo in worker._Stock_Algo.values():
+        algo._order_dispatcher = worker._Enqueue_Order
+    worker._parsers = build_parsers(_BurstStrategy.REALTIME_FIELDS)
+    worker._order_functions = {'BUY': _fake_order, 'SELL': _fake_order}
+    worker._ws = _FakeWebSocket(frames, rate)
+
+    t0 = time.perf_counter()
+    asyncio.run(_run(worker))
+    elapsed = time.perf_counter() - t0
+
+    stats = summarize(list(worker._order_latency_ns))
+    results = sum(algo.results for algo in worker._Stock_Algo.values())
+    print("frames %d in %.2fs (%.0f msgs/s offered %d)" % (n, elapsed, n / elapsed, rate))
+    print("orders %d, results %d" % (stats["samples"], results))
+    print("tick-to-order p50 %.1f us  p99 %.1f us  max %.1f us" % (
+        stats["p50_ns"] / 1e3, stats["p99_ns"] / 1e3, stats["max_ns"] / 1e3))
+
+
+if __name__ == '__main__':
+    main(*(float(arg) for arg in sys.argv[1:3]))
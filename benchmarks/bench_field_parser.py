@@ -0,0 +1,52 @@
+"""
+실시간 틱 필드 추출 비용 비교 (ns/tick)
+
+- before: data.split('|') 후 본문 전체를 '^'로 분리하고 필요한 필드를 int 변환 (기존 방식)
+- after : realtime_frames.FieldParser 로 선언된 필드까지만 분리해 int 추출
+
+실행:
+    python -m benchmarks.bench_field_parser
+"""
+
+from realtime_frames import build_parsers
+from benchmarks.frames import cnt_record, asp_record, make_frame
+from benchmarks.harness import measure
+
+FIELDS = {
+    "H0STASP0": {"askp1": 3, "bidp1": 13},
+    "H0STCNT0": {"stck_prpr": 2},
+}
+BATCH = 1000
+
+
+def _before(frames):
+    for data in frames:
+        recvstr = data.split('|')
+        body_data = recvstr[3].split('^')
+        code = body_data[0]
+        if recvstr[1] == "H0STASP0":
+            values = (int(body_data[3]), int(body_data[13]))
+        else:
+            values = (int(body_data[2]),)
+
+
+def _after(frames, parsers):
+    for data in frames:
+        recvstr = data.split('|', 3)
+        ticks = parsers[recvstr[1]].parse(recvstr[3], int(recvstr[2]))
+
+
+def main():
+    parsers = build_parsers(FIELDS)
+    cases = {
+        "H0STCNT0": [make_frame("H0STCNT0", [cnt_record("005930", 70000 + i)]) for i in range(BATCH)],
+        "H0STASP0": [make_frame("H0STASP0", [asp_record("005930", 70100 + i, 70000 + i)]) for i in range(BATCH)],
+    }
+    for tr_id, frames in cases.items():
+        before = measure(lambda: _before(frames), iterations=200, ops_per_call=BATCH)
+        after = measure(lambda: _after(frames, parsers), iterations=200, ops_per_call=BATCH)
+        print("%-9s before %7.0f ns/tick  after %7.0f ns/tick  (p50)" % (tr_id, before["p50_ns"], after["p50_ns"]))
+
+
+if __name__ == '__main__':
+    main()
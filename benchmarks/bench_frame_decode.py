@@ -0,0 +1,42 @@
+"""
+실시간 프레임 디코딩 처리량 측정
+
+단일 레코드 / 다중 레코드 프레임을 decode_frame + group_by_code 로 분리하는 속도를
+레코드/초 단위로 측정한다. 녹화된 프레임 파일을 인자로 주면 해당 프레임으로 측정한다.
+
+실행:
+    python -m benchmarks.bench_frame_decode [frames.txt]
+"""
+
+import sys
+
+from realtime_frames import decode_frame, group_by_code
+from benchmarks.frames import synthetic_frames, load_frames
+from benchmarks.harness import measure, print_result
+
+CODES = ["069920", "236810", "005930", "000660", "035420", "051910", "006400", "035720", "068270", "207940"]
+
+
+def _decode_all(frames):
+    records = 0
+    for data in frames:
+        tr_id, recs = decode_frame(data)
+        group_by_code(recs)
+        records += len(recs)
+    return records
+
+
+def main(path=None):
+    if path:
+        cases = [("recorded", load_frames(path))]
+    else:
+        cases = [("%d record(s)/frame" % n, synthetic_frames(CODES, 2000, records_per_frame=n)) for n in (1, 4, 16)]
+
+    for name, frames in cases:
+        n_records = _decode_all(frames)
+        stats = measure(lambda: _decode_all(frames), iterations=20, warmup=2, ops_per_call=n_records)
+        print_result("decode+group %s" % name, stats)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
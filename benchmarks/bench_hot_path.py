@@ -0,0 +1,154 @@
+"""
+실시간 매매 경로 벤치마크 모음 (JSON 결과)
+
+측정 항목:
+    dispatch.cnt_frame          : OuterWorker._On_Message - 체결가 프레임 분리 + 전략 전달 (do_work 수신 루프 1회분)
+    dispatch.asp_frame          : OuterWorker._On_Message - 호가 프레임
+    strategy.stock_monitor      : STRATEGY._On_Realtime_Stock_Monitor - 틱 1건 (문자열 필드 경로)
+    strategy.checkup_buy        : STRATEGY._Checkup_Buy_Signal
+    strategy.checkup_sell       : STRATEGY._Checkup_Sell_Signal
+    notice.aes_decrypt          : aes_cbc_base64_dec - 체결 통보 1건
+    strategy.write_stock_info   : STRATEGY._Write_Stock_Info (저장소 사용, 매매 스레드 부담분)
+    strategy.write_stock_info_direct : STRATEGY._Write_Stock_Info (저장소 없이 JSON 파일 직접 기록)
+    order.roundtrip             : tr_functions.order_cash_Buy (해시키 + 주문) - 로컬 모의 서버 왕복
+
+전략 객체는 replay 의 모의 브로커로 만들고(네트워크 없음), 시세는 매매 신호가 나지 않는 가격으로 고정한다.
+난수 시드와 입력이 고정되어 있으므로 같은 환경에서는 결과를 비교할 수 있다.
+
+실행:
+    python -m benchmarks.bench_hot_path                              # 표 + JSON 표준 출력
+    python -m benchmarks.bench_hot_path --output bench.json          # JSON 저장
+    python -m benchmarks.bench_hot_path --compare baseline.json      # p50 이 20% 이상 느려지면 종료 코드 1
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+import tr_functions
+from tr_functions import aes_cbc_base64_dec, aes_cbc_base64_enc
+from rate_limiter import RateLimiter, install_rate_limiter
+from realtime_frames import notice_record
+from kis_mock_server import MockKIS
+from replay import REPLAY_INFO, SimulatedBroker, ReplayWorker, patched_tr_functions, synthetic_stock_list
+from ALGORITHM import STRATEGY
+from benchmarks.frames import cnt_record, asp_record, make_frame
+from benchmarks.harness import measure, print_result, write_results, compare
+
+N_CODES = 10
+BATCH = 1000
+
+
+def _setup_worker(workdir):
+    """신호가 나지 않는 가격대의 종목 10개와 ReplayWorker (모의 브로커 사용)"""
+    stocks, closes = synthetic_stock_list(N_CODES, seed=1)
+    for stock in stocks.values():
+        stock['buy_price_ori'] = "1"  # 매수 조건 불충족
+    broker = SimulatedBroker(initial_prices=closes)
+    info = dict(REPLAY_INFO, STOCKS_DIR_PATH=workdir)
+    worker = ReplayWorker(info, stocks, broker, os.path.join(workdir, 'state.db'))
+    return worker, stocks, closes
+
+
+def bench_strategy(results, iterations):
+    workdir = tempfile.mkdtemp(prefix='bench_hot_path_')
+    broker_ctx = patched_tr_functions(SimulatedBroker())
+    try:
+        with broker_ctx as broker:
+            worker, stocks, closes = _setup_worker(workdir)
+            broker.last_price.update(closes)
+            codes = list(stocks)
+            cnt_frames = [make_frame("H0STCNT0", [cnt_record(codes[i % N_CODES], closes[codes[i % N_CODES]] + i % 7)])
+                          for i in range(BATCH)]
+            asp_frames = [make_frame("H0STASP0", [asp_record(codes[i % N_CODES], closes[codes[i % N_CODES]] + 10,
+                                                             closes[codes[i % N_CODES]])]) for i in range(BATCH)]
+
+            def dispatch(frames):
+                on_message = worker._On_Message
+                for data in frames:
+                    on_message(data)
+            results["dispatch.cnt_frame"] = measure(lambda: dispatch(cnt_frames), iterations, ops_per_call=BATCH)
+            results["dispatch.asp_frame"] = measure(lambda: dispatch(asp_frames), iterations, ops_per_call=BATCH)
+
+            algo = worker._Stock_Algo[codes[0]]
+            split_frames = [data.split('|') for data in cnt_frames if data.split('^', 1)[0].endswith(codes[0])]
+            def monitor():
+                for data in split_frames:
+                    algo._On_Realtime_Stock_Monitor(data)
+            results["strategy.stock_monitor"] = measure(monitor, iterations, ops_per_call=len(split_frames))
+
+            seller = worker._Stock_Algo[codes[1]]
+            seller._stock_info.update(state='TO_SELL', positions=10, sell_price_modi=str(10 ** 9))
+            def checkup(fn):
+                for _ in range(BATCH):
+                    fn()
+            results["strategy.checkup_buy"] = measure(lambda: checkup(algo._Checkup_Buy_Signal), iterations, ops_per_call=BATCH)
+            results["strategy.checkup_sell"] = measure(lambda: checkup(seller._Checkup_Sell_Signal), iterations, ops_per_call=BATCH)
+
+            def write(target, n):
+                for _ in range(n):
+                    target._Write_Stock_Info()
+            results["strategy.write_stock_info"] = measure(lambda: write(algo, BATCH), iterations, ops_per_call=BATCH)
+            direct = STRATEGY.__new__(STRATEGY)
+            direct.__dict__.update(algo.__dict__, _store=None, _STOCKS_DIR_PATH=workdir)
+            results["strategy.write_stock_info_direct"] = measure(lambda: write(direct, 10), max(5, iterations // 10),
+                                                                  warmup=1, ops_per_call=10)
+            worker._store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_notice(results, iterations):
+    key, iv = 'K' * 32, 'V' * 16
+    fields = notice_record('BUY', '005930', 10, 70000, '093015', '2', 10, order_no='0000012345', account='50443433')
+    body = aes_cbc_base64_enc(key, iv, '^'.join(fields))
+    def decrypt():
+        for _ in range(BATCH):
+            aes_cbc_base64_dec(key, iv, body).split('^')
+    results["notice.aes_decrypt"] = measure(decrypt, iterations, ops_per_call=BATCH)
+
+
+def bench_order(results, iterations):
+    mock = MockKIS(tick_rate=0)
+    URL_BASE, SOCKET_URL = mock.start()
+    info = {"URL_BASE": URL_BASE, "APP_KEY": "bench", "APP_SECRET": "bench", "ACCESS_TOKEN": "bench",
+            "CANO": "00000000", "ACNT_PRDT_CD": "01"}
+    install_rate_limiter("bench", RateLimiter(1e9))  # 서버 왕복만 측정
+    try:
+        tr_functions.warmup_session(**info)
+        results["order.roundtrip"] = measure(
+            lambda: tr_functions.order_cash_Buy(**info, code="005930", qty="1", price="0"), iterations * 10)
+    finally:
+        mock.stop()
+        tr_functions.close_sessions()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help='JSON 결과 저장 경로 (없으면 표준 출력)')
+    parser.add_argument('--compare', help='기준 JSON 결과 (p50 회귀 시 종료 코드 1)')
+    parser.add_argument('--threshold', type=float, default=0.2, help='허용 p50 증가 비율')
+    args = parser.parse_args()
+
+    results = {}
+    bench_strategy(results, args.iterations)
+    bench_notice(results, args.iterations)
+    bench_order(results, args.iterations)
+
+    for name, stats in results.items():
+        print_result(name, stats, file=sys.stderr)
+    write_results(results, args.output)
+
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        for name, base, current, ratio in regressions:
+            print("REGRESSION %-36s p50 %.0f ns -> %.0f ns (x%.2f)" % (name, base, current, ratio), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
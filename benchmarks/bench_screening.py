@@ -0,0 +1,78 @@
+"""
+매수 후보 선별 비용 비교 (후보 50/1000/10000개)
+
+- per_row   : 기존 방식 (DataFrame.loc 으로 행마다 보유 종목 제외, 종목마다 float -> str -> float 계산)
+- vectorized: screening.load_universe + screening.screen (구조화 배열 한 번에 계산, 호가 단위 맞춤 포함)
+
+CSV 읽기는 두 방식 모두 포함하며, 전일종가는 조회가 끝난 것으로 보고 계산/선정 비용만 측정한다.
+
+실행:
+    python -m benchmarks.bench_screening [반복횟수]
+"""
+
+import os
+import sys
+import math
+import random
+import tempfile
+
+import pandas as pd
+
+import screening
+from benchmarks.harness import measure, print_result
+
+SIZES = (50, 1000, 10000)
+BUY_AMOUNT = 1000000
+
+
+def per_row(path, held, closes, num_tobuy):
+    """기존 방식: 행마다 보유 종목 제외 후 순서대로 계산/선정"""
+    genport = pd.read_csv(path, dtype=str)
+    selected = []
+    for idx in range(len(genport)):
+        if genport.loc[idx]['code'] not in held:
+            selected.append([genport.loc[idx]['name'], genport.loc[idx]['code'], genport.loc[idx]['priority']])
+    stock_info = {}
+    for name, code, priority in selected:
+        close = closes[code]
+        buy_price_ori = str(math.trunc(float(close) * (1 + float("-0.02"))))
+        buy_qty_ori = str(math.trunc(float(BUY_AMOUNT) / float(buy_price_ori)))
+        sell_price_ori = str(math.trunc(float(buy_price_ori) * (1 + float("0.08"))))
+        if int(buy_qty_ori) >= 1 and len(stock_info) < num_tobuy:
+            stock_info[code] = (buy_price_ori, buy_qty_ori, sell_price_ori)
+        else:
+            break
+    return stock_info
+
+
+def vectorized(path, held, closes, num_tobuy):
+    """screening: 후보 표 생성 후 한 번에 계산/선정"""
+    table = screening.load_universe(path, held)
+    table['prev_close'] = [closes[code] for code in table['code']]
+    screening.screen(table, BUY_AMOUNT, "-0.02", "0.08", num_tobuy)
+    return table[table['selected']]
+
+
+def main(iterations=20):
+    random.seed(0)
+    tmp = tempfile.mkdtemp(prefix='bench_screening_')
+    try:
+        for size in SIZES:
+            codes = ["%06d" % (100000 + i) for i in range(size)]
+            # 1주 미만 종목이 없도록 (BUY_AMOUNT 보다 낮은 가격) 하여 끝까지 보는 경우를 측정
+            closes = {code: random.randint(1000, 90000) for code in codes}
+            path = os.path.join(tmp, "genport_%d.csv" % size)
+            pd.DataFrame({"priority": ["%02d" % (i + 1) for i in range(size)],
+                          "name": ["종목%d" % i for i in range(size)], "code": codes}).to_csv(path, index=False)
+            held = set(codes[::7])
+            # 선정 수 제한 없이 (후보 전체를 끝까지 계산하는 경우)
+            print_result("per_row    (%5d)" % size, measure(lambda: per_row(path, held, closes, size), iterations, warmup=2))
+            print_result("vectorized (%5d)" % size, measure(lambda: vectorized(path, held, closes, size), iterations, warmup=2))
+    finally:
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
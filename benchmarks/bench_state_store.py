@@ -0,0 +1,120 @@
+"""
+종목 상태 저장 비용 비교 (종목 수 10/100/1000)
+
+- json_direct : 변경마다 stocks/<code>.json 전체 재작성 (기존 _Write_Stock_Info)
+- json_store  : JSONStateStore (put 후 일괄 flush, 임시 파일 + os.replace)
+- sqlite_store: SQLiteStateStore (put 후 일괄 flush, WAL 트랜잭션 1회)
+
+각 종목 수마다 다음을 측정:
+    init   : 전체 종목 초기 기록 + 전략 생성 시 종목별 읽기
+    update : 전체 종목이 한 번씩 변경된 뒤 디스크에 반영되기까지 (종목당 ns)
+    put    : 매매 스레드가 부담하는 변경 1건 비용 (store 방식만)
+
+실행:
+    python -m benchmarks.bench_state_store [반복횟수]
+    기본 위치는 /dev/shm (tmpfs, 없으면 시스템 임시 디렉토리)이며 TMPDIR 를 지정하면 그 경로를 사용한다.
+    json_store 는 파일마다 fsync 하므로 실제 디스크에서는 1000 종목 측정에 수 분이 걸린다
+    (운영 디스크에서 측정할 때는 반복횟수를 2~3 으로 줄여서 실행).
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+from state_store import JSONStateStore, SQLiteStateStore
+from benchmarks.harness import measure
+
+SIZES = (10, 100, 1000)
+
+
+def _stock_info(code, i):
+    return {
+        "code": code, "name": f"종목{i}", "state": "TO_BUY", "positions": "0",
+        "buy_price": str(70000 + i), "sell_price_ori": str(75000 + i), "buy_qty_submitted": "10",
+        "sell_qty_submitted": "0", "timepoint_trading_start": "2025-01-02 09:05:00",
+    }
+
+
+def _write_json(data, file_name):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent="\t", sort_keys=True)
+
+
+def _read_json(file_name):
+    with open(file_name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _bench_size(n, iterations, root):
+    stocks = {f"{i:06d}": _stock_info(f"{i:06d}", i) for i in range(n)}
+    results = {}
+
+    # json_direct
+    directory = os.path.join(root, f"direct_{n}")
+    os.makedirs(directory)
+    def direct_init():
+        for code, data in stocks.items():
+            _write_json(data, os.path.join(directory, f"{code}.json"))
+        for code in stocks:
+            _read_json(os.path.join(directory, f"{code}.json"))
+    def direct_update():
+        for code, data in stocks.items():
+            _write_json(data, os.path.join(directory, f"{code}.json"))
+    results["json_direct"] = {
+        "init": measure(direct_init, iterations=iterations, warmup=1),
+        "update": measure(direct_update, iterations=iterations, warmup=1, ops_per_call=n),
+    }
+
+    # json_store / sqlite_store
+    stores = {
+        "json_store": JSONStateStore(os.path.join(root, f"json_{n}"), flush_interval=3600),
+        "sqlite_store": SQLiteStateStore(os.path.join(root, f"state_{n}.db"), flush_interval=3600),
+    }
+    os.makedirs(os.path.join(root, f"json_{n}"))
+    for name, store in stores.items():
+        def store_init():
+            if isinstance(store, SQLiteStateStore):
+                store.replace_all(stocks)
+            else:
+                for code, data in stocks.items():
+                    store.put(code, data)
+                store.flush()
+                store._cache.clear()
+            for code in stocks:
+                store.get(code)
+        def store_put():
+            for code, data in stocks.items():
+                store.put(code, data)
+        def store_update():
+            store_put()
+            store.flush()
+        results[name] = {
+            "init": measure(store_init, iterations=iterations, warmup=1),
+            "update": measure(store_update, iterations=iterations, warmup=1, ops_per_call=n),
+            "put": measure(store_put, iterations=iterations, warmup=1, ops_per_call=n),
+        }
+        store.close()
+    return results
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    base = None if os.environ.get('TMPDIR') or not os.path.isdir('/dev/shm') else '/dev/shm'
+    root = tempfile.mkdtemp(prefix="bench_state_store_", dir=base)
+    try:
+        for n in SIZES:
+            results = _bench_size(n, iterations, root)
+            for name, stats in results.items():
+                line = "%5d codes  %-12s init %9.2f ms  update %8.0f ns/code" % (
+                    n, name, stats["init"]["p50_ns"] / 1e6, stats["update"]["p50_ns"])
+                if "put" in stats:
+                    line += "  put %6.0f ns" % stats["put"]["p50_ns"]
+                print(line)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+웹소켓 재연결 ~ 첫 틱 수신 시간 비교 (로컬 모의 서버)
+
+kis_mock_server 에 웹소켓 응답 지연(ws_latency_ms)을 주고, 체결 통보 1건 + 종목 13개(40건)를
+- 요청 1건 보내고 응답 1건 받는 순차 방식 (기존 방식, 응답 대신 받은 틱은 버리고 다음 요청으로 넘어감)
+- 연속 전송 후 응답을 (tr_id, tr_key)로 맞추는 파이프라인 방식 (subscription_manager.subscribe_session)
+으로 구독하여, 연결 시작부터 첫 실시간 프레임을 recv 로 받을 때까지의 시간을 측정한다.
+틱 간격이 결과를 가리지 않도록 종목별 초당 200건으로 스트리밍한다.
+
+실행:
+    python -m benchmarks.bench_subscribe [iterations] [ws_latency_ms]
+"""
+
+import sys
+import json
+import websocket
+
+from kis_mock_server import MockKIS
+from subscription_manager import plan_registrations, subscribe_session
+from benchmarks.harness import measure, print_result
+
+N_CODES = 13
+
+
+def sequential_subscribe(info, approval_key, registrations):
+    """기존 방식: 요청마다 응답 1건을 기다림 (그 사이 도착한 실시간 프레임은 버림)"""
+    ws = websocket.WebSocket()
+    ws.connect(info['SOCKET_URL'])
+    for tr_id, tr_key in registrations:
+        ws.send('{"header":{"approval_key": "%s","custtype":"P","tr_type":"1","content-type":"utf-8"},"body":{"input":{"tr_id":"%s","tr_key":"%s"}}}' % (approval_key, tr_id, tr_key))
+        data = ws.recv()
+        if data[0] not in '01':
+            json.loads(data)
+    return ws, None, None
+
+
+def first_tick(connect, info, registrations):
+    """연결 + 구독 후 첫 실시간 프레임 수신까지"""
+    ws, _, _ = connect(info, info['APPROVAL_KEY'], registrations)
+    try:
+        while True:
+            data = ws.recv()
+            if data[0] == '0':
+                return data
+    finally:
+        ws.close()
+
+
+def main(iterations=10, ws_latency_ms=20.0):
+    mock = MockKIS(tick_rate=200, ws_latency_ms=ws_latency_ms, ping_interval=3600)
+    URL_BASE, SOCKET_URL = mock.start()
+    info = {"NAME": "bench", "URL_BASE": URL_BASE, "SOCKET_URL": SOCKET_URL, "APPROVAL_KEY": "bench", "HTS_ID": "bench"}
+    codes = {"%06d" % (100000 + i): {} for i in range(N_CODES)}
+    registrations = plan_registrations(info, codes)[0]
+    try:
+        sequential = measure(lambda: first_tick(sequential_subscribe, info, registrations), iterations, warmup=1)
+        pipelined = measure(lambda: first_tick(subscribe_session, info, registrations), iterations, warmup=1)
+    finally:
+        mock.stop()
+
+    print("registrations: %d, ws latency: %.0f ms" % (len(registrations), ws_latency_ms))
+    print_result("reconnect->first tick (sequential)", sequential)
+    print_result("reconnect->first tick (pipelined)", pipelined)
+    print("speedup: x%.1f (p50)" % (sequential["p50_ns"] / pipelined["p50_ns"]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 20.0)
@@ -0,0 +1,75 @@
+"""
+keep-alive 세션 풀 적용 전/후 TR 호출 지연 비교
+
+로컬 HTTP 서버(KIS 대역)를 띄워 inquire_price 호출을
+- 매 호출 새 연결 (requests.get, 기존 방식)
+- 계좌별 커넥션 풀 (tr_functions.get_session)
+로 각각 측정한다.
+
+실행:
+    python -m benchmarks.bench_tr_session [iterations]
+"""
+
+import sys
+import json
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import tr_functions
+from rate_limiter import RateLimiter, install_rate_limiter
+from benchmarks.harness import measure, print_result
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """모든 경로에 고정 JSON으로 응답하는 keep-alive 핸들러"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = json.dumps({"rt_cd": "0", "output": {"stck_prpr": "70000"}, "HASH": "x"}).encode()
+
+    def _reply(self, with_body=True):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if length:
+            self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(self.body)
+
+    do_GET = do_POST = _reply
+
+    def do_HEAD(self):
+        self._reply(with_body=False)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(iterations=500):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    URL_BASE = "http://127.0.0.1:%d" % server.server_address[1]
+    info = {"URL_BASE": URL_BASE, "APP_KEY": "bench", "APP_SECRET": "bench", "ACCESS_TOKEN": "bench"}
+    install_rate_limiter("bench", RateLimiter(1e9))  # 연결 비용만 측정하도록 속도 제한 해제
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/quotations/inquire-price"
+
+    try:
+        fresh = measure(lambda: requests.get(URL, params={"fid_input_iscd": "005930"}).json(), iterations)
+        tr_functions.warmup_session(**info)
+        pooled = measure(lambda: tr_functions.inquire_price(**info, code="005930").json(), iterations)
+        order = measure(lambda: tr_functions.order_cash_Buy(**info, CANO="0", ACNT_PRDT_CD="01",
+                                                           code="005930", qty="1", price="0"), iterations)
+    finally:
+        server.shutdown()
+        tr_functions.close_sessions()
+
+    print_result("inquire_price (new connection)", fresh)
+    print_result("inquire_price (pooled session)", pooled)
+    print_result("order_cash_Buy (hashkey+order, pooled)", order)
+    print("per-call latency drop: %.1f us (p50)" % ((fresh["p50_ns"] - pooled["p50_ns"]) / 1e3))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,79 @@
+"""
+벤치마크용 실시간 프레임 생성/로드
+
+KIS 실시간 프레임 형식('0|TR_ID|NNN|body')의 H0STCNT0 / H0STASP0 레코드를 만들고,
+녹화된 프레임 파일(한 줄에 프레임 1개)도 읽을 수 있다.
+"""
+
+import random
+
+
+def cnt_record(code, price, hhmmss="090501", volume=10, acml_volume=1000):
+    """H0STCNT0(실시간 체결가) 레코드 1건의 필드 리스트 (46개)"""
+    fields = ["0"] * 46
+    fields[0] = code
+    fields[1] = hhmmss
+    fields[2] = str(price)
+    fields[3] = "2"
+    fields[10] = str(price + 10)
+    fields[11] = str(price)
+    fields[12] = str(volume)
+    fields[13] = str(acml_volume)
+    fields[33] = "20240102"
+    return fields
+
+
+def asp_record(code, ask, bid, hhmmss="090501"):
+    """H0STASP0(실시간 호가) 레코드 1건의 필드 리스트 (59개)"""
+    fields = ["0"] * 59
+    fields[0] = code
+    fields[1] = hhmmss
+    for i in range(10):
+        fields[3 + i] = str(ask + 10 * i)   # 매도호가 1~10
+        fields[13 + i] = str(bid - 10 * i)  # 매수호가 1~10
+        fields[23 + i] = "100"
+        fields[33 + i] = "100"
+    return fields
+
+
+def make_frame(tr_id, records):
+    """레코드 리스트로 실시간 프레임 문자열 생성"""
+    body = "^".join("^".join(record) for record in records)
+    return "0|%s|%03d|%s" % (tr_id, len(records), body)
+
+
+def synthetic_frames(codes, n_frames, records_per_frame=1, seed=0, base_price=10000):
+    """
+    체결/호가 프레임을 번갈아 생성 (가격은 종목별 랜덤워크)
+
+    Args:
+        codes (list): 종목코드 리스트
+        n_frames (int): 생성할 프레임 수
+        records_per_frame (int): 프레임당 레코드 수
+        seed (int): 난수 시드 (반복 측정 시 동일 데이터)
+        base_price (int): 시작 가격
+
+    Returns:
+        list: 프레임 문자열 리스트
+    """
+    rnd = random.Random(seed)
+    prices = {code: base_price for code in codes}
+    frames = []
+    for i in range(n_frames):
+        tr_id = "H0STCNT0" if i % 2 == 0 else "H0STASP0"
+        records = []
+        for _ in range(records_per_frame):
+            code = rnd.choice(codes)
+            prices[code] = max(100, prices[code] + rnd.choice((-10, 0, 10)))
+            if tr_id == "H0STCNT0":
+                records.append(cnt_record(code, prices[code]))
+            else:
+                records.append(asp_record(code, prices[code] + 10, prices[code]))
+        frames.append(make_frame(tr_id, records))
+    return frames
+
+
+def load_frames(path):
+    """녹화된 프레임 파일 로드 (한 줄에 프레임 1개, '0|'로 시작하는 줄만)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.startswith("0|")]
@@ -0,0 +1,148 @@
+"""
+벤치마크 공통 측정 도구
+
+주요 기능:
+1. 반복 호출 시간 측정 (monotonic clock)
+2. 통계 계산 (ops/sec, p50, p99)
+3. 결과 출력
+4. JSON 결과 저장 및 기준 결과와 비교 (회귀 확인)
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+
+
+def percentile(sorted_values, pct):
+    """
+    정렬된 값 목록에서 백분위수 계산
+
+    Args:
+        sorted_values (list): 오름차순 정렬된 값
+        pct (float): 백분위 (0~100)
+
+    Returns:
+        float: 백분위 값
+    """
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(samples_ns, ops_per_sample=1):
+    """
+    측정 샘플(ns) 통계 요약
+
+    Args:
+        samples_ns (list): 1회 호출당 소요 시간(ns)
+        ops_per_sample (int): 1회 호출당 처리한 작업 수
+
+    Returns:
+        dict: ops_per_sec, mean_ns, p50_ns, p99_ns, max_ns, samples
+    """
+    values = sorted(samples_ns)
+    total = sum(values)
+    return {
+        "samples": len(values),
+        "ops_per_sec": (len(values) * ops_per_sample) / (total / 1e9) if total else 0.0,
+        "mean_ns": total / len(values) / ops_per_sample if values else 0.0,
+        "p50_ns": percentile(values, 50) / ops_per_sample,
+        "p99_ns": percentile(values, 99) / ops_per_sample,
+        "max_ns": (values[-1] / ops_per_sample) if values else 0.0,
+    }
+
+
+def measure(fn, iterations=1000, warmup=10, ops_per_call=1):
+    """
+    함수 반복 호출 시간 측정
+
+    Args:
+        fn (callable): 측정할 함수 (인자 없음)
+        iterations (int): 측정 횟수
+        warmup (int): 측정 전 예열 횟수
+        ops_per_call (int): 1회 호출당 처리한 작업 수 (배치 측정 시)
+
+    Returns:
+        dict: summarize() 결과
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        t0 = clock()
+        fn()
+        samples.append(clock() - t0)
+    return summarize(samples, ops_per_call)
+
+
+def print_result(name, stats, file=None):
+    """측정 결과 한 줄 출력"""
+    print("%-40s %12.0f ops/s  p50 %10.1f us  p99 %10.1f us" % (
+        name, stats["ops_per_sec"], stats["p50_ns"] / 1e3, stats["p99_ns"] / 1e3), file=file)
+
+
+def environment():
+    """측정 환경 정보 (결과 JSON 의 meta)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": commit,
+    }
+
+
+def write_results(results, path=None):
+    """
+    측정 결과를 JSON 으로 저장 (path 가 None 이면 표준 출력)
+
+    Args:
+        results (dict): {이름: summarize() 결과}
+        path (str): 저장 경로
+
+    Returns:
+        dict: 저장한 문서 (meta, results)
+    """
+    document = {"meta": environment(), "results": results}
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return document
+
+
+def compare(baseline_path, results, threshold=0.2):
+    """
+    기준 결과 대비 p50 이 threshold 이상 느려진 항목
+
+    Args:
+        baseline_path (str): 기준 결과 JSON 경로
+        results (dict): 현재 측정 결과
+        threshold (float): 허용 비율 (0.2 = 20%)
+
+    Returns:
+        list: (이름, 기준 p50_ns, 현재 p50_ns, 비율)
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("p50_ns"):
+            continue
+        ratio = stats["p50_ns"] / base["p50_ns"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["p50_ns"], stats["p50_ns"], ratio))
+    return regressions
@@ -0,0 +1,67 @@
+"""
+시각 제공 모듈
+전략과 스케줄러는 datetime.now() / pd.Timestamp.now() 대신 이 모듈의 now() / now_kst() 를 사용한다.
+실거래에서는 시스템 시계를 그대로 쓰고, 리플레이/백테스트에서는 install_clock 으로
+프레임 수신 시각을 따라가는 시계를 설치한다.
+
+주요 기능:
+1. 현재 시각 (now, now_kst)
+2. 시계 교체/복원 (install_clock, reset_clock)
+3. 수동 진행 시계 (SimulatedClock)
+"""
+
+import datetime
+import pandas as pd
+
+_clock = None  # None 이면 시스템 시계
+
+
+def now():
+    """현재 시각 (datetime, 로컬 시각)"""
+    return _clock() if _clock is not None else datetime.datetime.now()
+
+
+def now_kst():
+    """현재 시각 (pd.Timestamp, Asia/Seoul)"""
+    if _clock is None:
+        return pd.Timestamp.now(tz='Asia/Seoul')
+    return pd.Timestamp(_clock()).tz_localize('Asia/Seoul')
+
+
+def install_clock(clock):
+    """
+    시계 교체
+
+    Args:
+        clock (callable): datetime 을 반환하는 함수 (None 이면 시스템 시계)
+    """
+    global _clock
+    _clock = clock
+
+
+def reset_clock():
+    """시스템 시계로 복원"""
+    install_clock(None)
+
+
+class SimulatedClock:
+    """
+    수동으로 진행하는 시계 (리플레이용)
+
+    Attributes:
+        current (datetime): 현재 시각
+    """
+    def __init__(self, start):
+        self.current = start
+
+    def __call__(self):
+        return self.current
+
+    def set(self, when):
+        """시각 설정 (되돌아가지 않음)"""
+        if when > self.current:
+            self.current = when
+
+    def advance(self, delta):
+        """시각 진행"""
+        self.current += delta
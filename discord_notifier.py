@@ -0,0 +1,210 @@
+"""
+Discord 웹훅 알림 전송 모듈
+매매 스레드에서는 메시지를 큐에 넣기만 하고, 백그라운드 스레드가 여러 메시지를 묶어 전송한다.
+
+주요 기능:
+1. 크기 제한 큐 (가득 차면 새 메시지를 버리고 카운트)
+2. 여러 메시지를 한 번의 요청으로 묶어 전송 (Discord 2000자 제한 내)
+3. 429 응답 시 retry_after 만큼 대기 후 재전송
+4. 전송/대기/버림 카운터
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+import requests
+
+logger = logging.getLogger()
+
+DISCORD_MAX_CONTENT = 2000  # Discord 메시지 최대 길이
+
+
+class DiscordNotifier:
+    """
+    웹훅 URL별 비동기 알림 전송기
+
+    Attributes:
+        _url (str): Discord 웹훅 URL
+        _queue (Queue): 전송 대기 메시지 큐
+        _session (requests.Session): 웹훅 전송용 keep-alive 세션
+        _linger (float): 첫 메시지 이후 다른 메시지를 모으는 시간(초)
+        queued (int): 큐에 넣은 메시지 수
+        sent (int): 전송 완료한 메시지 수
+        dropped (int): 큐가 가득 차 버린 메시지 수
+        failed (int): 전송 실패로 버린 메시지 수
+        posts (int): 웹훅 요청 수
+    """
+    def __init__(self, webhook_url, maxsize=1000, linger=0.2, max_retries=5):
+        self._url = webhook_url
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._session = requests.Session()
+        self._linger = linger
+        self._max_retries = max_retries
+        self._carry = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.posts = 0
+        self._thread = threading.Thread(target=self._run, name='discord-notifier', daemon=True)
+        self._thread.start()
+
+    def send(self, message):
+        """
+        메시지를 전송 큐에 추가 (절대 대기하지 않음)
+
+        Args:
+            message (str): 전송할 메시지
+
+        Returns:
+            bool: 큐 추가 여부 (가득 차 버린 경우 False)
+        """
+        try:
+            self._queue.put_nowait(str(message))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def stats(self):
+        """전송 카운터"""
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'pending': self._queue.qsize(),
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'posts': self.posts,
+            }
+
+    def flush(self, timeout=5.0):
+        """
+        대기 중인 메시지가 모두 전송될 때까지 대기
+
+        Args:
+            timeout (float): 최대 대기 시간(초)
+
+        Returns:
+            bool: 모두 전송되었는지 여부
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _collect(self, first):
+        """첫 메시지 이후 linger 동안 도착한 메시지를 2000자 이내로 묶음"""
+        lines = [first[:DISCORD_MAX_CONTENT]]
+        size = len(lines[0])
+        deadline = time.monotonic() + self._linger
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                message = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + 1 + len(message) > DISCORD_MAX_CONTENT:
+                self._carry = message
+                break
+            lines.append(message)
+            size += 1 + len(message)
+        return lines
+
+    def _run(self):
+        while True:
+            if self._carry is not None:
+                first, self._carry = self._carry, None
+            else:
+                first = self._queue.get()
+            lines = self._collect(first)
+            self._post(lines)
+            for _ in lines:
+                self._queue.task_done()
+
+    def _post(self, lines):
+        """묶은 메시지를 한 번에 전송 (429 응답 시 retry_after 후 재시도)"""
+        payload = {"content": "\n".join(lines)}
+        for _ in range(self._max_retries):
+            try:
+                res = self._session.post(self._url, data=payload, timeout=10)
+            except requests.RequestException as e:
+                logger.error(f"Discord 전송 오류: {e}")
+                time.sleep(1)
+                continue
+            with self._lock:
+                self.posts += 1
+            if res.status_code == 429:
+                time.sleep(self._retry_after(res))
+                continue
+            with self._lock:
+                if res.status_code < 400:
+                    self.sent += len(lines)
+                else:
+                    self.failed += len(lines)
+            return
+        with self._lock:
+            self.failed += len(lines)
+
+    @staticmethod
+    def _retry_after(res):
+        """429 응답의 재시도 대기 시간(초)"""
+        try:
+            return float(res.json().get('retry_after', 1.0))
+        except Exception:
+            return float(res.headers.get('Retry-After', 1.0))
+
+
+# (pid, 웹훅 URL) 별 전송기
+_NOTIFIERS = {}
+_NOTIFIERS_LOCK = threading.Lock()
+
+def get_notifier(DISCORD_WEBHOOK_URL):
+    """
+    웹훅 URL별 전송기 반환 (현재 프로세스 기준, 없으면 생성)
+
+    Args:
+        DISCORD_WEBHOOK_URL (str): Discord 웹훅 URL
+
+    Returns:
+        DiscordNotifier: 전송기 (URL이 비어 있으면 None)
+    """
+    if not DISCORD_WEBHOOK_URL:
+        return None
+    key = (os.getpid(), DISCORD_WEBHOOK_URL)
+    with _NOTIFIERS_LOCK:
+        notifier = _NOTIFIERS.get(key)
+        if notifier is None:
+            notifier = _NOTIFIERS[key] = DiscordNotifier(DISCORD_WEBHOOK_URL)
+    return notifier
+
+def notify(DISCORD_WEBHOOK_URL, message):
+    """
+    Discord 메시지 전송 요청 (큐에 넣고 바로 반환)
+
+    Args:
+        DISCORD_WEBHOOK_URL (str): Discord 웹훅 URL
+        message (str): 전송할 메시지
+
+    Returns:
+        bool: 큐 추가 여부
+    """
+    notifier = get_notifier(DISCORD_WEBHOOK_URL)
+    return notifier.send(message) if notifier is not None else False
+
+@atexit.register
+def flush_notifiers(timeout=5.0):
+    """현재 프로세스의 모든 전송기의 대기 메시지 전송 (프로세스 종료 시 자동 호출)"""
+    pid = os.getpid()
+    for key, notifier in list(_NOTIFIERS.items()):
+        if key[0] == pid:
+            notifier.flush(timeout)
@@ -0,0 +1,218 @@
+"""
+웹소켓 원본 프레임 기록 모듈
+수신한 모든 프레임을 수신 시각과 함께 계좌별/일자별 세그먼트 파일에 추가 기록한다.
+(ID_ACCOUNT/<name>/frames/YYYYMMDD.seg)
+
+세그먼트 파일 형식:
+    파일 헤더: SEGMENT_MAGIC (8 bytes)
+    블록     : [압축 길이 u32][crc32 u32][zlib 압축 데이터]
+    레코드   : [monotonic_ns u64][time_ns u64][길이 u32][프레임 UTF-8] (블록 압축 해제 후 연속 배치)
+
+수신 루프는 (시각, 프레임) 튜플을 큐에 넣기만 하고, 인코딩/압축/쓰기는 기록 스레드가 담당한다.
+프로세스가 블록을 쓰는 도중 종료되면 다음에 열 때 마지막 완전한 블록까지 잘라낸다.
+
+주요 기능:
+1. 프레임 기록 (FrameRecorder.record)
+2. 세그먼트 복구 (recover_segment)
+3. 세그먼트 읽기 (iter_segment)
+"""
+
+import os
+import zlib
+import time
+import queue
+import struct
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger()
+
+SEGMENT_MAGIC = b'KISSEG1\n'
+BLOCK_HEADER = struct.Struct('<II')     # 압축 길이, crc32
+RECORD_HEADER = struct.Struct('<QQI')   # monotonic_ns, time_ns, 프레임 길이
+
+
+def segment_path(directory, day):
+    """
+    일자별 세그먼트 파일 경로
+
+    Args:
+        directory (str): 세그먼트 디렉토리 (ID_ACCOUNT/<name>/frames)
+        day (date): 일자
+
+    Returns:
+        str: 세그먼트 파일 경로
+    """
+    return os.path.join(directory, day.strftime('%Y%m%d') + '.seg')
+
+
+def _iter_blocks(f):
+    """(블록 끝 위치, 압축 해제 데이터) 생성 - 불완전하거나 손상된 블록에서 중단"""
+    header = f.read(len(SEGMENT_MAGIC))
+    if header != SEGMENT_MAGIC:
+        return
+    offset = len(SEGMENT_MAGIC)
+    while True:
+        raw = f.read(BLOCK_HEADER.size)
+        if len(raw) < BLOCK_HEADER.size:
+            return
+        size, crc = BLOCK_HEADER.unpack(raw)
+        payload = f.read(size)
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return
+        offset += BLOCK_HEADER.size + size
+        yield offset, zlib.decompress(payload)
+
+
+def recover_segment(path):
+    """
+    세그먼트 파일을 마지막 완전한 블록까지 잘라냄 (헤더가 없으면 새로 작성)
+
+    Args:
+        path (str): 세그먼트 파일 경로
+
+    Returns:
+        int: 유효한 파일 길이
+    """
+    valid = 0
+    with open(path, 'a+b') as f:
+        f.seek(0)
+        if f.read(len(SEGMENT_MAGIC)) == SEGMENT_MAGIC:
+            valid = len(SEGMENT_MAGIC)
+            f.seek(0)
+            for valid, _ in _iter_blocks(f):
+                pass
+        size = f.seek(0, os.SEEK_END)
+        if valid == 0:
+            f.truncate(0)
+            f.write(SEGMENT_MAGIC)
+            valid = len(SEGMENT_MAGIC)
+        elif size > valid:
+            logger.warning(f"Frame segment truncated: {path} ({size} -> {valid} bytes)")
+            f.truncate(valid)
+    return valid
+
+
+def iter_segment(path):
+    """
+    세그먼트 파일의 프레임을 기록 순서대로 읽음
+
+    Args:
+        path (str): 세그먼트 파일 경로
+
+    Yields:
+        tuple: (monotonic_ns, time_ns, 프레임 문자열)
+    """
+    with open(path, 'rb') as f:
+        for _, block in _iter_blocks(f):
+            pos = 0
+            end = len(block)
+            while pos + RECORD_HEADER.size <= end:
+                mono_ns, wall_ns, length = RECORD_HEADER.unpack_from(block, pos)
+                pos += RECORD_HEADER.size
+                yield mono_ns, wall_ns, block[pos:pos + length].decode('utf-8')
+                pos += length
+
+
+class FrameRecorder:
+    """
+    계좌별 원본 프레임 기록기
+
+    Attributes:
+        _directory (str): 세그먼트 디렉토리
+        _queue (SimpleQueue): 기록 대기 (monotonic_ns, time_ns, 프레임)
+        _block_size (int): 블록 압축 단위 (압축 전 바이트)
+        _flush_interval (float): 블록이 차지 않아도 기록하는 주기(초)
+        recorded (int): 기록한 프레임 수
+        blocks (int): 기록한 블록 수
+    """
+    def __init__(self, directory, block_size=64 * 1024, flush_interval=1.0, level=6):
+        self._directory = directory
+        self._block_size = block_size
+        self._flush_interval = flush_interval
+        self._level = level
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._day = None
+        self.recorded = 0
+        self.blocks = 0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='frame-recorder', daemon=True)
+        self._thread.start()
+
+    def record(self, data):
+        """
+        수신 프레임 기록 요청 (수신 루프에서 호출, 파일 I/O 없음)
+
+        Args:
+            data (str): 웹소켓 수신 문자열
+        """
+        self._queue.put((time.monotonic_ns(), time.time_ns(), data))
+
+    def pending(self):
+        """기록 대기 중인 프레임 수"""
+        return self._queue.qsize()
+
+    def close(self, timeout=5.0):
+        """남은 프레임을 기록하고 파일 닫기"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open(self, day):
+        """일자별 세그먼트 파일 열기 (이미 있으면 복구 후 이어서 기록)"""
+        if self._file is not None:
+            self._file.close()
+        path = segment_path(self._directory, day)
+        recover_segment(path)
+        self._file = open(path, 'ab')
+        self._day = day
+
+    def _write_block(self, records):
+        """레코드 묶음을 하나의 압축 블록으로 기록"""
+        day = datetime.date.fromtimestamp(records[0][1] / 1e9)
+        if day != self._day:
+            self._open(day)
+        buf = bytearray()
+        for mono_ns, wall_ns, data in records:
+            encoded = data.encode('utf-8')
+            buf += RECORD_HEADER.pack(mono_ns, wall_ns, len(encoded))
+            buf += encoded
+        payload = zlib.compress(bytes(buf), self._level)
+        self._file.write(BLOCK_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        self.recorded += len(records)
+        self.blocks += 1
+
+    def _run(self):
+        records = []
+        size = 0
+        deadline = time.monotonic() + self._flush_interval
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                closing = True
+            elif item:
+                if records and datetime.date.fromtimestamp(item[1] / 1e9) != datetime.date.fromtimestamp(records[0][1] / 1e9):
+                    self._flush_records(records)  # 날짜가 바뀌면 새 세그먼트로
+                    records, size = [], 0
+                records.append(item)
+                size += RECORD_HEADER.size + len(item[2])
+                if size < self._block_size and time.monotonic() < deadline:
+                    continue
+            if records:
+                self._flush_records(records)
+                records, size = [], 0
+            deadline = time.monotonic() + self._flush_interval
+        if self._file is not None:
+            self._file.close()
+
+    def _flush_records(self, records):
+        try:
+            self._write_block(records)
+        except Exception as e:
+            logger.error(f"Frame recorder write error: {e}")
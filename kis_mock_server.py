@@ -0,0 +1,687 @@
+"""
+KIS Open API 로컬 모의 서버 (부하/지연 테스트용)
+실제 한국투자증권 서버와 같은 URL 경로, tr_id 헤더, 구독 JSON, AES 암호화 체결 통보(H0STCNI0),
+PINGPONG 을 제공하므로 설정 파일의 URL_BASE / SOCKET_URL 만 바꾸면 main_multiprocessing.py 전체를
+노트북에서 실행해 볼 수 있다.
+
+    "URL_BASE": "http://127.0.0.1:18080",
+    "SOCKET_URL": "ws://127.0.0.1:18081"
+
+주요 기능:
+1. REST: 토큰/웹소켓 접속키 발급, 해시키, 잔고/주문가능/현재가/일봉/호가/휴장일 조회, 현금 주문
+2. 웹소켓(RFC6455): 구독/해제 응답(AES key/iv), 세션당 구독 수 제한, PINGPONG, ping/pong
+3. 시세 스트리밍: 구독 종목별 초당 tick_rate 건의 체결가(H0STCNT0)/호가(H0STASP0) 프레임
+4. 주문 체결: 주문 접수/체결 통보를 구독 세션에 암호화하여 전송, 잔고 반영
+5. 장애 주입: 응답 지연(latency_ms, jitter_ms), 초당 거래건수 초과(EGW00201), rt_cd=1 업무 오류,
+   웹소켓 세션 끊기/멈추기(drop_sessions)
+
+실행:
+    python kis_mock_server.py --rest-port 18080 --ws-port 18081 --tick-rate 5 --latency-ms 20 --rate-limit-error 0.01
+"""
+
+import json
+import time
+import base64
+import random
+import socket
+import struct
+import hashlib
+import logging
+import argparse
+import datetime
+import threading
+import socketserver
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from tr_functions import aes_cbc_base64_enc
+from realtime_frames import notice_record
+from screening import floor_tick, tick_size
+from benchmarks.frames import cnt_record, asp_record, make_frame
+
+logger = logging.getLogger()
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+NOTICE_TR_IDS = ("H0STCNI0", "H0STCNI9", "K0STCNI0", "K0STCNI9")
+MAX_SUBSCRIPTIONS = 41  # 세션당 실시간 등록 한도
+
+RATE_LIMIT_BODY = {"rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다."}
+BUSINESS_ERROR_BODY = {"rt_cd": "1", "msg_cd": "APBK0919", "msg1": "모의 서버 오류 응답입니다."}
+
+
+class MockMarket:
+    """
+    모의 시장/계좌 상태
+
+    Attributes:
+        prices (dict): {종목코드: 현재가} (호가 단위)
+        closes (dict): {종목코드: 전일종가}
+        _levels (dict): {종목코드: 랜덤워크 수준} (float, 정수로 버리면 가격이 계속 내려가므로 따로 유지)
+        cash (int): 예수금
+        positions (dict): {종목코드: [보유수량, 평균단가]}
+        _lock (Lock): 상태 보호용 락
+    """
+    def __init__(self, initial_cash=10_000_000, base_price=10000, volatility=0.0005, seed=0):
+        self.cash = initial_cash
+        self.positions = {}
+        self.prices = {}
+        self.closes = {}
+        self._levels = {}
+        self._base_price = base_price
+        self._volatility = volatility
+        self._seed = seed
+        self._rnd = random.Random(seed)
+        self._odno = 0
+        self._lock = threading.Lock()
+
+    def price(self, code):
+        """종목 현재가 (처음 조회한 종목은 시드와 종목코드로 정한 가격으로 시작)"""
+        with self._lock:
+            return self._price(code)
+
+    def _price(self, code):
+        if code not in self.prices:
+            # 종목별로 정해진 전일종가 (조회 순서와 관계없이 같은 값)
+            close = int(self._base_price * random.Random(f"{self._seed}|{code}").uniform(0.5, 2.0))
+            self.closes[code] = close
+            self.prices[code] = close
+            self._levels[code] = float(close)
+        return self.prices[code]
+
+    def tick(self, code):
+        """랜덤워크로 다음 체결가 생성 (호가 단위로 내림)"""
+        with self._lock:
+            self._price(code)
+            level = self._levels[code] = self._levels[code] * (1 + self._rnd.gauss(0, self._volatility))
+            price = self.prices[code] = max(1, int(floor_tick(round(level))))
+            return price
+
+    def order(self, side, code, qty):
+        """
+        시장가 주문 즉시 체결
+
+        Returns:
+            tuple: (주문번호, 체결가)
+        """
+        with self._lock:
+            self._odno += 1
+            price = self._price(code)
+            held, avg = self.positions.get(code, (0, 0.0))
+            if side == 'BUY':
+                self.positions[code] = [held + qty, (held * avg + qty * price) / (held + qty)]
+                self.cash -= qty * price
+            else:
+                qty = min(qty, held)
+                self.positions[code] = [held - qty, avg]
+                self.cash += qty * price
+            return '%010d' % self._odno, price, qty
+
+    def balance(self):
+        """inquire_balance 응답 본문"""
+        with self._lock:
+            output1 = []
+            evlu = 0
+            for code, (qty, avg) in self.positions.items():
+                if qty <= 0:
+                    continue
+                price = self._price(code)
+                evlu += qty * price
+                output1.append({
+                    "pdno": code, "prdt_name": f"MOCK{code}", "hldg_qty": str(qty), "ord_psbl_qty": str(qty),
+                    "pchs_avg_pric": "%.4f" % avg, "pchs_amt": str(int(qty * avg)), "prpr": str(price),
+                    "evlu_amt": str(qty * price), "evlu_pfls_amt": str(int(qty * (price - avg))),
+                    "evlu_pfls_rt": "%.2f" % ((price / avg - 1) * 100 if avg else 0.0), "thdt_buyqty": str(qty),
+                })
+            output2 = [{"dnca_tot_amt": str(self.cash), "scts_evlu_amt": str(evlu),
+                        "tot_evlu_amt": str(self.cash + evlu), "nass_amt": str(self.cash + evlu)}]
+        return {"rt_cd": "0", "msg_cd": "KIOK0510", "msg1": "조회가 완료되었습니다", "output1": output1, "output2": output2}
+
+
+class MockKIS:
+    """
+    모의 서버 (REST + 웹소켓)
+
+    Attributes:
+        market (MockMarket): 시장/계좌 상태
+        tick_rate (float): 구독 종목별 초당 체결가 프레임 수 (호가도 같은 수)
+        latency_ms (float): REST 응답 지연(ms)
+        jitter_ms (float): REST 응답 지연 편차(ms)
+        ws_latency_ms (float): 웹소켓 구독 요청 처리/응답 지연(ms, 요청마다 독립적으로 지연되어 왕복 지연처럼 동작)
+        rate_limit_error (float): EGW00201 응답 확률
+        business_error (float): rt_cd=1 응답 확률 (주문/조회)
+        rest_rate (float): 앱 키별 초당 허용 호출 수 (초과 시 EGW00201, 0 이면 제한 없음)
+        notice_delay_ms (float): 주문 접수 후 체결 통보까지 지연(ms)
+        ping_interval (float): PINGPONG 전송 주기(초)
+        stats (dict): 요청/오류/프레임 카운터
+    """
+    def __init__(self, market=None, tick_rate=1.0, latency_ms=0.0, jitter_ms=0.0, rate_limit_error=0.0,
+                 business_error=0.0, rest_rate=0.0, notice_delay_ms=50.0, ping_interval=30.0,
+                 records_per_frame=1, seed=0, ws_latency_ms=0.0):
+        self.market = market or MockMarket(seed=seed)
+        self.tick_rate = tick_rate
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.ws_latency_ms = ws_latency_ms
+        self.rate_limit_error = rate_limit_error
+        self.business_error = business_error
+        self.rest_rate = rest_rate
+        self.notice_delay_ms = notice_delay_ms
+        self.ping_interval = ping_interval
+        self.records_per_frame = records_per_frame
+        self._rnd = random.Random(seed)
+        self._sessions = set()
+        self._stalled = set()
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._stop = threading.Event()
+        self._threads = []
+        self.stats = {"rest": 0, "rate_limited": 0, "business_errors": 0, "orders": 0,
+                      "ws_sessions": 0, "frames": 0, "notices": 0}
+
+    # 서버 시작/종료
+    def start(self, host="127.0.0.1", rest_port=0, ws_port=0):
+        """
+        REST/웹소켓 서버 시작 (포트 0 이면 임의 포트)
+
+        Returns:
+            tuple: (URL_BASE, SOCKET_URL)
+        """
+        mock = self
+
+        class RestHandler(_RestHandler):
+            server_mock = mock
+
+        class WsHandler(_WsHandler):
+            server_mock = mock
+
+        self._rest = ThreadingHTTPServer((host, rest_port), RestHandler)
+        self._rest.daemon_threads = True
+        self._ws = _WsServer((host, ws_port), WsHandler)
+        for target in (self._rest.serve_forever, self._ws.serve_forever, self._stream, self._ping):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.URL_BASE = "http://%s:%d" % self._rest.server_address
+        self.SOCKET_URL = "ws://%s:%d" % self._ws.server_address
+        return self.URL_BASE, self.SOCKET_URL
+
+    def stop(self):
+        """서버 종료 (열린 웹소켓 세션 종료)"""
+        self._stop.set()
+        self._rest.shutdown()
+        self._ws.shutdown()
+        with self._lock:
+            sessions = list(self._sessions | self._stalled)
+        for session in sessions:
+            session.close()
+
+    def drop_sessions(self, stall=False):
+        """
+        열린 웹소켓 세션 장애 주입
+
+        Args:
+            stall (bool): False 면 연결 종료, True 면 연결은 유지한 채 프레임/PINGPONG/통보 전송 중단
+
+        Returns:
+            int: 대상 세션 수
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+            if stall:
+                self._stalled.update(sessions)
+        if not stall:
+            for session in sessions:
+                session.close()
+        return len(sessions)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    # REST
+    def _delay(self):
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, self.latency_ms + self._rnd.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0)
+
+    def _rate_limited(self, app_key):
+        """앱 키별 1초 창 호출 수 초과 또는 확률적 EGW00201 주입"""
+        if self.rate_limit_error and self._rnd.random() < self.rate_limit_error:
+            return True
+        if not self.rest_rate:
+            return False
+        window = int(time.monotonic())
+        with self._lock:
+            start, count = self._windows.get(app_key, (window, 0))
+            if start != window:
+                start, count = window, 0
+            self._windows[app_key] = (start, count + 1)
+        return count + 1 > self.rest_rate
+
+    def handle_rest(self, method, path, headers, query, body):
+        """
+        REST 요청 처리
+
+        Returns:
+            tuple: (HTTP 상태 코드, 응답 JSON)
+        """
+        self._count("rest")
+        self._delay()
+        path = path.strip("/")
+        if path in ("oauth2/tokenP", "oauth2/Approval", "uapi/hashkey", ""):
+            return self._auth(path, body)
+        if self._rate_limited(headers.get("appkey", "")):
+            self._count("rate_limited")
+            return 500, RATE_LIMIT_BODY
+        if self.business_error and self._rnd.random() < self.business_error:
+            self._count("business_errors")
+            return 200, BUSINESS_ERROR_BODY
+        tr_id = headers.get("tr_id", "")
+        handler = self._routes().get(path)
+        if handler is None:
+            return 404, {"rt_cd": "1", "msg_cd": "EGW00001", "msg1": f"존재하지 않는 경로입니다: {path}"}
+        return handler(tr_id, query, body)
+
+    def _routes(self):
+        return {
+            "uapi/domestic-stock/v1/trading/inquire-balance": self._inquire_balance,
+            "uapi/domestic-stock/v1/trading/inquire-psbl-order": self._inquire_psbl_order,
+            "uapi/domestic-stock/v1/quotations/inquire-price": self._inquire_price,
+            "uapi/domestic-stock/v1/quotations/inquire-daily-price": self._inquire_daily_price,
+            "uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice": self._inquire_daily_itemchartprice,
+            "uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn": self._inquire_asking_price,
+            "uapi/domestic-stock/v1/quotations/chk-holiday": self._check_holiday,
+            "uapi/domestic-stock/v1/trading/order-cash": self._order_cash,
+        }
+
+    def _auth(self, path, body):
+        if path == "oauth2/tokenP":
+            expired = (datetime.datetime.now() + datetime.timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")
+            return 200, {"access_token": "mock-" + hashlib.sha1(str(time.time()).encode()).hexdigest(),
+                         "token_type": "Bearer", "expires_in": 86400, "access_token_token_expired": expired}
+        if path == "oauth2/Approval":
+            return 200, {"approval_key": "mock-approval-" + hashlib.sha1(str(time.time()).encode()).hexdigest()[:20]}
+        if path == "uapi/hashkey":
+            return 200, {"BODY": body, "HASH": hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()}
+        return 200, {}  # HEAD/루트 (세션 예열)
+
+    def _inquire_balance(self, tr_id, query, body):
+        return 200, self.market.balance()
+
+    def _inquire_psbl_order(self, tr_id, query, body):
+        cash = self.market.balance()["output2"][0]["dnca_tot_amt"]
+        return 200, {"rt_cd": "0", "msg1": "조회가 완료되었습니다",
+                     "output": {"ord_psbl_cash": cash, "nrcvb_buy_amt": cash, "max_buy_amt": cash}}
+
+    @staticmethod
+    def _code(query):
+        """조회 종목코드 (tr_functions 는 소문자 fid_input_iscd 로 보냄)"""
+        return query.get("FID_INPUT_ISCD", query.get("fid_input_iscd", "005930"))
+
+    def _inquire_price(self, tr_id, query, body):
+        code = self._code(query)
+        price = self.market.price(code)
+        return 200, {"rt_cd": "0", "msg1": "정상처리 되었습니다.",
+                     "output": {"stck_prpr": str(price), "stck_sdpr": str(self.market.closes[code]),
+                                "aspr_unit": "1", "stck_mxpr": str(int(price * 1.3)), "stck_llam": str(int(price * 0.7))}}
+
+    def _inquire_daily_price(self, tr_id, query, body):
+        code = self._code(query)
+        price = self.market.price(code)
+        today = datetime.date.today().strftime("%Y%m%d")
+        return 200, {"rt_cd": "0", "output": [{"stck_bsop_date": today, "stck_clpr": str(price),
+                                               "stck_oprc": str(self.market.closes[code])}]}
+
+    def _inquire_daily_itemchartprice(self, tr_id, query, body):
+        code = self._code(query)
+        price = self.market.price(code)
+        close = self.market.closes[code]
+        today = datetime.date.today().strftime("%Y%m%d")
+        return 200, {"rt_cd": "0", "msg1": "정상처리 되었습니다.",
+                     "output1": {"stck_prpr": str(price), "stck_prdy_clpr": str(close), "hts_kor_isnm": f"MOCK{code}"},
+                     "output2": {"stck_bsop_date": today, "stck_clpr": str(price), "stck_oprc": str(close)}}
+
+    def _inquire_asking_price(self, tr_id, query, body):
+        code = self._code(query)
+        price = self.market.price(code)
+        return 200, {"rt_cd": "0", "output1": {"askp1": str(price + int(tick_size(price))), "bidp1": str(price)}, "output2": {"stck_prpr": str(price)}}
+
+    def _check_holiday(self, tr_id, query, body):
+        today = datetime.date.today()
+        return 200, {"rt_cd": "0", "output": [{"bass_dt": today.strftime("%Y%m%d"), "opnd_yn": "Y" if today.weekday() < 5 else "N"}]}
+
+    def _order_cash(self, tr_id, query, body):
+        side = {"TTTC0802U": "BUY", "VTTC0802U": "BUY", "TTTC0801U": "SELL", "VTTC0801U": "SELL"}.get(tr_id)
+        if side is None:
+            return 200, {"rt_cd": "1", "msg_cd": "EGW00002", "msg1": f"tr_id 오류: {tr_id}"}
+        code, qty = body.get("PDNO", ""), int(body.get("ORD_QTY", "0") or 0)
+        if qty <= 0:
+            return 200, {"rt_cd": "1", "msg_cd": "APBK0918", "msg1": "주문수량을 확인하세요."}
+        odno, price, filled = self.market.order(side, code, qty)
+        self._count("orders")
+        hhmmss = datetime.datetime.now().strftime("%H%M%S")
+        self._notify(notice_record(side, code, 0, 0, hhmmss, "1", qty, order_no=odno, account=body.get("CANO", "0")))
+        timer = threading.Timer(self.notice_delay_ms / 1000.0, self._notify,
+                                (notice_record(side, code, filled, price, hhmmss, "2", qty, order_no=odno,
+                                               account=body.get("CANO", "0")),))
+        timer.daemon = True
+        timer.start()
+        return 200, {"rt_cd": "0", "msg_cd": "APBK0013", "msg1": "주문 전송 완료 되었습니다.",
+                     "output": {"KRX_FWDG_ORD_ORGNO": "91252", "ODNO": odno, "ORD_TMD": hhmmss}}
+
+    # 웹소켓
+    def _register(self, session):
+        with self._lock:
+            self._sessions.add(session)
+            self.stats["ws_sessions"] += 1
+
+    def _unregister(self, session):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _notify(self, fields):
+        """체결 통보를 통보 TR 을 구독한 세션에 암호화하여 전송"""
+        with self._lock:
+            sessions = [s for s in self._sessions if s.notice_tr_id is not None]
+        for session in sessions:
+            body = aes_cbc_base64_enc(session.aes_key, session.aes_iv, "^".join(fields))
+            if session.send_text("1|%s|001|%s" % (session.notice_tr_id, body)):
+                self._count("notices")
+
+    def _stream(self):
+        """구독 종목별 체결가/호가 프레임 전송 (tick_rate 주기)"""
+        interval = 1.0 / self.tick_rate if self.tick_rate > 0 else None
+        next_time = time.monotonic()
+        while interval is not None and not self._stop.is_set():
+            next_time += interval
+            hhmmss = datetime.datetime.now().strftime("%H%M%S")
+            with self._lock:
+                sessions = list(self._sessions)
+            prices = {}
+            for session in sessions:
+                for tr_id, codes in session.market_subscriptions().items():
+                    records = []
+                    for code in codes:
+                        if code not in prices:
+                            prices[code] = self.market.tick(code)
+                        price = prices[code]
+                        if tr_id == "H0STCNT0":
+                            records.append(cnt_record(code, price, hhmmss))
+                        elif tr_id == "H0STASP0":
+                            records.append(asp_record(code, price + int(tick_size(price)), price, hhmmss))
+                    for i in range(0, len(records), self.records_per_frame):
+                        if session.send_text(make_frame(tr_id, records[i:i + self.records_per_frame])):
+                            self._count("frames")
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_time = time.monotonic()  # 따라잡지 못하면 건너뜀
+
+    def _ping(self):
+        while not self._stop.wait(self.ping_interval):
+            message = json.dumps({"header": {"tr_id": "PINGPONG", "datetime": datetime.datetime.now().strftime("%Y%m%d%H%M%S")}})
+            with self._lock:
+                sessions = list(self._sessions)
+            for session in sessions:
+                session.send_text(message)
+
+
+class _RestHandler(BaseHTTPRequestHandler):
+    """KIS REST 경로 처리 (keep-alive)"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_mock = None
+
+    def _handle(self, method, with_body=True):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        status, payload = self.server_mock.handle_rest(method, parts.path, headers, query, body)
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        if "tr_id" in headers:
+            self.send_header("tr_id", headers["tr_id"])
+        self.end_headers()
+        if with_body:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_HEAD(self):
+        self._handle("HEAD", with_body=False)
+
+    def log_message(self, *args):
+        pass
+
+
+class _WsServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _WsHandler(socketserver.BaseRequestHandler):
+    """
+    웹소켓 세션 1개 (RFC6455 핸드셰이크, 텍스트/ping/close 프레임)
+
+    Attributes:
+        aes_key (str): 세션 체결 통보 암호화 키
+        aes_iv (str): 세션 체결 통보 암호화 IV
+        subscriptions (dict): {(tr_id, tr_key)} 구독 목록
+        notice_tr_id (str): 구독 중인 체결 통보 TR (없으면 None)
+    """
+    server_mock = None
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.aes_key = hashlib.sha256(str(id(self)).encode()).hexdigest()[:32]
+        self.aes_iv = hashlib.md5(str(id(self)).encode()).hexdigest()[:16]
+        self.subscriptions = set()
+        self.notice_tr_id = None
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._buffer = b""
+
+    def handle(self):
+        if not self._handshake():
+            return
+        mock = self.server_mock
+        mock._register(self)
+        try:
+            while not self._closed:
+                frame = self._read_frame()
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == 0x1:
+                    if mock.ws_latency_ms:
+                        timer = threading.Timer(mock.ws_latency_ms / 1000.0, self._on_text, (payload.decode("utf-8"),))
+                        timer.daemon = True
+                        timer.start()
+                    else:
+                        self._on_text(payload.decode("utf-8"))
+                elif opcode == 0x9:
+                    self._send_frame(0xA, payload)
+                elif opcode == 0x8:
+                    self._send_frame(0x8, payload[:2])
+                    break
+        except (OSError, ValueError):
+            pass
+        finally:
+            mock._unregister(self)
+            self.close()
+
+    def close(self):
+        self._closed = True
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def market_subscriptions(self):
+        """{TR_ID: [종목코드, ...]} (체결가/호가만)"""
+        result = {}
+        for tr_id, tr_key in list(self.subscriptions):
+            if tr_id in ("H0STCNT0", "H0STASP0"):
+                result.setdefault(tr_id, []).append(tr_key)
+        return result
+
+    # 구독 처리
+    def _on_text(self, text):
+        try:
+            message = json.loads(text)
+            header = message["header"]
+            tr_type = header.get("tr_type", "1")
+            tr_id = message["body"]["input"]["tr_id"]
+            tr_key = message["body"]["input"]["tr_key"]
+        except (ValueError, KeyError, TypeError):
+            return self._reply("", "", "1", "OPSP9999", "JSON PARSING ERROR")
+        if not header.get("approval_key"):
+            return self._reply(tr_id, tr_key, "1", "OPSP0002", "INVALID APPROVAL KEY")
+        key = (tr_id, tr_key)
+        if tr_type == "2":
+            self.subscriptions.discard(key)
+            if tr_id in NOTICE_TR_IDS:
+                self.notice_tr_id = None
+            return self._reply(tr_id, tr_key, "0", "OPSP0001", "UNSUBSCRIBE SUCCESS")
+        if key in self.subscriptions:
+            return self._reply(tr_id, tr_key, "1", "OPSP0002", "ALREADY IN SUBSCRIBE")
+        if len(self.subscriptions) >= MAX_SUBSCRIPTIONS:
+            return self._reply(tr_id, tr_key, "1", "OPSP0008", "MAX SUBSCRIBE OVER")
+        self.subscriptions.add(key)
+        if tr_id in NOTICE_TR_IDS:
+            self.notice_tr_id = tr_id
+        self._reply(tr_id, tr_key, "0", "OPSP0000", "SUBSCRIBE SUCCESS")
+
+    def _reply(self, tr_id, tr_key, rt_cd, msg_cd, msg1):
+        body = {"rt_cd": rt_cd, "msg_cd": msg_cd, "msg1": msg1}
+        if rt_cd == "0":
+            body["output"] = {"iv": self.aes_iv, "key": self.aes_key}
+        encrypt = "Y" if tr_id in NOTICE_TR_IDS else "N"
+        self.send_text(json.dumps({"header": {"tr_id": tr_id, "tr_key": tr_key, "encrypt": encrypt}, "body": body}))
+
+    # RFC6455
+    def _handshake(self):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        head, self._buffer = request.split(b"\r\n\r\n", 1)
+        headers = {}
+        for line in head.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if key is None:
+            self.request.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.request.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                              "Sec-WebSocket-Accept: %s\r\n\r\n" % accept).encode())
+        return True
+
+    def _recv_exact(self, n):
+        while len(self._buffer) < n:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def _read_frame(self):
+        """(opcode, payload) - 연결이 끊기면 None (조각난 메시지는 이어 붙임)"""
+        message, message_opcode = b"", None
+        while True:
+            head = self._recv_exact(2)
+            if head is None:
+                return None
+            fin, opcode = head[0] & 0x80, head[0] & 0x0F
+            masked, length = head[1] & 0x80, head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._recv_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._recv_exact(8))[0]
+            mask = self._recv_exact(4) if masked else None
+            payload = self._recv_exact(length) if length else b""
+            if payload is None:
+                return None
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode >= 0x8:  # 제어 프레임
+                return opcode, payload
+            if opcode != 0x0:
+                message_opcode = opcode
+            message += payload
+            if fin:
+                return message_opcode, message
+
+    def _send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self._send_lock:
+            self.request.sendall(header + payload)
+
+    def send_text(self, text):
+        """텍스트 프레임 전송 (연결이 끊겼으면 False)"""
+        if self._closed:
+            return False
+        try:
+            self._send_frame(0x1, text.encode("utf-8"))
+            return True
+        except OSError:
+            self._closed = True
+            return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--rest-port', type=int, default=18080)
+    parser.add_argument('--ws-port', type=int, default=18081)
+    parser.add_argument('--tick-rate', type=float, default=1.0, help='구독 종목별 초당 체결가/호가 프레임 수')
+    parser.add_argument('--records-per-frame', type=int, default=1, help='프레임당 최대 레코드 수')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='REST 응답 지연(ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='REST 응답 지연 편차(ms)')
+    parser.add_argument('--ws-latency-ms', type=float, default=0.0, help='웹소켓 구독 응답 지연(ms)')
+    parser.add_argument('--rate-limit-error', type=float, default=0.0, help='EGW00201 응답 확률 (0~1)')
+    parser.add_argument('--business-error', type=float, default=0.0, help='rt_cd=1 응답 확률 (0~1)')
+    parser.add_argument('--rest-rate', type=float, default=0.0, help='앱 키별 초당 허용 호출 수 (0: 제한 없음)')
+    parser.add_argument('--notice-delay-ms', type=float, default=50.0, help='주문 접수 ~ 체결 통보 지연(ms)')
+    parser.add_argument('--ping-interval', type=float, default=30.0, help='PINGPONG 전송 주기(초)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    mock = MockKIS(tick_rate=args.tick_rate, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                   rate_limit_error=args.rate_limit_error, business_error=args.business_error,
+                   rest_rate=args.rest_rate, notice_delay_ms=args.notice_delay_ms,
+                   ping_interval=args.ping_interval, records_per_frame=args.records_per_frame, seed=args.seed,
+                   ws_latency_ms=args.ws_latency_ms)
+    URL_BASE, SOCKET_URL = mock.start(args.host, args.rest_port, args.ws_port)
+    logger.info(f"KIS mock server: URL_BASE={URL_BASE} SOCKET_URL={SOCKET_URL}")
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(f"stats {mock.stats}")
+    except KeyboardInterrupt:
+        mock.stop()
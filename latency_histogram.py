@@ -0,0 +1,167 @@
+"""
+단계별 지연 히스토그램 (틱 수신 ~ 주문)
+고정 버킷 로그-선형(HDR 방식) 히스토그램에 perf_counter_ns 로 잰 단계별 지연을 누적하고,
+주기적으로(스케줄러) 그리고 종료 시 계좌 디렉토리에 JSON 한 줄씩 기록한다.
+워커 프로세스 하나가 계좌 하나를 담당하므로 히스토그램은 프로세스 단위로 둔다.
+
+단계:
+    ws_recv      : 웹소켓 recv 호출 시간 (대기 포함)
+    queue        : 수신 ~ 전략 처리 시작 (async 워커 프레임 큐 대기)
+    parse        : 수신 ~ 필드 추출 완료
+    dispatch     : 프레임 1건 전체 처리 (전략 포함)
+    signal       : 매수/매도 조건 확인
+    notify       : 메시지 전송 요청 (Discord 큐 + 출력)
+    tick_to_order: 수신 ~ 주문 함수 호출
+    rate_wait    : 주문 호출 속도 제한 대기
+    hashkey      : 해시키 요청
+    order_post   : 현금 주문 요청
+    tick_to_ack  : 수신 ~ 주문 응답
+
+주요 기능:
+1. 히스토그램 기록 (record, 단계당 1us 미만)
+2. 백분위 요약 (p50/p90/p99/p99.9/max)
+3. 기록 파일 저장 (dump)
+"""
+
+import os
+import json
+import time
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger()
+
+SUB_BITS = 4                      # 2의 거듭제곱 구간당 16개 버킷 (상대 오차 약 6%)
+SUB_COUNT = 1 << SUB_BITS
+BUCKET_COUNT = (64 - SUB_BITS) * SUB_COUNT
+
+
+def bucket_index(value_ns):
+    """값(ns)의 버킷 번호"""
+    if value_ns < 2 * SUB_COUNT:
+        return value_ns if value_ns > 0 else 0
+    shift = value_ns.bit_length() - SUB_BITS - 1
+    return shift * SUB_COUNT + (value_ns >> shift)
+
+
+def bucket_lower(index):
+    """버킷 번호의 하한값(ns)"""
+    if index < 2 * SUB_COUNT:
+        return index
+    shift = index // SUB_COUNT - 1
+    return (index % SUB_COUNT + SUB_COUNT) << shift
+
+
+class Histogram:
+    """
+    고정 버킷 지연 히스토그램
+
+    Attributes:
+        counts (list): 버킷별 횟수
+        count (int): 전체 횟수
+        total (int): 합계(ns)
+        max (int): 최대값(ns)
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_ns):
+        if value_ns < 2 * SUB_COUNT:
+            index = value_ns if value_ns > 0 else 0
+        else:
+            shift = value_ns.bit_length() - SUB_BITS - 1
+            index = shift * SUB_COUNT + (value_ns >> shift)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def percentile(self, pct):
+        """백분위 값(ns, 버킷 하한)"""
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * pct / 100.0 + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return bucket_lower(index)
+        return self.max
+
+    def summary(self):
+        """요약 통계 (us)"""
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count / 1e3, 2) if self.count else 0.0,
+            'p50_us': round(self.percentile(50) / 1e3, 2),
+            'p90_us': round(self.percentile(90) / 1e3, 2),
+            'p99_us': round(self.percentile(99) / 1e3, 2),
+            'p999_us': round(self.percentile(99.9) / 1e3, 2),
+            'max_us': round(self.max / 1e3, 2),
+        }
+
+
+class LatencyRecorder:
+    """
+    단계별 히스토그램 모음
+
+    Attributes:
+        histograms (dict): {단계: Histogram}
+        tick_ns (int): 현재 처리 중인 프레임의 수신 시각 (perf_counter_ns)
+        _path (str): 기록 파일 경로 (None 이면 로그만)
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.tick_ns = 0
+        self._path = None
+        self._name = ''
+        self._lock = threading.Lock()
+
+    def configure(self, name, path):
+        """계좌 이름과 기록 파일 경로 설정"""
+        self._name = name
+        self._path = path
+
+    def record(self, stage, value_ns):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.record(value_ns)
+
+    def since_tick(self, stage, now_ns=None):
+        """현재 프레임 수신 시각부터 지금까지를 stage 로 기록"""
+        if self.tick_ns:
+            self.record(stage, (now_ns or time.perf_counter_ns()) - self.tick_ns)
+
+    def summary(self):
+        """{단계: 요약 통계}"""
+        return {stage: histogram.summary() for stage, histogram in list(self.histograms.items())}
+
+    def dump(self):
+        """요약 통계를 로그와 기록 파일(JSON 한 줄)에 저장"""
+        summary = self.summary()
+        if not summary:
+            return summary
+        with self._lock:
+            line = {'time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'name': self._name, 'stages': summary}
+            if self._path:
+                try:
+                    os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                    with open(self._path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(line, ensure_ascii=False) + '\n')
+                except OSError as e:
+                    logger.error(f"Latency dump error: {e}")
+        logger.info("[%s] latency " % self._name + " ".join(
+            "%s=%.1f/%.1fus" % (stage, s['p50_us'], s['p99_us']) for stage, s in summary.items()))
+        return summary
+
+
+# 프로세스(계좌)별 기록기
+LATENCY = LatencyRecorder()
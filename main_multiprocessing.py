@@ -12,11 +12,32 @@
 import os
 import time
 import json
+import queue
+import asyncio
+import threading
+import argparse
 import datetime
+import collections
+import concurrent.futures
 import multiprocessing
 import logging
-from utility_multiprocessing import  Account_detail, Web_socket_connect, Market_open, Send_message, Liquidation, read_JSON, write_JSON, create_Folder, delete_Folder
-from tr_functions import get_access_TOKEN, get_approval, aes_cbc_base64_dec
+from utility_multiprocessing import  Account_detail, Web_socket_connect, Market_open, Send_message, Liquidation, read_JSON
+from tr_functions import get_access_TOKEN, get_approval, aes_cbc_base64_dec, warmup_session
+import tr_functions_async
+from rate_limiter import get_rate_limiter, install_rate_limiter
+from realtime_frames import decode_frame, group_by_code, build_parsers
+from session_scheduler import SessionScheduler
+from discord_notifier import flush_notifiers, get_notifier, notify
+from state_store import SQLiteStateStore, flush_stores
+from frame_recorder import FrameRecorder
+from latency_histogram import LATENCY
+from metrics import METRICS
+from tick_ring import TickRing
+from quote_table import QuoteTable, quote_table_name, quote_fields
+from market_data_hub import merge_stock_lists, hub_account_info, run_market_data_hub
+from subscription_manager import RECV_TIMEOUT, RECONNECT_MAX_DELAY, backoff_delay
+from token_broker import TokenBroker
+import clock
 from stockinfo_generation_on_trading import stockinfo_generation_on_trading
 
 from ALGORITHM import STRATEGY
@@ -32,20 +53,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def Assign_Trading_Algorithm_To_Stock(info, stock_infos):
+def Assign_Trading_Algorithm_To_Stock(info, stock_infos, store=None):
     """
     각 종목별로 거래 전략 객체를 할당
     
     Args:
         info (dict): API 접속 정보
         stock_infos (dict): 종목 정보
+        store (WriteBehindStore): 종목 정보 저장소 (None 이면 전략이 직접 파일 기록)
         
     Returns:
         dict: 종목별 거래 전략 객체 딕셔너리
     """
     Trading_Algo = {}
     for code in stock_infos.keys():
-        algo = STRATEGY(info, code=code)
+        algo = STRATEGY(info, code=code, store=store)
         Trading_Algo[code] = algo
     return Trading_Algo
 
@@ -62,104 +84,666 @@ class OuterWorker:
         _ws (WebSocket): 웹소켓 연결 객체
         _aes_key (str): AES 암호화 키
         _aes_iv (str): AES 초기화 벡터
+        _rate_limiter (RateLimiter): 앱 키별 REST 호출 속도 제한기 (프로세스 간 공유)
+        _parsers (dict): TR별 실시간 필드 파서 (STRATEGY.REALTIME_FIELDS 기준, 시세 테이블 사용 시 quote_fields)
+        _store (SQLiteStateStore): 종목 정보/상태 전이/체결 저장소 (ID_ACCOUNT/<name>/state.db)
+        _recorder (FrameRecorder): 원본 프레임 기록기 (info['RECORD_FRAMES'] 가 참일 때만 생성)
+        _hub_ring_name (str): 시세 허브 틱 링 이름 (None 이면 직접 시세 구독)
+        _hub_event (multiprocessing.Event): 시세 허브의 새 틱 알림
+        _quotes (QuoteTable): 공유 메모리 시세 테이블 (info['QUOTE_TABLE'] 가 참일 때만 생성)
+        _tokens (TokenBroker): 접근 토큰/웹소켓 접속키 백그라운드 갱신 (워커 프로세스 안에서 생성)
+        _order_lock (Lock): 수신 루프의 전략 처리(주문 전송)와 스케줄러의 계좌 조회/청산을 직렬화 (동기 워커)
     """
+    _hub_ring_name = None
+    _hub_event = None
+    _quotes = None
+    _tokens = None
+    _order_lock = None
+    _recorder = None
+    _running = False
+
     def __init__(self, info):
         self._info = info
         self._info_path = self._info['INFO_PATH'] = os.path.join(os.getcwd(), "ID_ACCOUNT", self._info['NAME'])
         self._stock_dir_path = self._info['STOCKS_DIR_PATH'] = os.path.join(self._info['INFO_PATH'], "stocks")
+        self._info['STATE_DB_PATH'] = os.path.join(self._info_path, "state.db")
         self._stock_list = read_JSON(f'{self._info_path}/stocksinfo_TOTAL.json')
+        # 같은 앱 키를 쓰는 워커끼리 공유되도록 프로세스 생성 전에 제한기 생성
+        self._rate_limiter = get_rate_limiter(**self._info)
 
-        # 종목 정보 디렉토리 초기화
-        delete_Folder(self._info['STOCKS_DIR_PATH'])
-        create_Folder(self._info['STOCKS_DIR_PATH'])
-        for stock in self._stock_list.keys():
-            write_JSON(self._stock_list[stock], f'{self._stock_dir_path}/{stock}.json')
+        # 종목 정보 초기화 (상태 전이/체결 이력은 유지, 이후 변경은 저장소 스레드가 모아서 기록)
+        self._store = SQLiteStateStore(self._info['STATE_DB_PATH'])
+        self._store.replace_all(self._stock_list)
 
         # 종목별 거래 전략 할당
-        self._Stock_Algo = Assign_Trading_Algorithm_To_Stock(self._info, self._stock_list)
+        self._Stock_Algo = Assign_Trading_Algorithm_To_Stock(self._info, self._stock_list, self._store)
+        self._parsers = build_parsers(STRATEGY.REALTIME_FIELDS)
+        self._recorder = None
+        LATENCY.configure(self._info['NAME'], os.path.join(self._info_path, "latency.jsonl"))
   
+    def attach_market_data(self, ring_name, event):
+        """
+        시세 허브 사용 설정 (프로세스 생성 전 메인 프로세스에서 호출)
+        웹소켓은 체결 통보만 구독하고 호가/체결/VI 는 틱 링에서 읽는다.
+
+        Args:
+            ring_name (str): TickRing 공유 메모리 이름
+            event (multiprocessing.Event): 허브가 새 틱을 게시하면 set 되는 이벤트
+        """
+        self._hub_ring_name = ring_name
+        self._hub_event = event
+
+    def _Start_Recorder(self):
+        """프레임 기록 모드이면 기록기 시작 (워커 프로세스 안에서 호출)"""
+        if self._info.get('RECORD_FRAMES') and self._recorder is None:
+            self._recorder = FrameRecorder(os.path.join(self._info_path, "frames"))
+        return self._recorder
+
+    def _Stop_Recorder(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def _Start_Quote_Table(self):
+        """
+        시세 테이블 모드이면 계좌 이름의 공유 메모리 테이블 생성 (워커 프로세스 안에서 호출)
+        테이블 열 필드(체결시간, 누적거래량)는 이때만 파서에 추가하므로 테이블을 쓰지 않으면 틱 파싱 비용은 그대로다.
+        """
+        if self._info.get('QUOTE_TABLE') and self._quotes is None:
+            fields = quote_fields(STRATEGY.REALTIME_FIELDS)
+            self._parsers = build_parsers(fields)
+            self._quotes = QuoteTable.create(self._Stock_Algo, quote_table_name(self._info['NAME']))
+            self._quotes.bind_fields(fields)
+            for algo in self._Stock_Algo.values():
+                algo._quotes = self._quotes
+        return self._quotes
+
+    def _Stop_Quote_Table(self):
+        if self._quotes is not None:
+            for algo in self._Stock_Algo.values():
+                algo._quotes = None
+            self._quotes.close()
+            self._quotes.unlink()
+            self._quotes = None
+            self._parsers = build_parsers(STRATEGY.REALTIME_FIELDS)
+
+    def _Start_Tokens(self):
+        """토큰 파일의 최신 토큰 반영 후 만료 전 갱신 스레드 시작 (워커 프로세스 안에서 호출)"""
+        if self._tokens is None:
+            self._tokens = TokenBroker(self._info)
+        self._tokens.ensure()
+        return self._tokens.start()
+
+    def _Start_Metrics(self):
+        """info['METRICS_PORT'] 가 있으면 지표 HTTP 서버 시작 (워커 프로세스 안에서 호출)"""
+        port = self._info.get('METRICS_PORT')
+        if not port:
+            return None
+        METRICS.gauge('kis_queue_depth', self._Queue_Depths, '큐 대기 건수', label='queue')
+        METRICS.gauge('kis_strategy_state', self._State_Counts, '상태별 종목 수', label='state')
+        return METRICS.start_server(port, self._info.get('METRICS_HOST', '127.0.0.1'))
+
+    def _Queue_Depths(self):
+        """지표용 큐 대기 건수 (지표 서버 스레드에서 호출)"""
+        depths = {'store': self._store.pending()}
+        if hasattr(getattr(self, '_ws', None), 'pending'):  # 여러 세션 병합 수신 큐
+            depths['websocket'] = self._ws.pending()
+        if self._recorder is not None:
+            depths['recorder'] = self._recorder.pending()
+        notifier = get_notifier(self._info.get('DISCORD_WEBHOOK_URL'))
+        if notifier is not None:
+            depths['discord'] = notifier.stats()['pending']
+        return depths
+
+    def _State_Counts(self):
+        """지표용 상태별 종목 수 (지표 서버 스레드에서 호출)"""
+        return collections.Counter(algo._stock_info.get('state') for algo in list(self._Stock_Algo.values()))
+
     def do_work(self):
         """
         워커의 주요 작업 실행
+        - 토큰 갱신 스레드 시작
+        - REST 커넥션 풀 예열
         - 계좌 정보 조회
         - 웹소켓 연결 및 실시간 데이터 구독
-        - 실시간 데이터 처리 및 거래 전략 실행
+        - 실시간 데이터 처리 및 거래 전략 실행 (웹소켓이 끊기면 _Reconnect 로 재연결)
         """
+        install_rate_limiter(self._info['APP_KEY'], self._rate_limiter)
+        self._Start_Tokens()
+        self._Start_Metrics()
+        warmup_session(**self._info)
         Account_detail(**self._info)
-        self._ws, self._aes_key, self._aes_iv = Web_socket_connect(self._info, self._stock_list)
+        self._ws, self._aes_key, self._aes_iv = self._Connect()
+
+        # 장 운영 이벤트는 스케줄러 스레드가 담당 (수신 루프에서는 시각 확인을 하지 않음)
+        # 청산/계좌 조회는 _order_lock 을 잡고 실행하여 전략의 주문 전송과 겹치지 않음
+        self._order_lock = order_lock = threading.Lock()
+        self._running = True
+        self._Start_Scheduler().start()
+        recorder = self._Start_Recorder()
+        self._Start_Quote_Table()
+        try:
+            if self._hub_ring_name is not None:
+                self._Hub_Loop(recorder)
+            t_tick = time.perf_counter_ns()
+            while self._running:
+                # 실시간 데이터 처리
+                t_recv = time.perf_counter_ns()
+                try:
+                    data = self._ws.recv()
+                except Exception as e:
+                    # 장 종료로 웹소켓을 닫은 경우는 종료, 끊기거나 멈춘 경우는 재연결
+                    if not (self._running and self._Reconnect(e, t_tick)):
+                        break
+                    continue
+                LATENCY.tick_ns = t_tick = time.perf_counter_ns()
+                LATENCY.record('ws_recv', t_tick - t_recv)
+                if recorder is not None:
+                    recorder.record(data)
+                with order_lock:
+                    self._On_Message(data)
+                LATENCY.record('dispatch', time.perf_counter_ns() - t_tick)
+        finally:
+            self._scheduler.stop()
+            self._tokens.stop()
+            self._store.flush()
+            self._Stop_Recorder()
+            self._Stop_Quote_Table()
+            LATENCY.dump()
+
+    def _Connect(self):
+        """
+        웹소켓 연결 및 실시간 구독 (시세 허브 모드이면 체결 통보만)
+        info['WS_RECV_TIMEOUT'] 초(기본 RECV_TIMEOUT, 0 이면 무제한) 동안 수신이 없으면 recv 에서 예외가 발생한다.
+
+        Returns:
+            tuple: (websocket 객체, AES 암호화 키, AES 초기화 벡터)
+        """
+        return Web_socket_connect(self._info, self._stock_list, quotes=self._hub_ring_name is None,
+                                  recv_timeout=self._info.get('WS_RECV_TIMEOUT', RECV_TIMEOUT) or None)
+
+    def _Reconnect(self, error, last_ns):
+        """
+        끊기거나 멈춘 웹소켓을 프로세스 안에서 다시 연결 (전략 객체, 스케줄러, 저장소는 그대로 유지)
+        - 기존 연결 종료 후 재연결 및 재구독, 실패하면 backoff_delay 만큼 대기 후 재시도
+          (두 번째 시도부터 웹소켓 접속키 재발급, 토큰 파일로 같은 앱 키의 다른 프로세스와 공유)
+        - AES 키는 recv 로 전달되는 체결 통보 구독 응답을 _On_Message 가 처리할 때 갱신
+          (이전 연결에서 받아 큐에 남아 있는 통보는 이전 키로 복호화)
+        - 마지막 수신 ~ 재연결 완료 시간을 kis_ws_gap_seconds 로 기록
+
+        Args:
+            error (Exception): recv 에서 발생한 예외 (수신 제한 시간 초과 포함)
+            last_ns (int): 마지막 프레임 수신 시각 (perf_counter_ns)
+
+        Returns:
+            bool: 재연결 성공 여부 (장 종료로 중단하면 False)
+        """
+        name = self._info['NAME']
+        logger.warning(f"[{name}] 웹소켓 끊김 ({type(error).__name__}: {error}) - 재연결")
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+        failures = 0
+        while self._running:
+            try:
+                if failures:
+                    self._tokens.refresh_approval()
+                ws, _, _ = self._Connect()
+            except Exception as e:
+                delay = backoff_delay(failures)
+                failures += 1
+                logger.error(f"[{name}] 웹소켓 재연결 실패 {failures}회: {e} - {delay:.1f}초 후 재시도")
+                time.sleep(delay)
+                continue
+            self._ws = ws
+            if not self._running:  # 재연결 중 장 종료
+                ws.close()
+                return False
+            gap = (time.perf_counter_ns() - last_ns) / 1e9
+            METRICS.inc('kis_ws_reconnects_total')
+            METRICS.observe('kis_ws_gap_seconds', (), gap)
+            message = f"[{name}] 웹소켓 재연결 완료 (수신 공백 {gap:.1f}초, 시도 {failures + 1}회)"
+            logger.warning(message)
+            notify(self._info.get('DISCORD_WEBHOOK_URL'), message)
+            return True
+        return False
+
+    def _Hub_Loop(self, recorder):
+        """
+        시세 허브 모드 수신 루프
+        - 체결 통보: 통보 수신 스레드가 큐에 넣고 이벤트를 set (끊기면 수신 스레드가 재연결)
+        - 호가/체결/VI: 틱 링에서 이 워커의 커서 이후 틱을 읽음
+        """
+        ring = TickRing.attach(self._hub_ring_name)
+        reader = ring.reader()
+        event = self._hub_event
+        order_lock = self._order_lock
+        notices = queue.SimpleQueue()
+        threading.Thread(target=self._Recv_Notices, args=(notices, event, recorder),
+                         name='notice-recv', daemon=True).start()
+        try:
+            while self._running:
+                event.wait(1.0)
+                event.clear()
+                with order_lock:
+                    while not notices.empty():
+                        self._On_Message(notices.get_nowait())
+                    ticks = reader.poll()
+                    while ticks:
+                        for tick in ticks:
+                            self._On_Hub_Tick(*tick)
+                        ticks = reader.poll()
+        finally:
+            ring.close()
+
+    def _Recv_Notices(self, notices, event, recorder):
+        """체결 통보 웹소켓 수신 스레드 (시세 허브 모드, 끊기면 이 스레드에서 재연결하고 시세 처리는 계속)"""
+        last_ns = time.perf_counter_ns()
+        while self._running:
+            try:
+                data = self._ws.recv()
+            except Exception as e:
+                if self._running and self._Reconnect(e, last_ns):
+                    continue
+                return
+            last_ns = time.perf_counter_ns()
+            if recorder is not None:
+                recorder.record(data)
+            notices.put(data)
+            event.set()
+
+    def _On_Hub_Tick(self, recv_ns, tr_id, code, values, raw):
+        """
+        시세 허브 틱 1건 처리
+
+        Args:
+            recv_ns (int): 허브의 프레임 수신 시각 (perf_counter_ns)
+            tr_id (str): TR ID
+            code (str): 종목코드
+            values (tuple): REALTIME_FIELDS 선언 순서의 int 값
+            raw (str): 필드를 선언하지 않은 TR 의 레코드 원문 (없으면 None)
+        """
+        algo = self._Stock_Algo.get(code)
+        if algo is None:
+            return
+        LATENCY.tick_ns = recv_ns
+        LATENCY.record('queue', time.perf_counter_ns() - recv_ns)
+        if raw is None:
+            if self._quotes is not None:
+                self._quotes.update(tr_id, code, values)
+            algo._On_Realtime_Fields(tr_id, values)
+        else:
+            algo._On_Realtime_Stock_Batch(tr_id, [raw.split('^')])
+
+    def _On_Message(self, data):
+        """
+        웹소켓 수신 메시지 1건 처리
+        - 실시간 호가/체결: 전략 객체로 전달
+        - 체결 통보: 복호화 후 전략 객체로 전달
+        - 구독 응답/PINGPONG: AES 키 갱신 및 로그 출력
+        
+        Args:
+            data (str): 웹소켓 수신 문자열
+        """
+        if data[0] in ['0', '1']:
+            METRICS.inc('kis_frames_total', (('tr_id', data[2:data.find('|', 2)]),))
+            if data[0] == '0':  # 실시간 호가/체결 데이터
+                self._On_Market_Data(data)
+            elif data[0] == '1':  # 실시간 VI 데이터
+                recvstr = data.split('|')
+                trid0 = recvstr[1]
+                if trid0 in ["K0STCNI0", "K0STCNI9", "H0STCNI0", "H0STCNI9"]:
+                    aes_dec_str = aes_cbc_base64_dec(self._aes_key, self._aes_iv, recvstr[3]).split('^')
+                    code = aes_dec_str[8]
+                    self._Stock_Algo[code]._Stock_Signal_Notice(aes_dec_str)
+        else:
+            # 웹소켓 연결 관련 응답 처리
+            jsonObject = json.loads(data)
+            trid = jsonObject["header"]["tr_id"]
+            METRICS.inc('kis_frames_total', (('tr_id', trid),))
+            if trid != "PINGPONG":
+                rt_cd = jsonObject["body"]["rt_cd"]
+                if rt_cd == '1':
+                    print("[%s] ERROR RETURN CODE [%s] MSG [%s]" % (self._info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
+                elif rt_cd == '0':
+                    print("[%s] RETURN CODE [%s] MSG [%s]" % (self._info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
+                    if trid == "K0STCNI0" or trid == "K0STCNI9" or trid == "H0STCNI0" or trid == "H0STCNI9":
+                        self._aes_key = jsonObject["body"]["output"]["key"]
+                        self._aes_iv = jsonObject["body"]["output"]["iv"]
+                        print("[%s] TRID [%s] KEY[%s] IV[%s]" % (self._info['NAME'], trid, self._aes_key, self._aes_iv))
+            elif trid == "PINGPONG":
+                print("[%s] RECV [%s]" % (self._info['NAME'], trid))
+                print("[%s] SEND [%s]" % (self._info['NAME'], trid))
+
+    def _On_Market_Data(self, data):
+        """
+        실시간 호가/체결 프레임의 모든 레코드를 종목별로 묶어 전략에 전달
+        
+        Args:
+            data (str): 웹소켓 수신 문자열
+        """
+        recvstr = data.split('|', 3)
+        parser = self._parsers.get(recvstr[1])
+        if parser is None:
+            # 전략이 필드를 선언하지 않은 TR (VI 등)은 전체 필드 문자열로 전달
+            trid0, records = decode_frame(data)
+            for code, ticks in group_by_code(records).items():
+                algo = self._Stock_Algo.get(code)
+                if algo is not None:
+                    algo._On_Realtime_Stock_Batch(trid0, ticks)
+            return
 
+        trid0 = recvstr[1]
+        ticks = parser.parse(recvstr[3], int(recvstr[2]))
+        LATENCY.since_tick('parse')
+        quotes = self._quotes
+        if quotes is not None:
+            for code, values in ticks:
+                quotes.update(trid0, code, values)
+        if len(ticks) == 1:
+            code, values = ticks[0]
+            algo = self._Stock_Algo.get(code)
+            if algo is not None:
+                algo._On_Realtime_Fields(trid0, values)
+            return
+        for code, values_list in group_by_code(ticks).items():
+            algo = self._Stock_Algo.get(code)
+            if algo is not None:
+                algo._On_Realtime_Fields_Batch(trid0, [values for _, values in values_list])
+
+    def _Start_Scheduler(self, warmup_lead_seconds=30):
+        """
+        장 운영 이벤트 스케줄러 생성
+        - 커넥션 풀 재예열: 매수 시작 시각(timepoint_trading_start) 직전
+        - 장 시작 (09:00): 계좌 정보 조회
+        - 계좌 정보 주기적 업데이트: 09:10 ~ 15:40, 10분 간격
+        - 청산 (15:21)
+        - 종료 (15:40)
+        - 단계별 지연 히스토그램 기록: 09:00 ~ 15:40, 5분 간격
+        
+        Args:
+            warmup_lead_seconds (int): 매수 시작 몇 초 전에 커넥션 풀을 예열할지
+            
+        Returns:
+            SessionScheduler: 이벤트가 등록된 스케줄러
+        """
+        if getattr(self, '_scheduler', None) is not None:
+            self._scheduler.stop()
+        self._scheduler = scheduler = SessionScheduler(clock=clock.now)
+        t_now = clock.now()
+        t_market_open = t_now.replace(hour=9, minute=0, second=0, microsecond=0)
+        t_liquidation = t_now.replace(hour=15, minute=21, second=0, microsecond=0)
+        t_market_closed = t_now.replace(hour=15, minute=40, second=0, microsecond=0)
+
+        start_times = [datetime.datetime.strptime(stock['timepoint_trading_start'], "%Y-%m-%d %H:%M:%S")
+                       for stock in self._stock_list.values()]
+        if start_times:
+            t_warmup = min(start_times) - datetime.timedelta(seconds=warmup_lead_seconds)
+            scheduler.at(t_warmup, 'session_warmup', self._Serialized(warmup_session))
+        scheduler.at(t_market_open, 'market_open', self._Serialized(Account_detail))
+        scheduler.every(t_market_open + datetime.timedelta(minutes=10), datetime.timedelta(minutes=10),
+                        'account_refresh', self._Serialized(Account_detail), until=t_market_closed)
+        scheduler.every(t_market_open + datetime.timedelta(minutes=5), datetime.timedelta(minutes=5),
+                        'latency_dump', LATENCY.dump, until=t_market_closed)
+        scheduler.at(t_liquidation, 'liquidation', self._Serialized(Liquidation))
+        scheduler.at(t_market_closed, 'shutdown', self._Shutdown)
+        return scheduler
+
+    def _Serialized(self, fn):
+        """
+        스케줄러 작업 함수 (REST 조회/주문은 _order_lock 을 잡고 실행)
+        동기 워커는 수신 루프가 같은 잠금 안에서 전략을 처리하므로, 청산 주문이 전략의 매도 주문과
+        동시에 나가거나 프로세스의 REST 세션을 동시에 쓰지 않는다. 잠금이 없으면(비동기 워커) 그대로 실행.
+
+        Args:
+            fn (callable): info 를 키워드 인자로 받는 함수 (Account_detail, Liquidation, warmup_session)
+        """
+        def job():
+            lock = self._order_lock
+            if lock is None:
+                return fn(**self._info)
+            with lock:
+                return fn(**self._info)
+        return job
+
+    def _Shutdown(self):
+        """장 종료: 수신 루프를 멈추고 웹소켓 연결 종료"""
+        self._running = False
+        self._scheduler.stop()
+        if self._hub_event is not None:
+            self._hub_event.set()
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+class AsyncOuterWorker(OuterWorker):
+    """
+    asyncio 이벤트 루프 기반 워커
+    웹소켓 수신, 전략 처리, 주문 전송, 주기 작업을 별도 태스크로 분리하여
+    주문 응답을 기다리는 동안에도 실시간 프레임을 계속 처리한다.
+
+    Attributes:
+        _frames (asyncio.Queue): 수신 프레임 큐 (수신 태스크 -> 전략 처리 태스크)
+        _orders (asyncio.Queue): 주문 큐 (전략 -> 주문 태스크)
+        _order_tasks (set): 전송 중인 주문 태스크 (이벤트 루프는 약한 참조만 가지므로 끝날 때까지 보관)
+        _order_functions (dict): 매수/매도 주문 코루틴
+        _order_latency_ns (deque): 틱 수신 ~ 주문 전송 시작 지연(ns)
+    """
+    FRAME_QUEUE_SIZE = 10000
+    ORDER_QUEUE_SIZE = 100
+
+    def __init__(self, info):
+        super().__init__(info)
+        self._order_functions = {
+            'BUY': tr_functions_async.order_cash_Buy,
+            'SELL': tr_functions_async.order_cash_Sell,
+        }
+
+    def do_work(self):
+        asyncio.run(self._Run())
+
+    async def _Run(self):
+        """
+        워커 실행
+        - REST 커넥션 풀 예열, 계좌 정보 조회, 웹소켓 연결
+        - 수신/전략/주문/주기 작업 태스크 실행
+        """
+        install_rate_limiter(self._info['APP_KEY'], self._rate_limiter)
+        await asyncio.to_thread(self._Start_Tokens)
+        warmup_session(**self._info)
+        await asyncio.to_thread(Account_detail, **self._info)
+        self._ws, self._aes_key, self._aes_iv = await asyncio.to_thread(self._Connect)
+
+        self._frames = asyncio.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+        self._orders = asyncio.Queue(maxsize=self.ORDER_QUEUE_SIZE)
+        self._order_tasks = set()
+        self._Start_Metrics()
+        self._Start_Quote_Table()
+        self._order_latency_ns = collections.deque(maxlen=10000)
+        self._tick_ns = 0
+        for algo in self._Stock_Algo.values():
+            algo._order_dispatcher = self._Enqueue_Order
+
+        self._running = True
+        self._Start_Scheduler()
+        try:
+            tasks = [self._Read_Frames(), self._Dispatch_Frames(), self._Dispatch_Orders(), self._Periodic_Jobs()]
+            if self._hub_ring_name is not None:
+                tasks.append(self._Read_Hub())
+            await asyncio.gather(*tasks)
+        except Exception:
+            if self._running:
+                raise
+        finally:
+            self._tokens.stop()
+            await tr_functions_async.close_async_sessions()
+            self._store.flush()
+            self._Stop_Recorder()
+            self._Stop_Quote_Table()
+            LATENCY.dump()
+
+    async def _Read_Frames(self):
+        """웹소켓 수신 태스크 (blocking recv 는 전용 스레드에서 실행, 끊기면 재연결하는 동안 다른 태스크는 계속 실행)"""
+        loop = asyncio.get_running_loop()
+        recorder = self._Start_Recorder()
+        t_tick = time.perf_counter_ns()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='ws-recv') as executor:
+            while True:
+                t_recv = time.perf_counter_ns()
+                try:
+                    data = await loop.run_in_executor(executor, self._ws.recv)
+                except Exception as e:
+                    if not (self._running and await asyncio.to_thread(self._Reconnect, e, t_tick)):
+                        raise
+                    continue
+                t_tick = time.perf_counter_ns()
+                LATENCY.record('ws_recv', t_tick - t_recv)
+                if recorder is not None:
+                    recorder.record(data)
+                await self._frames.put((t_tick, data))
+
+    async def _Read_Hub(self):
+        """시세 허브 틱 수신 태스크 (이벤트 대기는 전용 스레드에서 실행)"""
+        loop = asyncio.get_running_loop()
+        ring = TickRing.attach(self._hub_ring_name)
+        reader = ring.reader()
+        event = self._hub_event
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='hub-wait') as executor:
+                while self._running:
+                    await loop.run_in_executor(executor, event.wait, 1.0)
+                    event.clear()
+                    ticks = reader.poll()
+                    while ticks:
+                        for tick in ticks:
+                            await self._frames.put((tick[0], tick))
+                        ticks = reader.poll()
+        finally:
+            ring.close()
+
+    async def _Dispatch_Frames(self):
+        """전략 처리 태스크 (큐에 쌓인 프레임을 한 번에 처리)"""
         while True:
-            t_now = datetime.datetime.now()
-            t_market_open = t_now.replace(hour=9, minute=0, second=0)
-            t_liquidation = t_now.replace(hour=15, minute=21, second=00)
-            t_15_20 = t_now.replace(hour=15, minute=20, second=0)
-            t_15_30 = t_now.replace(hour=15, minute=30, second=0)
-            t_market_closed = t_now.replace(hour=15, minute=40, second=0)
-            t_exit = t_now.replace(hour=15, minute=40, second=0)
-
-            # 청산 시간 체크
-            if (t_now.hour == t_liquidation.hour) and (t_now.minute == t_liquidation.minute) and (t_now.second < 2):
-                Liquidation(**self._info)
-            else: pass
-
-            # 계좌 정보 주기적 업데이트
-            if t_market_open < t_now < t_market_closed:
-                if (t_now.minute % 10) == 0 and (t_now.second < 1):
-                    Account_detail(**self._info)
-                else: pass
-            else: pass
-
-            # 실시간 데이터 처리
-            data = self._ws.recv()
-
-            if data[0] in ['0', '1']:
-                if data[0] == '0':  # 실시간 호가/체결 데이터
-                    recvstr = data.split('|')
-                    trid0 = recvstr[1]
-                    body_data = recvstr[3].split('^')
-                    code = body_data[0]
-                    self._Stock_Algo[code]._On_Realtime_Stock_Monitor(recvstr)
-                elif data[0] == '1':  # 실시간 VI 데이터
-                    recvstr = data.split('|')
-                    trid0 = recvstr[1]
-                    if trid0 in ["K0STCNI0", "K0STCNI9", "H0STCNI0", "H0STCNI9"]:
-                        aes_dec_str = aes_cbc_base64_dec(self._aes_key, self._aes_iv, recvstr[3]).split('^')
-                        code = aes_dec_str[8]
-                        self._Stock_Algo[code]._Stock_Signal_Notice(aes_dec_str)
+            self._tick_ns, data = await self._frames.get()
+            self._Dispatch_Frame(data)
+            while not self._frames.empty():
+                self._tick_ns, data = self._frames.get_nowait()
+                self._Dispatch_Frame(data)
+            await asyncio.sleep(0)
+
+    def _Dispatch_Frame(self, data):
+        LATENCY.tick_ns = tick_ns = self._tick_ns
+        t_start = time.perf_counter_ns()
+        LATENCY.record('queue', t_start - tick_ns)
+        if data.__class__ is tuple:  # 시세 허브 틱
+            self._On_Hub_Tick(*data)
+        else:
+            self._On_Message(data)
+        LATENCY.record('dispatch', time.perf_counter_ns() - t_start)
+
+    def _Queue_Depths(self):
+        depths = super()._Queue_Depths()
+        depths['frames'] = self._frames.qsize()
+        depths['orders'] = self._orders.qsize()
+        return depths
+
+    def _Enqueue_Order(self, side, algo, order):
+        """
+        STRATEGY._Submit_Buy/_Submit_Sell 에서 호출되는 주문 위임 함수
+        주문 큐가 가득 차면 주문을 버리고 실패 응답으로 전략 상태를 되돌린다 (다음 틱에서 다시 판단).
+        """
+        try:
+            self._orders.put_nowait((side, algo, order, self._tick_ns))
+        except asyncio.QueueFull:
+            logger.error(f"[{self._info['NAME']}] 주문 큐 가득 참 - {side} {order['code']} {order['qty']}주 주문 취소")
+            res = {"rt_cd": "1", "msg_cd": "QUEUE_FULL", "msg1": "order queue full"}
+            if side == 'BUY':
+                algo._On_Buy_Result(res, dispatched=True)
             else:
-                # 웹소켓 연결 관련 응답 처리
-                jsonObject = json.loads(data)
-                trid = jsonObject["header"]["tr_id"]
-                if trid != "PINGPONG":
-                    rt_cd = jsonObject["body"]["rt_cd"]
-                    if rt_cd == '1':
-                        print("[%s] ERROR RETURN CODE [%s] MSG [%s]" % (self._info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
-                    elif rt_cd == '0':
-                        print("[%s] RETURN CODE [%s] MSG [%s]" % (self._info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
-                        if trid == "K0STCNI0" or trid == "K0STCNI9" or trid == "H0STCNI0" or trid == "H0STCNI9":
-                            self._aes_key = jsonObject["body"]["output"]["key"]
-                            self._aes_iv = jsonObject["body"]["output"]["iv"]
-                            print("[%s] TRID [%s] KEY[%s] IV[%s]" % (self._info['NAME'], trid, self._aes_key, self._aes_iv))
-                elif trid == "PINGPONG":
-                    print("[%s] RECV [%s]" % (self._info['NAME'], trid))
-                    print("[%s] SEND [%s]" % (self._info['NAME'], trid))
+                algo._On_Sell_Result(res, dispatched=True)
+
+    async def _Dispatch_Orders(self):
+        """주문 태스크 (주문마다 별도 태스크로 전송하여 동시에 처리, 끝날 때까지 _order_tasks 에 보관)"""
+        while True:
+            side, algo, order, tick_ns = await self._orders.get()
+            task = asyncio.create_task(self._Execute_Order(side, algo, order, tick_ns))
+            self._order_tasks.add(task)
+            task.add_done_callback(self._order_tasks.discard)
+
+    async def _Execute_Order(self, side, algo, order, tick_ns):
+        self._order_latency_ns.append(time.perf_counter_ns() - tick_ns)
+        try:
+            res = await self._order_functions[side](**self._info, **order)
+        except Exception as e:
+            res = {"rt_cd": "1", "msg1": str(e)}
+        LATENCY.record('tick_to_ack', time.perf_counter_ns() - tick_ns)
+        if side == 'BUY':
+            algo._On_Buy_Result(res, dispatched=True)
+        else:
+            algo._On_Sell_Result(res, dispatched=True)
+
+    async def _Periodic_Jobs(self):
+        """주기 작업 태스크 (스케줄러의 다음 이벤트 시각까지 대기 후 실행)"""
+        while self._running:
+            next_when = self._scheduler.next_due()
+            delay = 1.0 if next_when is None else (next_when - clock.now()).total_seconds()
+            await asyncio.sleep(min(max(delay, 0.0), 1.0))
+            await asyncio.to_thread(self._scheduler.run_pending)
+
+WORKER_MODES = {
+    'sync': OuterWorker,
+    'async': AsyncOuterWorker,
+}
 
 def run_outer_worker(outer_worker):
     """
     워커 실행 및 예외 처리
+    웹소켓 끊김은 워커 안에서 재연결하므로, 그 밖의 오류로 do_work 가 중단되면 같은 워커 객체
+    (전략 상태 유지)로 다시 실행한다. 연속 실패 시 대기 시간은 backoff_delay 로 늘어난다.
     
     Args:
         outer_worker (OuterWorker): 실행할 워커 객체
     """
+    failures = 0
     try:
-        outer_worker.do_work()
-    except Exception as e:
-        logging.error(f"Worker error: {e}")
-        # 프로세스 재시작 로직
-        time.sleep(5)
-        run_outer_worker(outer_worker)
+        while True:
+            t_start = time.monotonic()
+            try:
+                outer_worker.do_work()
+                return
+            except Exception as e:
+                if time.monotonic() - t_start > 10 * RECONNECT_MAX_DELAY:  # 한동안 정상 실행된 뒤의 오류
+                    failures = 0
+                delay = backoff_delay(failures)
+                failures += 1
+                logging.error(f"Worker error: {e} - {delay:.1f}초 후 재시작")
+                METRICS.inc('kis_worker_restarts_total')
+                time.sleep(delay)
+    finally:
+        # 자식 프로세스는 atexit 가 실행되지 않으므로 남은 종목 정보와 Discord 메시지를 직접 처리
+        flush_stores()
+        flush_notifiers()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--worker-mode', choices=sorted(WORKER_MODES), default='sync',
+                        help='sync: 기존 blocking recv 루프, async: asyncio 태스크 기반 워커')
+    parser.add_argument('--record-frames', action='store_true',
+                        help='수신한 웹소켓 프레임을 ID_ACCOUNT/<name>/frames/YYYYMMDD.seg 에 기록')
+    parser.add_argument('--quote-table', action='store_true',
+                        help='종목별 최신 시세를 공유 메모리 테이블로 제공 (python quote_table.py <계좌명> 으로 조회)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='지표 HTTP 서버 시작 포트 (계좌 순서대로 +0, +1, ... / 설정 파일의 METRICS_PORT 가 우선)')
+    parser.add_argument('--market-data-hub', action='store_true',
+                        help='시세는 허브 프로세스 하나가 구독하여 공유 메모리로 전달 (계좌 워커는 체결 통보만 구독)')
+    parser.add_argument('--ws-recv-timeout', type=float,
+                        help='웹소켓 수신이 이 시간(초) 동안 없으면 재연결 (기본 %d, 0 이면 사용 안 함 / 설정 파일의 WS_RECV_TIMEOUT 가 우선)' % RECV_TIMEOUT)
+    parser.add_argument('--hub-account', help='시세 허브가 구독에 사용할 계좌 이름 (기본: 첫 번째 계좌, 그 계좌의 HUB_APP_KEY 또는 EXTRA_APP_KEYS 첫 키 사용)')
+    parser.add_argument('--hub-ring-size', type=int, default=16384, help='시세 허브 틱 링 슬롯 수')
+    args = parser.parse_args()
+
     # 종목 정보 초기화
     stockinfo_generation_on_trading()
 
@@ -171,11 +755,38 @@ if __name__ == '__main__':
     ACCOUNTS_INFO = {}
     for config_file in CONFIG_FILES:
         ACCOUNT = read_JSON(f'{CONFIG_FILES_PATH}/{config_file}')
+        TokenBroker(ACCOUNT).ensure()  # 종목 정보 생성 때 발급/저장한 토큰 (설정 파일의 토큰은 사용하지 않음)
+        if args.record_frames:
+            ACCOUNT['RECORD_FRAMES'] = True
+        if args.quote_table:
+            ACCOUNT['QUOTE_TABLE'] = True
+        if args.ws_recv_timeout is not None and 'WS_RECV_TIMEOUT' not in ACCOUNT:
+            ACCOUNT['WS_RECV_TIMEOUT'] = args.ws_recv_timeout
+        if args.metrics_port and not ACCOUNT.get('METRICS_PORT'):
+            ACCOUNT['METRICS_PORT'] = args.metrics_port + len(ACCOUNTS_INFO)
         ACCOUNTS_INFO[ACCOUNT['NAME']] = ACCOUNT
 
     # print(ACCOUNTS_INFO)
 
-    outer_workers = [OuterWorker(info=ACCOUNTS_INFO[ACCOUNT]) for ACCOUNT in ACCOUNTS_INFO.keys()]
+    outer_workers = [WORKER_MODES[args.worker_mode](info=ACCOUNTS_INFO[ACCOUNT]) for ACCOUNT in ACCOUNTS_INFO.keys()]
+
+    # 시세 허브 (선택)
+    ring = hub_process = None
+    if args.market_data_hub:
+        ring = TickRing.create(args.hub_ring_size)
+        hub_events = []
+        for outer_worker in outer_workers:
+            hub_event = multiprocessing.Event()
+            outer_worker.attach_market_data(ring.name, hub_event)
+            hub_events.append(hub_event)
+        try:
+            hub_info = hub_account_info(ACCOUNTS_INFO[args.hub_account or next(iter(ACCOUNTS_INFO))])
+        except ValueError as e:
+            parser.error(str(e))
+        hub_stock_list = merge_stock_lists([outer_worker._stock_list for outer_worker in outer_workers])
+        hub_process = multiprocessing.Process(target=run_market_data_hub, args=(hub_info, hub_stock_list, ring.name, hub_events),
+                                              name='market-data-hub', daemon=True)
+        hub_process.start()
 
     # 프로세스 실행
     processes = []
@@ -191,6 +802,13 @@ if __name__ == '__main__':
         for process in processes:
             process.close()
             process.join()
+    finally:
+        if hub_process is not None:
+            hub_process.terminate()
+            hub_process.join()
+        if ring is not None:
+            ring.close()
+            ring.unlink()
 
 
 
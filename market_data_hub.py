@@ -0,0 +1,216 @@
+"""
+계좌 공용 시세 허브 프로세스
+모든 계좌 종목의 실시간 호가/체결/VI 를 하나의 웹소켓으로 한 번만 구독하고 파싱하여
+공유 메모리 틱 링(tick_ring)으로 계좌 워커들에 전달한다.
+각 계좌 워커는 자신의 체결 통보(H0STCNI0/H0STCNI9) 웹소켓만 유지한다.
+
+주요 기능:
+1. 전체 계좌 종목 합집합 구독 (체결 통보 제외)
+2. 프레임 파싱 1회 후 틱 링 게시 (STRATEGY.REALTIME_FIELDS 필드는 int, 그 외 TR 은 레코드 원문)
+3. 워커별 이벤트로 새 틱 알림
+4. 연결 오류 또는 수신 제한 시간(WS_RECV_TIMEOUT) 초과 시 재연결 (backoff_delay 간격, 공백은 kis_ws_gap_seconds)
+5. 허브 전용 앱 키 (hub_account_info: 계좌 워커의 체결 통보 세션과 앱 키를 나누어 쓰지 않음)
+"""
+
+import json
+import time
+import logging
+
+from utility_multiprocessing import Web_socket_connect
+from realtime_frames import decode_frame, build_parsers
+from tick_ring import TickRing
+from quote_table import quote_fields
+from metrics import METRICS
+from subscription_manager import RECV_TIMEOUT, backoff_delay
+from token_broker import TokenBroker
+from ALGORITHM import STRATEGY
+
+logger = logging.getLogger()
+
+
+def merge_stock_lists(stock_lists):
+    """
+    계좌별 종목 정보의 종목코드 합집합 (처음 나온 계좌의 정보 사용)
+
+    Args:
+        stock_lists (list): 계좌별 {종목코드: 종목 정보}
+
+    Returns:
+        dict: {종목코드: 종목 정보}
+    """
+    merged = {}
+    for stock_list in stock_lists:
+        for code, stock in stock_list.items():
+            merged.setdefault(code, stock)
+    return merged
+
+
+def hub_account_info(info):
+    """
+    시세 허브용 접속 정보 (앱 키당 웹소켓 세션 1개이므로 계좌 워커의 체결 통보 세션과 다른 앱 키 사용)
+    HUB_APP_KEY/HUB_APP_SECRET 이 있으면 그 키, 없으면 EXTRA_APP_KEYS 의 첫 번째 키를 허브의 기본 키로 쓰고
+    나머지 EXTRA_APP_KEYS 는 허브의 추가 세션에 사용한다 (허브 모드의 계좌 워커는 체결 통보 세션 1개만 사용).
+    토큰/웹소켓 접속키는 허브 프로세스의 TokenBroker 가 허브 앱 키로 발급한다.
+
+    Args:
+        info (dict): 구독에 사용할 계좌의 API 접속 정보
+
+    Returns:
+        dict: 허브 접속 정보 (NAME 은 '<계좌명>_HUB')
+
+    Raises:
+        ValueError: 허브에 쓸 별도 앱 키가 없을 때
+    """
+    extras = [dict(extra) for extra in info.get('EXTRA_APP_KEYS') or ()]
+    if info.get('HUB_APP_KEY'):
+        key = {'APP_KEY': info['HUB_APP_KEY'], 'APP_SECRET': info.get('HUB_APP_SECRET')}
+    elif extras:
+        key = extras.pop(0)
+    else:
+        raise ValueError(f"[{info['NAME']}] 시세 허브에 사용할 앱 키가 없습니다 - "
+                         f"계좌 설정에 HUB_APP_KEY/HUB_APP_SECRET 또는 EXTRA_APP_KEYS 를 추가하세요 "
+                         f"(계좌 워커의 체결 통보 세션과 같은 앱 키는 사용할 수 없음)")
+    hub_info = dict(info, NAME=f"{info['NAME']}_HUB", APP_KEY=key['APP_KEY'], APP_SECRET=key['APP_SECRET'],
+                    EXTRA_APP_KEYS=extras)
+    for name in ('ACCESS_TOKEN', 'ACCESS_TOKEN_TOKEN_EXPIRED', 'APPROVAL_KEY'):
+        hub_info.pop(name, None)
+    return hub_info
+
+
+class MarketDataHub:
+    """
+    시세 허브
+
+    Attributes:
+        _info (dict): 구독에 사용할 계좌의 API 접속 정보 (APPROVAL_KEY, SOCKET_URL)
+        _stock_list (dict): 구독할 종목 {종목코드: 종목 정보}
+        _ring (TickRing): 틱 링 (생산자)
+        _events (list): 워커별 새 틱 알림 이벤트 (multiprocessing.Event)
+        _parsers (dict): TR별 FieldParser
+        _last_ns (int): 마지막 프레임 수신 시각 (perf_counter_ns, 재연결 공백 계산용)
+    """
+    def __init__(self, info, stock_list, ring_name, events):
+        self._info = info
+        self._stock_list = stock_list
+        self._ring_name = ring_name
+        self._events = events
+        # 워커가 시세 테이블을 쓰면 테이블 열 필드도 파싱하여 게시
+        self._parsers = build_parsers(quote_fields(STRATEGY.REALTIME_FIELDS) if info.get('QUOTE_TABLE')
+                                      else STRATEGY.REALTIME_FIELDS)
+        self._ring = None
+        self._ws = None
+        self._running = False
+        self._last_ns = 0
+
+    def run(self):
+        """허브 실행 (끊기면 바로 재연결, 연결 실패가 이어지면 backoff_delay 만큼 대기)"""
+        self._ring = TickRing.attach(self._ring_name)
+        self._running = True
+        tokens = TokenBroker(self._info)  # 허브 앱 키의 토큰/웹소켓 접속키 발급 및 만료 전 갱신
+        tokens.ensure()
+        tokens.start()
+        recv_timeout = self._info.get('WS_RECV_TIMEOUT', RECV_TIMEOUT) or None
+        failures = 0
+        disconnected = False
+        try:
+            while self._running:
+                try:
+                    if failures:
+                        tokens.refresh_approval()
+                    self._ws, _, _ = Web_socket_connect(self._info, self._stock_list, notice=False, recv_timeout=recv_timeout)
+                except Exception as e:
+                    if not self._running:
+                        break
+                    delay = backoff_delay(failures)
+                    failures += 1
+                    logger.error(f"Market data hub connect failed ({failures}): {e} - retry in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                failures = 0
+                if disconnected:
+                    gap = (time.perf_counter_ns() - self._last_ns) / 1e9
+                    METRICS.inc('kis_ws_reconnects_total')
+                    METRICS.observe('kis_ws_gap_seconds', (), gap)
+                    logger.warning(f"Market data hub reconnected (gap {gap:.1f}s)")
+                self._last_ns = time.perf_counter_ns()
+                try:
+                    self._Recv_Loop()
+                except Exception as e:
+                    if not self._running:
+                        break
+                    logger.error(f"Market data hub error: {e} - reconnecting")
+                    disconnected = True
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+        finally:
+            tokens.stop()
+            self._ring.close()
+
+    def stop(self):
+        self._running = False
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+    def _Recv_Loop(self):
+        recv = self._ws.recv
+        while self._running:
+            data = recv()
+            self._last_ns = recv_ns = time.perf_counter_ns()
+            if data[0] == '0':
+                if self._Publish(recv_ns, data):
+                    for event in self._events:
+                        event.set()
+            else:
+                self._On_Control(data)
+
+    def _Publish(self, recv_ns, data):
+        """
+        실시간 프레임 1건의 모든 레코드를 틱 링에 게시
+
+        Returns:
+            int: 게시한 틱 수
+        """
+        publish = self._ring.publish
+        recvstr = data.split('|', 3)
+        tr_id = recvstr[1]
+        METRICS.inc('kis_frames_total', (('tr_id', tr_id),))
+        parser = self._parsers.get(tr_id)
+        if parser is not None:
+            ticks = parser.parse(recvstr[3], int(recvstr[2]))
+            for code, values in ticks:
+                publish(recv_ns, tr_id, code, values)
+            return len(ticks)
+        # 전략이 필드를 선언하지 않은 TR (VI 등)은 레코드 원문 전달
+        tr_id, records = decode_frame(data)
+        for record in records:
+            publish(recv_ns, tr_id, record[0], (), '^'.join(record).encode())
+        return len(records)
+
+    def _On_Control(self, data):
+        """구독 응답/PINGPONG 출력"""
+        try:
+            jsonObject = json.loads(data)
+        except ValueError:
+            return
+        trid = jsonObject["header"]["tr_id"]
+        if trid == "PINGPONG":
+            print("[%s] RECV [%s]" % (self._info['NAME'], trid))
+        elif jsonObject.get("body", {}).get("rt_cd") == '1':
+            print("[%s] ERROR RETURN CODE [1] MSG [%s]" % (self._info['NAME'], jsonObject["body"]["msg1"]))
+
+
+def run_market_data_hub(info, stock_list, ring_name, events):
+    """
+    허브 프로세스 진입점
+
+    Args:
+        info (dict): 구독에 사용할 계좌의 API 접속 정보
+        stock_list (dict): 구독할 종목 (merge_stock_lists 결과)
+        ring_name (str): TickRing.create 로 만든 공유 메모리 이름
+        events (list): 워커별 multiprocessing.Event
+    """
+    MarketDataHub(info, stock_list, ring_name, events).run()
@@ -0,0 +1,233 @@
+"""
+워커 프로세스 지표 (Prometheus 텍스트 형식)
+매매 스레드는 카운터만 올리고, 지표 조회(HTTP GET /metrics)는 별도 스레드의 로컬 HTTP 서버가 처리한다.
+워커 프로세스 하나가 계좌 하나를 담당하므로 지표는 프로세스 단위로 둔다.
+
+지표:
+    kis_frames_total{tr_id}                   : 수신 프레임 수
+    kis_frames_per_second{tr_id}              : 직전 조회 이후 초당 수신 프레임 수
+    kis_queue_depth{queue}                    : 큐 대기 건수 (프레임/주문/저장소/기록기/Discord)
+    kis_rest_requests_total{tr_id}            : REST 호출 수
+    kis_rest_latency_seconds{tr_id}           : REST 호출 지연 (summary: _sum, _count)
+    kis_rate_limit_wait_seconds{priority}     : 속도 제한 대기 (summary: _sum, _count)
+    kis_orders_total{side, rt_cd, msg_cd}     : 주문 결과
+    kis_ws_reconnects_total                   : 웹소켓 재연결 수
+    kis_ws_gap_seconds                        : 재연결 시 마지막 수신 ~ 재연결 완료 시간 (summary: _sum, _count)
+    kis_worker_restarts_total                 : 워커 재시작 수 (웹소켓 외 오류)
+    kis_token_refresh_total{kind}             : 접근 토큰/웹소켓 접속키 발급 수
+    kis_process_resident_memory_bytes         : 프로세스 RSS
+    kis_strategy_state{state}                 : 상태별 종목 수
+
+주요 기능:
+1. 카운터/summary 기록 (inc, observe)
+2. 조회 시점에 계산하는 gauge 등록 (gauge)
+3. Prometheus 텍스트 생성 (render)
+4. 지표 HTTP 서버 (start_server, info['METRICS_PORT'])
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger()
+
+PRIORITY_NAMES = {0: 'order', 1: 'query', 2: 'report'}  # rate_limiter.PRIORITY_*
+
+
+def rss_bytes():
+    """현재 프로세스 RSS(bytes), 구할 수 없으면 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # 최대 RSS
+    except ImportError:
+        return None
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels) + '}'
+
+
+class Metrics:
+    """
+    프로세스 지표 모음
+
+    Attributes:
+        _counters (defaultdict): {(이름, 레이블): 값}
+        _summaries (defaultdict): {(이름, 레이블): [합계, 횟수]}
+        _gauges (dict): {이름: 조회 시 호출할 함수} - 함수는 숫자 또는 {레이블: 값} 반환
+        _help (dict): {이름: (타입, 설명)}
+        _last_frames (dict): 직전 조회 시점의 프레임 카운터 (초당 프레임 계산용)
+    """
+    def __init__(self):
+        self._counters = collections.defaultdict(float)
+        self._summaries = collections.defaultdict(lambda: [0.0, 0])
+        self._gauges = {}
+        self._help = {}
+        self._last_frames = {}
+        self._last_render = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = None
+        self._pid = None
+        self.describe('kis_frames_total', 'counter', '수신 프레임 수')
+        self.describe('kis_frames_per_second', 'gauge', '직전 조회 이후 초당 수신 프레임 수')
+        self.describe('kis_rest_requests_total', 'counter', 'REST 호출 수')
+        self.describe('kis_rest_latency_seconds', 'summary', 'REST 호출 지연(초)')
+        self.describe('kis_rate_limit_wait_seconds', 'summary', '속도 제한 대기(초)')
+        self.describe('kis_orders_total', 'counter', '주문 결과')
+        self.describe('kis_ws_reconnects_total', 'counter', '웹소켓 재연결 수')
+        self.describe('kis_ws_gap_seconds', 'summary', '재연결 수신 공백(초)')
+        self.describe('kis_worker_restarts_total', 'counter', '워커 재시작 수')
+        self.describe('kis_token_refresh_total', 'counter', '토큰 발급 수')
+        self.gauge('kis_process_resident_memory_bytes', rss_bytes, '프로세스 RSS(bytes)')
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, labels=(), value=1):
+        """
+        카운터 증가
+
+        Args:
+            name (str): 지표 이름
+            labels (tuple): ((레이블, 값), ...)
+            value (float): 증가량
+        """
+        self._counters[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        """summary 지표에 관측값(초) 추가"""
+        summary = self._summaries[(name, labels)]
+        summary[0] += value
+        summary[1] += 1
+
+    def gauge(self, name, fn, help_text='', label=None):
+        """
+        조회 시점에 계산하는 gauge 등록 (같은 이름이면 교체)
+
+        Args:
+            name (str): 지표 이름
+            fn (callable): 숫자 또는 {레이블 값: 숫자} 반환
+            help_text (str): 설명
+            label (str): fn 이 dict 를 반환할 때의 레이블 이름
+        """
+        self._gauges[name] = (fn, label)
+        self.describe(name, 'gauge', help_text)
+
+    def render(self):
+        """Prometheus 텍스트 형식 지표"""
+        lines = []
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._last_render, 1e-9)
+            counters = sorted(list(self._counters.items()))
+            summaries = sorted((key, tuple(v)) for key, v in list(self._summaries.items()))
+            frames = {labels: value for (name, labels), value in counters if name == 'kis_frames_total'}
+            rates = {labels: (value - self._last_frames.get(labels, 0)) / elapsed for labels, value in frames.items()}
+            self._last_frames, self._last_render = frames, now
+
+        def header(name):
+            kind, help_text = self._help.get(name, ('untyped', ''))
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, kind))
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                header(name)
+            lines.append('%s%s %s' % (name, _labels(labels), repr(float(value))))
+        if rates:
+            header('kis_frames_per_second')
+            for labels, value in sorted(rates.items()):
+                lines.append('kis_frames_per_second%s %.3f' % (_labels(labels), value))
+        for (name, labels), (total, count) in summaries:
+            if name not in seen:
+                seen.add(name)
+                header(name)
+            lines.append('%s_sum%s %s' % (name, _labels(labels), repr(float(total))))
+            lines.append('%s_count%s %d' % (name, _labels(labels), count))
+        for name, (fn, label) in list(self._gauges.items()):
+            # 게이지 하나의 오류(값/라벨 형식 포함)가 전체 응답을 막지 않도록 줄을 만든 뒤 추가
+            try:
+                value = fn()
+                if value is None:
+                    continue
+                if isinstance(value, dict):
+                    samples = [('%s%s %s' % (name, _labels(((label, key),)), repr(float(v))))
+                               for key, v in sorted((str(key), v) for key, v in value.items())]
+                else:
+                    samples = ['%s %s' % (name, repr(float(value)))]
+            except Exception as e:
+                logger.error(f"Metrics gauge {name} error: {e}")
+                continue
+            header(name)
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self, port, host='127.0.0.1'):
+        """
+        지표 HTTP 서버 시작 (백그라운드 스레드, 이미 실행 중이면 그대로 사용)
+
+        Args:
+            port (int): 포트
+            host (str): 바인드 주소 (기본: 로컬만)
+
+        Returns:
+            ThreadingHTTPServer: 서버 (시작 실패 시 None)
+        """
+        if self._server is not None and self._pid == os.getpid():
+            return self._server
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, int(port)), _Handler)
+        except OSError as e:
+            logger.error(f"Metrics server error (port {port}): {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        self._server, self._pid = server, os.getpid()
+        logger.info(f"Metrics server: http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def stop_server(self):
+        if self._server is not None and self._pid == os.getpid():
+            self._server.shutdown()
+            self._server.server_close()
+        self._server = None
+
+
+# 프로세스(계좌)별 지표
+METRICS = Metrics()
@@ -0,0 +1,199 @@
+"""
+일별 시세 조회 캐시 (계좌 공용, SQLite)
+전일종가(일봉)/2차 저항(현재가) 처럼 거래일 동안 바뀌지 않는 조회 응답을
+(엔드포인트, 종목코드, 거래일, 조회 조건)의 sha256 키로 저장하여, 여러 계좌와 재시작이
+같은 종목을 다시 조회하지 않도록 한다. 다른 거래일의 응답은 키가 달라 사용되지 않으며 열 때 삭제된다.
+
+    sqlite3 "file:ID_ACCOUNT/price_cache.db?mode=ro" "select endpoint, code, trading_date from price_cache"
+
+주요 기능:
+1. 캐시 키 계산 (cache_key)
+2. 조회/저장 (get, put) - rt_cd 가 '0' 이고 호출한 쪽의 검사(validate)를 통과한 응답만 저장
+3. 캐시 우선 조회 (fetch) - 같은 키를 동시에 조회하면 한 스레드만 API 를 호출하고 나머지는 결과를 기다림
+4. 경로별 공용 캐시 (get_price_cache)
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+
+import clock
+
+logger = logging.getLogger()
+
+DEFAULT_PATH = os.path.join("ID_ACCOUNT", "price_cache.db")
+
+# 현재 프로세스의 경로별 캐시 (계좌 스레드끼리 공유)
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def cache_key(endpoint, code, trading_date, params=None):
+    """
+    캐시 키 (조회 조건 전체의 sha256)
+
+    Args:
+        endpoint (str): API 경로 또는 함수 이름
+        code (str): 종목코드
+        trading_date (str): 거래일 (YYYYMMDD)
+        params (dict): 응답에 영향을 주는 나머지 조건 (서버, 장 시작 전/후 구분 등)
+
+    Returns:
+        str: 16진수 키
+    """
+    content = json.dumps([endpoint, code, trading_date, params or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class PriceCache:
+    """
+    거래일 단위 조회 응답 캐시
+
+    Attributes:
+        _db_path (str): DB 파일 경로
+        _conn (Connection): DB 연결 (스레드 공유, _lock 으로 보호)
+        _inflight (dict): {키: Event} 조회 중인 키 (같은 키의 동시 조회를 하나로 합침)
+        hits (int): 캐시 적중 수
+        misses (int): API 호출 수
+    """
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS price_cache (
+            key TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            code TEXT NOT NULL,
+            trading_date TEXT NOT NULL,
+            params TEXT NOT NULL,
+            response TEXT NOT NULL,
+            fetched_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_price_cache_date ON price_cache (trading_date)",
+    )
+
+    def __init__(self, db_path=DEFAULT_PATH):
+        self._db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+        self.purge()
+
+    @staticmethod
+    def trading_date():
+        """오늘 거래일 (YYYYMMDD, clock.now 기준)"""
+        return clock.now().strftime("%Y%m%d")
+
+    def get(self, endpoint, code, params=None):
+        """
+        오늘 거래일의 저장된 응답
+
+        Returns:
+            dict: 응답 JSON (없으면 None)
+        """
+        key = cache_key(endpoint, code, self.trading_date(), params)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM price_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, endpoint, code, response, params=None, validate=None):
+        """
+        응답 저장 (rt_cd 가 '0' 이 아닌 오류 응답과 validate 를 통과하지 못한 응답은 저장하지 않음)
+
+        Args:
+            validate (callable): 응답 JSON 을 받아 저장해도 되면 True 를 돌려주는 함수
+                (빈 output, 종가 0 처럼 rt_cd 는 '0' 이지만 쓸 수 없는 응답을 거르는 용도)
+
+        Returns:
+            bool: 저장 여부
+        """
+        if not isinstance(response, dict) or response.get('rt_cd') != '0':
+            return False
+        if validate is not None and not validate(response):
+            logger.warning(f"price cache: {endpoint} {code} 응답이 검사를 통과하지 못해 저장하지 않음")
+            return False
+        trading_date = self.trading_date()
+        row = (cache_key(endpoint, code, trading_date, params), endpoint, code, trading_date,
+               json.dumps(params or {}, ensure_ascii=False, sort_keys=True),
+               json.dumps(response, ensure_ascii=False), clock.now().strftime("%Y-%m-%d %H:%M:%S"))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO price_cache VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+        return True
+
+    def fetch(self, endpoint, code, fetch_fn, params=None, validate=None):
+        """
+        캐시 우선 조회 (없으면 fetch_fn 호출 후 저장)
+        다른 스레드가 같은 키를 조회 중이면 그 결과를 기다렸다가 사용한다.
+
+        Args:
+            endpoint (str): API 경로 또는 함수 이름
+            code (str): 종목코드
+            fetch_fn (callable): 인자 없이 호출하여 응답 JSON(dict)을 돌려주는 함수
+            params (dict): 응답에 영향을 주는 나머지 조건
+            validate (callable): 저장 전 응답 검사 함수 (put 참고, 통과하지 못한 응답은 돌려주기만 함)
+
+        Returns:
+            dict: 응답 JSON
+        """
+        key = cache_key(endpoint, code, self.trading_date(), params)
+        while True:
+            response = self.get(endpoint, code, params)
+            if response is not None:
+                self.hits += 1
+                return response
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            # 먼저 조회한 스레드가 끝날 때까지 대기 후 다시 확인 (저장되지 않았으면 직접 조회)
+            event.wait()
+        try:
+            self.misses += 1
+            response = fetch_fn()
+            self.put(endpoint, code, response, params, validate)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def purge(self):
+        """오늘 이전 거래일의 응답 삭제"""
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM price_cache WHERE trading_date < ?", (self.trading_date(),)).rowcount
+        if deleted:
+            logger.info(f"price cache: {deleted} expired entries removed")
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_price_cache(db_path=DEFAULT_PATH):
+    """
+    경로별 공용 캐시 반환 (없으면 생성, 같은 프로세스의 계좌 스레드끼리 공유)
+
+    Args:
+        db_path (str): DB 파일 경로 (기본: ID_ACCOUNT/price_cache.db)
+
+    Returns:
+        PriceCache: 캐시
+    """
+    path = os.path.abspath(db_path)
+    with _CACHES_LOCK:
+        cache = _CACHES.get((os.getpid(), path))
+        if cache is None:
+            cache = _CACHES[(os.getpid(), path)] = PriceCache(path)
+        return cache
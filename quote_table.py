@@ -0,0 +1,233 @@
+"""
+공유 메모리 시세 테이블 (종목별 최신 체결가/호가/거래량)
+워커의 틱 파서가 NumPy 구조화 배열을 제자리에서 갱신하고, 전략/리포트/외부 대시보드는
+잠금 없이 행 단위 버전(seqlock)을 확인하며 읽는다. 쓰기는 테이블을 만든 프로세스 하나만 한다.
+
+메모리 구조:
+    헤더 (64 bytes): 종목 수
+    종목코드: 'S8' x 종목 수 (행 번호 순서, 다른 프로세스가 code -> 행 맵을 복원하는 데 사용)
+    행: QUOTE_DTYPE x 종목 수 (64 bytes 정렬)
+
+행 갱신 순서 (seqlock):
+    version 홀수로 증가 -> 값 기록 -> version 짝수로 증가
+    읽는 쪽은 읽기 전후 version 이 같은 짝수일 때만 값을 사용한다.
+
+주요 기능:
+1. 테이블 생성/연결 (QuoteTable.create, QuoteTable.attach, quote_table_name)
+2. 틱 반영 (update: REALTIME_FIELDS 필드 이름 -> 열 매핑, quote_fields 로 테이블 열 필드를 파서에 추가)
+3. 잠금 없는 읽기 (read, snapshot)
+4. 현재 시세 출력 (python quote_table.py <계좌명>)
+"""
+
+import re
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+from tick_ring import attach_shared_memory
+
+QUOTE_DTYPE = np.dtype([
+    ('version', '<u8'),      # seqlock 버전 (홀수: 갱신 중)
+    ('last', '<i8'),         # 현재가
+    ('ask', '<i8'),          # 매도호가1
+    ('bid', '<i8'),          # 매수호가1
+    ('volume', '<i8'),       # 누적 거래량
+    ('trade_time', '<i8'),   # 체결 시각 (HHMMSS)
+    ('trade_ns', '<i8'),     # 체결 반영 시각 (time.time_ns)
+    ('quote_ns', '<i8'),     # 호가 반영 시각 (time.time_ns)
+])
+COLUMNS = QUOTE_DTYPE.names[1:]
+HEADER_SIZE = 64
+
+# REALTIME_FIELDS 필드 이름 -> 테이블 열
+FIELD_COLUMNS = {
+    "stck_prpr": "last",
+    "askp1": "ask",
+    "bidp1": "bid",
+    "acml_vol": "volume",
+    "stck_cntg_hour": "trade_time",
+}
+# 테이블 열을 채우는 데 필요한 TR별 필드 (전략이 선언하지 않은 필드는 테이블 사용 시에만 파싱)
+QUOTE_FIELDS = {
+    "H0STASP0": {"askp1": 3, "bidp1": 13},
+    "H0STCNT0": {"stck_prpr": 2, "stck_cntg_hour": 1, "acml_vol": 13},
+}
+# TR별 반영 시각 열
+TIME_COLUMNS = {
+    "H0STCNT0": "trade_ns",
+    "H0STASP0": "quote_ns",
+}
+
+
+def quote_table_name(name):
+    """계좌 이름으로 정한 공유 메모리 이름 (대시보드가 같은 이름으로 연결)"""
+    return "kisq_" + re.sub(r'[^0-9A-Za-z_]', '_', name)[:24]
+
+
+def quote_fields(fields_by_tr):
+    """
+    전략의 REALTIME_FIELDS 뒤에 테이블 열 필드를 덧붙인 파싱 필드 (테이블을 쓰는 워커/허브만 사용)
+    전략 필드의 순서와 위치는 그대로이므로 전략이 받는 값의 앞부분은 바뀌지 않는다.
+
+    Args:
+        fields_by_tr (dict): 전략의 REALTIME_FIELDS {TR_ID: {이름: 필드 위치}}
+
+    Returns:
+        dict: {TR_ID: {이름: 필드 위치}}
+    """
+    merged = {tr_id: dict(fields) for tr_id, fields in fields_by_tr.items()}
+    for tr_id, fields in QUOTE_FIELDS.items():
+        if tr_id in merged:
+            for name, index in fields.items():
+                merged[tr_id].setdefault(name, index)
+    return merged
+
+
+def _rows_offset(n_rows):
+    return (HEADER_SIZE + 8 * n_rows + 63) // 64 * 64
+
+
+class QuoteTable:
+    """
+    종목별 최신 시세 테이블
+
+    Attributes:
+        name (str): 공유 메모리 이름
+        codes (list): 행 순서의 종목코드
+        rows (dict): {종목코드: 행 번호}
+        array (ndarray): QUOTE_DTYPE 구조화 배열 (공유 메모리)
+        _updates (dict): {TR_ID: ((열 배열, 값 위치), ...), 반영 시각 열} - update 용
+    """
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self.name = shm.name
+        self._owner = owner
+        n_rows = int(np.frombuffer(shm.buf, dtype='<u8', count=1)[0])
+        self.codes = [c.decode() for c in np.frombuffer(shm.buf, dtype='S8', count=n_rows, offset=HEADER_SIZE)]
+        self.rows = {code: row for row, code in enumerate(self.codes)}
+        self.array = np.ndarray((n_rows,), dtype=QUOTE_DTYPE, buffer=shm.buf, offset=_rows_offset(n_rows))
+        self._version = self.array['version']
+        self._updates = {}
+
+    @classmethod
+    def create(cls, codes, name=None):
+        """
+        테이블 생성 (쓰는 프로세스에서 호출, 같은 이름이 남아 있으면 지우고 다시 만듦)
+
+        Args:
+            codes (iterable): 종목코드
+            name (str): 공유 메모리 이름 (None 이면 자동)
+
+        Returns:
+            QuoteTable: 생성한 테이블 (unlink 책임을 가짐)
+        """
+        codes = list(codes)
+        size = _rows_offset(len(codes)) + QUOTE_DTYPE.itemsize * max(len(codes), 1)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:  # 이전 실행이 비정상 종료되어 남은 테이블
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        np.frombuffer(shm.buf, dtype='<u8', count=1)[0] = len(codes)
+        np.frombuffer(shm.buf, dtype='S8', count=len(codes), offset=HEADER_SIZE)[:] = [c.encode() for c in codes]
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """이미 생성된 테이블에 연결 (읽기 전용, 워커와 관련 없는 프로세스에서도 사용)"""
+        return cls(attach_shared_memory(name, track=False))
+
+    def bind_fields(self, fields_by_tr):
+        """
+        TR별 파싱 필드와 테이블 열 연결 (update 전에 한 번 호출)
+
+        Args:
+            fields_by_tr (dict): 전략의 REALTIME_FIELDS {TR_ID: {이름: 필드 위치}}
+        """
+        for tr_id, fields in fields_by_tr.items():
+            columns = tuple((self.array[FIELD_COLUMNS[field]], i) for i, field in enumerate(fields)
+                            if field in FIELD_COLUMNS)
+            if columns:
+                time_column = TIME_COLUMNS.get(tr_id)
+                self._updates[tr_id] = (columns, self.array[time_column] if time_column else None)
+        return self
+
+    def update(self, tr_id, code, values):
+        """
+        틱 1건 반영 (쓰는 프로세스 전용)
+
+        Args:
+            tr_id (str): TR ID
+            code (str): 종목코드
+            values (tuple): REALTIME_FIELDS[tr_id] 선언 순서의 int 값
+        """
+        update = self._updates.get(tr_id)
+        row = self.rows.get(code)
+        if update is None or row is None:
+            return
+        columns, time_column = update
+        version = self._version
+        version[row] += 1
+        for column, i in columns:
+            column[row] = values[i]
+        if time_column is not None:
+            time_column[row] = time.time_ns()
+        version[row] += 1
+
+    def read(self, code, retries=100):
+        """
+        종목 1개의 일관된 시세 (잠금 없음)
+
+        Returns:
+            dict: {열: 값} (종목이 없거나 계속 갱신 중이면 None)
+        """
+        row = self.rows.get(code)
+        if row is None:
+            return None
+        array, version = self.array, self._version
+        for _ in range(retries):
+            v1 = version[row]
+            if v1 & 1:
+                continue
+            record = array[row].item()
+            if version[row] == v1:
+                return dict(zip(COLUMNS, record[1:]))
+        return None
+
+    def snapshot(self):
+        """
+        전체 테이블 복사본 (행마다 버전을 확인하여 갱신 중이던 행은 다시 읽음)
+
+        Returns:
+            ndarray: QUOTE_DTYPE 배열 복사본
+        """
+        copy = self.array.copy()
+        torn = np.nonzero((copy['version'] & 1) | (copy['version'] != self._version))[0]
+        for row in torn:
+            quote = self.read(self.codes[row])
+            if quote is not None:
+                copy[row] = (0,) + tuple(quote[column] for column in COLUMNS)
+        return copy
+
+    def close(self):
+        self.array = self._version = None
+        self._updates = {}
+        self._shm.close()
+
+    def unlink(self):
+        if self._owner:
+            self._shm.unlink()
+
+
+if __name__ == '__main__':
+    # 실행 중인 워커의 시세 테이블 출력: python quote_table.py <계좌명>
+    table = QuoteTable.attach(quote_table_name(sys.argv[1]))
+    snapshot = table.snapshot()
+    print("%-8s %10s %10s %10s %14s %8s" % ("code", "last", "ask", "bid", "volume", "time"))
+    for code, row in zip(table.codes, snapshot):
+        print("%-8s %10d %10d %10d %14d %06d" % (code, row['last'], row['ask'], row['bid'], row['volume'], row['trade_time']))
+    table.close()
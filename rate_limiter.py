@@ -0,0 +1,143 @@
+"""
+KIS REST API 호출 속도 제한 모듈
+여러 계좌 프로세스가 같은 앱 키를 사용할 때 초당 호출 수를 공유 메모리 토큰 버킷으로 조절
+
+주요 기능:
+1. 프로세스 간 공유 토큰 버킷 (multiprocessing Lock + RawArray)
+2. 우선순위 대기열 (주문/해시키 > 시세 조회 > 계좌 리포트)
+3. 앱 키별 제한기 등록 및 워커 프로세스로 전달
+"""
+
+import time
+import asyncio
+import multiprocessing
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_ORDER = 0   # order-cash, hashkey
+PRIORITY_QUERY = 1   # 현재가, 일봉, 잔고 등 매매 판단용 조회
+PRIORITY_REPORT = 2  # Account_detail 등 리포트용 조회
+NUM_PRIORITIES = 3
+
+# 앱 키당 초당 호출 한도
+LIVE_CALLS_PER_SEC = 20
+PAPER_CALLS_PER_SEC = 2
+PAPER_URL_BASE = "https://openapivts.koreainvestment.com:29443"
+
+_MIN_SLEEP = 0.0005
+
+
+class RateLimiter:
+    """
+    프로세스 간 공유 토큰 버킷
+
+    대기 중인 상위 우선순위 호출이 있으면 하위 우선순위 호출은 토큰이 있어도 양보한다.
+    fork/spawn 시 Process 인자(또는 그 속성)로 넘기면 같은 버킷을 공유한다.
+
+    Attributes:
+        _rate (float): 초당 토큰 충전량
+        _burst (float): 버킷 최대 크기
+        _lock (Lock): 공유 상태 보호용 락
+        _state (RawArray): [남은 토큰, 마지막 충전 시각(monotonic)]
+        _waiting (RawArray): 우선순위별 대기 중인 호출 수
+    """
+    def __init__(self, rate, burst=None):
+        self._rate = float(rate)
+        self._burst = float(burst or rate)
+        self._lock = multiprocessing.Lock()
+        self._state = multiprocessing.RawArray('d', [self._burst, time.monotonic()])
+        self._waiting = multiprocessing.RawArray('i', NUM_PRIORITIES)
+
+    def _poll(self, priority, registered):
+        """
+        토큰 획득 시도
+
+        Returns:
+            tuple: (획득 여부, 대기열 등록 여부, 다음 시도까지 대기 시간)
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self._burst, self._state[0] + (now - self._state[1]) * self._rate)
+            self._state[0] = tokens
+            self._state[1] = now
+            blocked = any(self._waiting[p] for p in range(priority))
+            if not blocked and tokens >= 1.0:
+                self._state[0] = tokens - 1.0
+                if registered:
+                    self._waiting[priority] -= 1
+                return True, False, 0.0
+            if not registered:
+                self._waiting[priority] += 1
+            wait = (1.0 - tokens) / self._rate if tokens < 1.0 else _MIN_SLEEP
+            return False, True, max(wait, _MIN_SLEEP)
+
+    def _unregister(self, priority):
+        with self._lock:
+            self._waiting[priority] -= 1
+
+    def acquire(self, priority=PRIORITY_QUERY):
+        """
+        호출 1건에 대한 토큰 획득 (허용될 때까지 정확히 필요한 만큼만 대기)
+
+        Args:
+            priority (int): 호출 우선순위
+
+        Returns:
+            float: 대기한 시간(초)
+        """
+        t_start = time.monotonic()
+        registered = False
+        try:
+            while True:
+                granted, registered, wait = self._poll(priority, registered)
+                if granted:
+                    return time.monotonic() - t_start
+                time.sleep(wait)
+        finally:
+            if registered:
+                self._unregister(priority)
+
+    async def acquire_async(self, priority=PRIORITY_QUERY):
+        """acquire 의 asyncio 버전 (이벤트 루프를 막지 않음)"""
+        t_start = time.monotonic()
+        registered = False
+        try:
+            while True:
+                granted, registered, wait = self._poll(priority, registered)
+                if granted:
+                    return time.monotonic() - t_start
+                await asyncio.sleep(wait)
+        finally:
+            if registered:
+                self._unregister(priority)
+
+
+# APP_KEY 별 제한기
+_LIMITERS = {}
+
+def get_rate_limiter(URL_BASE, APP_KEY, **arg):
+    """
+    앱 키별 제한기 반환 (없으면 계좌 종류에 맞는 한도로 생성)
+    워커 프로세스 생성 전에 메인 프로세스에서 먼저 호출해야 프로세스 간에 공유된다.
+
+    Args:
+        URL_BASE (str): API 기본 URL (모의/실전 구분)
+        APP_KEY (str): API 앱 키
+
+    Returns:
+        RateLimiter: 제한기
+    """
+    limiter = _LIMITERS.get(APP_KEY)
+    if limiter is None:
+        rate = PAPER_CALLS_PER_SEC if URL_BASE == PAPER_URL_BASE else LIVE_CALLS_PER_SEC
+        limiter = _LIMITERS[APP_KEY] = RateLimiter(rate)
+    return limiter
+
+def install_rate_limiter(APP_KEY, limiter):
+    """
+    메인 프로세스에서 전달받은 제한기를 현재(워커) 프로세스에 등록
+
+    Args:
+        APP_KEY (str): API 앱 키
+        limiter (RateLimiter): 공유 제한기
+    """
+    _LIMITERS[APP_KEY] = limiter
@@ -0,0 +1,157 @@
+"""
+KIS 실시간 웹소켓 프레임 디코더
+
+실시간 데이터 프레임 형식:
+    '0|TR_ID|레코드수|필드^필드^...'
+레코드수가 2 이상이면 TR별 고정 필드 수만큼의 레코드가 '^'로 이어져 전송된다.
+
+주요 기능:
+1. 프레임의 모든 레코드 분리 (TR별 고정 필드 수 기준)
+2. 종목코드별 레코드 묶음 생성 (전략 객체에 일괄 전달)
+3. 전략이 선언한 필드만 int로 추출하는 TR별 필드 파서
+4. 체결 통보(H0STCNI0) 레코드 생성 (모의 서버/리플레이용)
+"""
+
+from operator import itemgetter
+
+# TR별 레코드당 필드 수
+FIELD_COUNT = {
+    "H0STCNT0": 46,  # 실시간 주식체결가
+    "H0STASP0": 59,  # 실시간 주식호가
+    "H0STCNI0": 26,  # 실시간 체결 통보
+}
+
+def decode_frame(data):
+    """
+    실시간 데이터 프레임을 레코드 단위로 분리
+
+    Args:
+        data (str): 웹소켓 수신 문자열 ('0|TR_ID|NNN|body')
+
+    Returns:
+        tuple: (TR_ID, 레코드 리스트) - 각 레코드는 필드 문자열 리스트
+    """
+    recvstr = data.split('|', 3)
+    tr_id = recvstr[1]
+    count = int(recvstr[2])
+    fields = recvstr[3].split('^')
+    if count <= 1:
+        return tr_id, [fields]
+
+    width = FIELD_COUNT.get(tr_id)
+    if width is None or width * count != len(fields):
+        # 필드 수를 모르는 TR은 전체 길이로 레코드 폭을 추정
+        if len(fields) % count != 0:
+            return tr_id, [fields]
+        width = len(fields) // count
+    return tr_id, [fields[i:i + width] for i in range(0, width * count, width)]
+
+def group_by_code(records):
+    """
+    레코드를 종목코드(첫 번째 필드)별로 묶음 (수신 순서 유지)
+
+    Args:
+        records (list): decode_frame 이 반환한 레코드 리스트
+
+    Returns:
+        dict: {종목코드: [레코드, ...]}
+    """
+    grouped = {}
+    for record in records:
+        code = record[0]
+        if code in grouped:
+            grouped[code].append(record)
+        else:
+            grouped[code] = [record]
+    return grouped
+
+class FieldParser:
+    """
+    TR별 필드 위치를 미리 계산해 두고 필요한 필드만 int로 추출하는 파서
+
+    단일 레코드 프레임은 마지막으로 필요한 필드 위치까지만 분리(maxsplit)하므로
+    H0STCNT0 의 현재가만 필요할 때 46개가 아닌 4개의 문자열만 만든다.
+
+    Attributes:
+        tr_id (str): TR ID
+        names (tuple): 추출할 필드 이름 (반환 튜플 순서)
+        offsets (tuple): 레코드 내 필드 위치
+        width (int): 레코드당 필드 수 (모르면 None)
+    """
+    def __init__(self, tr_id, fields):
+        self.tr_id = tr_id
+        self.names = tuple(fields)
+        self.offsets = tuple(fields.values())
+        self.width = FIELD_COUNT.get(tr_id)
+        self._maxsplit = max(self.offsets) + 1
+        if len(self.offsets) == 1:
+            offset = self.offsets[0]
+            self._pick = lambda parts: (int(parts[offset]),)
+        else:
+            getter = itemgetter(*self.offsets)
+            self._pick = lambda parts: tuple(map(int, getter(parts)))
+
+    def parse(self, body, count=1):
+        """
+        프레임 본문에서 레코드별 (종목코드, 값 튜플) 추출
+
+        Args:
+            body (str): 프레임 본문 ('|'로 분리한 4번째 항목)
+            count (int): 레코드 수
+
+        Returns:
+            list: [(종목코드, (int, ...)), ...]
+        """
+        if count <= 1:
+            parts = body.split('^', self._maxsplit)
+            return [(parts[0], self._pick(parts))]
+        parts = body.split('^')
+        width = self.width
+        if width is None or width * count != len(parts):
+            width = len(parts) // count
+        offsets = self.offsets
+        return [(parts[base], tuple([int(parts[base + i]) for i in offsets]))
+                for base in range(0, width * count, width)]
+
+def build_parsers(fields_by_tr):
+    """
+    {TR_ID: {이름: 위치}} 선언으로 TR별 FieldParser 생성
+
+    Args:
+        fields_by_tr (dict): 전략의 REALTIME_FIELDS
+
+    Returns:
+        dict: {TR_ID: FieldParser}
+    """
+    return {tr_id: FieldParser(tr_id, fields) for tr_id, fields in fields_by_tr.items()}
+
+def notice_record(side, code, qty, price, hhmmss, accepted, order_qty, order_no="0", account="0"):
+    """
+    체결 통보(H0STCNI0) 레코드 필드 리스트 (STRATEGY._Stock_Signal_Notice 가 읽는 위치)
+
+    Args:
+        side (str): 'BUY' 또는 'SELL' (필드 4: 02 매수, 01 매도)
+        code (str): 종목코드 (필드 8)
+        qty (int): 체결수량 (필드 9)
+        price (int): 체결단가 (필드 10)
+        hhmmss (str): 체결시간 (필드 11)
+        accepted (str): 접수여부 (필드 14: 1 접수, 2 확인) - 확인이면 체결여부(필드 13)도 2
+        order_qty (int): 주문수량 (필드 16)
+        order_no (str): 주문번호 (필드 2)
+        account (str): 계좌번호 (필드 1)
+
+    Returns:
+        list: 필드 문자열 리스트 (26개)
+    """
+    fields = ["0"] * FIELD_COUNT["H0STCNI0"]
+    fields[1] = account
+    fields[2] = order_no
+    fields[4] = "02" if side == "BUY" else "01"
+    fields[8] = code
+    fields[9] = str(qty)
+    fields[10] = str(price)
+    fields[11] = hhmmss
+    fields[13] = "2" if accepted == "2" else "1"
+    fields[14] = accepted
+    fields[16] = str(order_qty)
+    return fields
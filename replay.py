@@ -0,0 +1,427 @@
+"""
+리플레이/백테스트 실행 모듈
+기록된 프레임(frame_recorder 세그먼트) 또는 합성 프레임을 OuterWorker 와 같은 디스패치 경로로
+수정하지 않은 STRATEGY 객체에 전달한다. REST 호출은 모의 브로커로 대체하고, 체결은 주문 이후
+해당 종목의 다음 체결가로 만들어 H0STCNI0 체결 통보(AES 암호화)로 되돌려 보낸다.
+시각은 프레임 수신 시각을 따라가는 SimulatedClock 을 사용하므로 실제 시간보다 빠르게 실행된다.
+
+주요 기능:
+1. 모의 브로커 (잔고/현재가 조회, 현금 주문, 체결 통보 생성)
+2. 리플레이 워커 (OuterWorker._On_Message 재사용)
+3. 합성 장중 프레임 생성 (09:00~15:30)
+4. 결과 리포트 (체결, 손익, 처리량)
+
+실행:
+    python replay.py --synthetic 10
+    python replay.py --check-drift
+    python replay.py --segment ID_ACCOUNT/<name>/frames/20250102.seg --stocks ID_ACCOUNT/<name>/stocksinfo_TOTAL.json
+"""
+
+import io
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+import contextlib
+import numpy as np
+
+import clock
+import ALGORITHM
+from ALGORITHM import STRATEGY
+from realtime_frames import FieldParser, build_parsers, notice_record
+from tr_functions import aes_cbc_base64_enc
+from state_store import SQLiteStateStore
+from screening import floor_tick, tick_size
+from frame_recorder import iter_segment
+from main_multiprocessing import OuterWorker, Assign_Trading_Algorithm_To_Stock
+from benchmarks.frames import cnt_record, asp_record, make_frame
+
+REPLAY_INFO = {
+    'NAME': 'REPLAY',
+    'ACNT_TYPE': 'real',
+    'CANO': '00000000',
+    'ACNT_PRDT_CD': '01',
+    'URL_BASE': 'http://replay',
+    'APP_KEY': 'replay',
+    'APP_SECRET': 'replay',
+    'ACCESS_TOKEN': 'replay',
+    'DISCORD_WEBHOOK_URL': '',
+}
+
+
+class _Response:
+    """requests.Response 대용 (.json() 만 지원)"""
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class SimulatedBroker:
+    """
+    모의 브로커
+    주문은 접수 통보를 바로 만들고, 해당 종목의 다음 체결 틱 가격으로 전량 체결한다.
+
+    Attributes:
+        aes_key (str): 체결 통보 암호화 키
+        aes_iv (str): 체결 통보 암호화 IV
+        cash (int): 예수금
+        positions (dict): {종목코드: [보유수량, 평균단가]}
+        last_price (dict): {종목코드: 마지막 체결가}
+        fills (list): 체결 내역
+        realized (dict): {종목코드: 실현손익}
+        outbox (list): 전달 대기 중인 체결 통보 프레임
+    """
+    def __init__(self, initial_cash=10_000_000, initial_prices=None):
+        self.aes_key = 'R' * 32
+        self.aes_iv = 'I' * 16
+        self.cash = initial_cash
+        self.initial_cash = initial_cash
+        self.positions = {}
+        self.last_price = dict(initial_prices or {})
+        self.fills = []
+        self.realized = {}
+        self.outbox = []
+        self._pending = []
+        self._odno = 0
+
+    # TR 함수 대체
+    def inquire_balance(self, **arg):
+        output1 = [{
+            'pdno': code, 'prdt_name': code, 'hldg_qty': str(qty),
+            'pchs_avg_pric': str(avg), 'prpr': str(self.last_price.get(code, int(avg))),
+            'evlu_pfls_rt': '0', 'thdt_buyqty': str(qty),
+        } for code, (qty, avg) in self.positions.items() if qty > 0]
+        return _Response({'rt_cd': '0', 'output1': output1, 'output2': [{'tot_evlu_amt': str(self.equity())}]})
+
+    def inquire_price(self, code="005930", **arg):
+        return _Response({'rt_cd': '0', 'output': {'stck_prpr': str(self.last_price.get(code, 0))}})
+
+    def order_cash_Buy(self, code, qty, price, side='market', **arg):
+        return self._order('BUY', code, int(qty))
+
+    def order_cash_Sell(self, code, qty, price, side='market', **arg):
+        return self._order('SELL', code, int(qty))
+
+    def _order(self, side, code, qty):
+        if qty <= 0:
+            return {'rt_cd': '1', 'msg1': '주문수량 오류'}
+        self._odno += 1
+        self._pending.append((side, code, qty))
+        self.outbox.append(self._notice(side, code, 0, 0, qty, accepted='1'))
+        return {'rt_cd': '0', 'msg1': '주문 전송 완료 되었습니다.', 'output': {'ODNO': '%010d' % self._odno}}
+
+    # 체결
+    def on_tick(self, code, price):
+        """체결 틱 반영 (대기 주문은 이 가격으로 전량 체결)"""
+        self.last_price[code] = price
+        if not self._pending:
+            return
+        remaining = []
+        for side, order_code, qty in self._pending:
+            if order_code != code:
+                remaining.append((side, order_code, qty))
+                continue
+            self._fill(side, code, qty, price)
+            self.outbox.append(self._notice(side, code, qty, price, qty, accepted='2'))
+        self._pending = remaining
+
+    def _fill(self, side, code, qty, price):
+        held, avg = self.positions.get(code, (0, 0.0))
+        if side == 'BUY':
+            self.positions[code] = [held + qty, (held * avg + qty * price) / (held + qty)]
+            self.cash -= qty * price
+        else:
+            qty = min(qty, held)
+            self.realized[code] = self.realized.get(code, 0) + (price - avg) * qty
+            self.positions[code] = [held - qty, avg]
+            self.cash += qty * price
+        self.fills.append({'time': clock.now().strftime('%H:%M:%S'), 'code': code, 'side': side, 'qty': qty, 'price': price})
+
+    def _notice(self, side, code, qty, price, order_qty, accepted):
+        """H0STCNI0 체결 통보 프레임 (AES256-CBC, Base64)"""
+        fields = notice_record(side, code, qty, price, clock.now().strftime('%H%M%S'), accepted, order_qty,
+                               order_no='%010d' % self._odno)
+        return '1|H0STCNI0|001|' + aes_cbc_base64_enc(self.aes_key, self.aes_iv, '^'.join(fields))
+
+    # 평가
+    def equity(self):
+        return self.cash + sum(qty * self.last_price.get(code, avg) for code, (qty, avg) in self.positions.items())
+
+    def pnl(self):
+        """종목별 손익 {종목코드: {'realized', 'unrealized'}}"""
+        codes = set(self.realized) | set(self.positions)
+        result = {}
+        for code in sorted(codes):
+            qty, avg = self.positions.get(code, (0, 0.0))
+            unrealized = (self.last_price.get(code, avg) - avg) * qty if qty else 0.0
+            result[code] = {'realized': round(self.realized.get(code, 0.0)), 'unrealized': round(unrealized), 'holding': qty}
+        return result
+
+
+@contextlib.contextmanager
+def patched_tr_functions(broker):
+    """ALGORITHM 모듈이 사용하는 REST 함수를 모의 브로커로 교체"""
+    names = ('inquire_balance', 'inquire_price', 'order_cash_Buy', 'order_cash_Sell')
+    saved = {name: getattr(ALGORITHM, name) for name in names}
+    try:
+        for name in names:
+            setattr(ALGORITHM, name, getattr(broker, name))
+        yield broker
+    finally:
+        for name, fn in saved.items():
+            setattr(ALGORITHM, name, fn)
+
+
+class ReplayWorker(OuterWorker):
+    """
+    리플레이용 워커 (웹소켓/REST 없이 OuterWorker._On_Message 디스패치를 그대로 사용)
+
+    Attributes:
+        _broker (SimulatedBroker): 모의 브로커
+        _price_parser (FieldParser): 체결가 추출 파서 (브로커 체결용)
+    """
+    def __init__(self, info, stock_list, broker, state_db_path):
+        self._info = info
+        self._info_path = os.path.dirname(state_db_path)
+        self._stock_list = stock_list
+        self._broker = broker
+        self._aes_key, self._aes_iv = broker.aes_key, broker.aes_iv
+        self._store = SQLiteStateStore(state_db_path)
+        self._store.replace_all(stock_list)
+        self._Stock_Algo = Assign_Trading_Algorithm_To_Stock(info, stock_list, self._store)
+        self._parsers = build_parsers(STRATEGY.REALTIME_FIELDS)
+        self._price_parser = FieldParser("H0STCNT0", {"stck_prpr": 2})
+        self._recorder = None
+        self._Deliver_Notices()
+
+    def feed(self, data):
+        """프레임 1건 처리 (체결 -> 체결 통보 -> 시세 순서)"""
+        if data.startswith('0|H0STCNT0|'):
+            recvstr = data.split('|', 3)
+            for code, (price,) in self._price_parser.parse(recvstr[3], int(recvstr[2])):
+                self._broker.on_tick(code, price)
+            self._Deliver_Notices()
+        self._On_Message(data)
+        self._Deliver_Notices()
+
+    def _Deliver_Notices(self):
+        outbox = self._broker.outbox
+        while outbox:
+            self._On_Message(outbox.pop(0))
+
+
+def synthetic_stock_list(n_codes, base_price=10000, buy_amount=1_000_000, day=None, seed=0):
+    """
+    합성 종목 정보 (StockInfo_to_Trade 와 같은 필드, 전일종가 대비 -2% 매수 / +8% 매도)
+
+    Returns:
+        tuple: (종목 정보 dict, 전일종가 dict)
+    """
+    rnd = random.Random(seed)
+    day = day or clock.now().date()
+    stocks, closes = {}, {}
+    for i in range(n_codes):
+        code = '%06d' % (900000 + i)
+        close = int(base_price * rnd.uniform(0.5, 2.0))
+        buy_price_ori = int(close * (1 - 0.02))
+        stocks[code] = {
+            'name': f'SIM{i:02d}', 'code': code, 'priority': '%02d' % (i + 1),
+            'buy_amount': str(buy_amount), 'buy_price_ori': str(buy_price_ori), 'buy_price_modi': "0",
+            'buy_qty_ori': str(buy_amount // buy_price_ori), 'buy_qty_modi': "0", 'buy_qty_submitted': "0",
+            'sell_price_ori': str(int(buy_price_ori * 1.08)), 'sell_price_modi': "0",
+            'sell_target_percent': "0.08",
+            'timepoint_trading_start': f'{day} 09:05:00', 'timepoint_trading_end': f'{day} 15:41:00',
+            'order_type': 'market', 'state': 'TO_BUY',
+        }
+        closes[code] = close
+    return stocks, closes
+
+
+def price_walk(closes, seed=0, volatility=0.0003):
+    """
+    종목별 가격 랜덤 워크 (1 회차마다 모든 종목을 한 번에 계산)
+    수준은 float 로 유지하고(회차마다 정수로 버리면 아래로 계속 밀림) 내보낼 때만 호가 단위로 내림한다.
+
+    Args:
+        closes (dict): {종목코드: 시작 가격}
+        seed (int): 난수 시드
+        volatility (float): 회차당 수익률 표준편차
+
+    Yields:
+        tuple: (체결가 배열, 호가 단위 배열) - closes 순서, int64
+    """
+    rng = np.random.default_rng(seed)
+    levels = np.array(list(closes.values()), dtype=np.float64)
+    while True:
+        levels *= 1 + rng.normal(0.0, volatility, len(levels))
+        prices = np.maximum(floor_tick(np.rint(levels).astype(np.int64)), 1)
+        yield prices, tick_size(prices)
+
+
+def check_drift(n_codes=1000, steps=23400, seed=0, volatility=0.0003, tolerance=0.01):
+    """
+    랜덤 워크의 평균 drift 확인 (steps 회차 후 종목 평균 가격 비율이 1 에서 tolerance 이내)
+
+    Returns:
+        tuple: (통과 여부, 평균 가격 비율)
+    """
+    rnd = random.Random(seed)
+    closes = {'%06d' % i: int(rnd.uniform(1000, 200000)) for i in range(n_codes)}
+    start = np.array(list(closes.values()), dtype=np.float64)
+    walk = price_walk(closes, seed=seed, volatility=volatility)
+    for _ in range(steps):
+        prices, _ = next(walk)
+    ratio = float(np.mean(prices / start))
+    return abs(ratio - 1) <= tolerance, ratio
+
+
+def synthetic_session(closes, day=None, tick_interval=1.0, seed=0, start="09:00:00", end="15:30:00", volatility=0.0003):
+    """
+    합성 장중 프레임 생성 (종목마다 tick_interval 초마다 호가 1건 + 체결 1건)
+    가격은 price_walk (호가 단위, 매도호가1 = 체결가 + 호가 단위, 매수호가1 = 체결가)
+
+    Yields:
+        tuple: (time_ns, 프레임 문자열)
+    """
+    day = day or clock.now().date()
+    t = datetime.datetime.combine(day, datetime.time.fromisoformat(start))
+    t_end = datetime.datetime.combine(day, datetime.time.fromisoformat(end))
+    step = datetime.timedelta(seconds=tick_interval)
+    codes = list(closes)
+    walk = price_walk(closes, seed=seed, volatility=volatility)
+    while t < t_end:
+        wall_ns = int(t.timestamp() * 1e9)
+        hhmmss = t.strftime('%H%M%S')
+        prices, ticks = next(walk)
+        for code, price, tick in zip(codes, prices.tolist(), ticks.tolist()):
+            yield wall_ns, make_frame("H0STASP0", [asp_record(code, price + tick, price, hhmmss)])
+            yield wall_ns, make_frame("H0STCNT0", [cnt_record(code, price, hhmmss)])
+        t += step
+
+
+def recorded_session(path):
+    """
+    기록된 세그먼트의 시세 프레임 (체결 통보/구독 응답은 제외 - 모의 브로커가 대신 생성)
+
+    Yields:
+        tuple: (time_ns, 프레임 문자열)
+    """
+    for _, wall_ns, data in iter_segment(path):
+        if data[0] == '0':
+            yield wall_ns, data
+
+
+def run_replay(frames, stock_list, info=None, initial_cash=10_000_000, initial_prices=None, quiet=True):
+    """
+    리플레이 실행
+
+    Args:
+        frames (iterable): (time_ns, 프레임 문자열)
+        stock_list (dict): 종목 정보 (stocksinfo_TOTAL.json 형식)
+        info (dict): 계좌 정보 (None 이면 REPLAY_INFO)
+        initial_cash (int): 시작 예수금
+        initial_prices (dict): 첫 틱 이전 현재가 조회 값 {종목코드: 가격}
+        quiet (bool): 전략의 메시지 출력 숨김
+
+    Returns:
+        dict: 리포트 (frames, ticks, elapsed_sec, ticks_per_sec, fills, pnl, equity)
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("no frames to replay")
+    sim_clock = clock.SimulatedClock(datetime.datetime.fromtimestamp(first[0] / 1e9))
+    broker = SimulatedBroker(initial_cash, initial_prices)
+    workdir = tempfile.mkdtemp(prefix='replay_')
+    info = dict(info or REPLAY_INFO, STOCKS_DIR_PATH=workdir)
+    out = io.StringIO() if quiet else None
+
+    clock.install_clock(sim_clock)
+    try:
+        with patched_tr_functions(broker), contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+            worker = ReplayWorker(info, {code: dict(stock) for code, stock in stock_list.items()},
+                                  broker, os.path.join(workdir, 'state.db'))
+            n_frames = n_ticks = 0
+            started = time.perf_counter()
+            for wall_ns, data in _chain(first, frames):
+                sim_clock.set(datetime.datetime.fromtimestamp(wall_ns / 1e9))
+                worker.feed(data)
+                n_frames += 1
+                n_ticks += int(data[data.index('|', 2) + 1:data.index('|', 2) + 4]) if data[0] == '0' else 0
+            elapsed = time.perf_counter() - started
+            worker._store.close()
+    finally:
+        clock.reset_clock()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    pnl = broker.pnl()
+    return {
+        'frames': n_frames,
+        'ticks': n_ticks,
+        'elapsed_sec': round(elapsed, 3),
+        'ticks_per_sec': round(n_ticks / elapsed) if elapsed else 0,
+        'session': [str(datetime.datetime.fromtimestamp(first[0] / 1e9)), str(sim_clock.current)],
+        'fills': broker.fills,
+        'pnl': pnl,
+        'realized': sum(p['realized'] for p in pnl.values()),
+        'unrealized': sum(p['unrealized'] for p in pnl.values()),
+        'equity': round(broker.equity()),
+        'initial_cash': initial_cash,
+        'states': {code: algo._stock_info['state'] for code, algo in worker._Stock_Algo.items()},
+    }
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def print_report(report):
+    """리포트 요약 출력"""
+    print(f"session  {report['session'][0]} ~ {report['session'][1]}")
+    print(f"frames   {report['frames']}  ticks {report['ticks']}  elapsed {report['elapsed_sec']}s  "
+          f"({report['ticks_per_sec']} ticks/sec)")
+    for fill in report['fills']:
+        print(f"fill     {fill['time']} {fill['side']:<4} {fill['code']} {fill['qty']}주 @ {fill['price']}")
+    for code, p in report['pnl'].items():
+        print(f"pnl      {code} realized {p['realized']:>10,} unrealized {p['unrealized']:>10,} holding {p['holding']}")
+    print(f"total    realized {report['realized']:,} unrealized {report['unrealized']:,} "
+          f"equity {report['equity']:,} (start {report['initial_cash']:,})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, metavar='N', help='합성 종목 N개로 09:00~15:30 리플레이')
+    parser.add_argument('--tick-interval', type=float, default=1.0, help='합성 프레임 간격(초)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--segment', help='frame_recorder 세그먼트 파일')
+    parser.add_argument('--stocks', help='세그먼트 리플레이에 사용할 stocksinfo_TOTAL.json')
+    parser.add_argument('--json', action='store_true', help='리포트를 JSON 으로 출력')
+    parser.add_argument('--check-drift', action='store_true', help='합성 랜덤 워크의 평균 drift 확인 (1000종목 x 23400회차)')
+    args = parser.parse_args()
+
+    if args.check_drift:
+        ok, ratio = check_drift(seed=args.seed)
+        print(f"drift    mean price ratio {ratio:.4f} ({'ok' if ok else 'FAIL'})")
+        raise SystemExit(0 if ok else 1)
+
+    if args.segment:
+        with open(args.stocks, encoding='utf-8') as f:
+            stocks = json.load(f)
+        report = run_replay(recorded_session(args.segment), stocks)
+    else:
+        day = datetime.date.today()
+        stocks, closes = synthetic_stock_list(args.synthetic or 10, day=day, seed=args.seed)
+        report = run_replay(synthetic_session(closes, day=day, tick_interval=args.tick_interval, seed=args.seed),
+                            stocks, initial_prices=closes)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,114 @@
+"""
+매수 후보 일괄 선별 (NumPy)
+GENPORT 후보 전체를 구조화 배열 하나로 두고 보유 종목 제외, 매수/매도 기준가, 매수 수량,
+KRX 호가 단위 맞춤, 우선순위 순 선정을 배열 연산 한 번으로 계산한다.
+종목 정보 생성(stockinfo_generation_on_trading)은 조회한 전일종가를 표에 채운 뒤 선정된 행만 종목 정보로 옮긴다.
+
+호가 단위 (유가증권/코스닥 공통, 2023.01 개편):
+    2,000원 미만 1 / 5,000 미만 5 / 20,000 미만 10 / 50,000 미만 50 / 200,000 미만 100 / 500,000 미만 500 / 이상 1,000
+매수 기준가는 호가 단위로 내림, 매도 기준가는 올림한다. 체결가는 항상 호가 단위에 있으므로
+전략의 (현재가 <= 매수 기준가), (현재가 >= 매도 기준가) 판단은 맞추기 전과 같고, 기준가를 그대로 지정가로 쓸 수 있다.
+
+주요 기능:
+1. 호가 단위 계산/맞춤 (tick_size, floor_tick, ceil_tick)
+2. 후보 표 생성 (load_universe: CSV -> CANDIDATE_DTYPE, 보유 종목 제외)
+3. 기준가/수량 계산 및 선정 (screen)
+"""
+
+import numpy as np
+import pandas as pd
+
+TICK_BOUNDS = np.array([2000, 5000, 20000, 50000, 200000, 500000], dtype=np.int64)
+TICK_SIZES = np.array([1, 5, 10, 50, 100, 500, 1000], dtype=np.int64)
+
+CANDIDATE_DTYPE = np.dtype([
+    ('priority', 'U8'),      # GENPORT 우선순위 (CSV 값 그대로, 예: '01')
+    ('code', 'U12'),         # 종목코드
+    ('name', 'U64'),         # 종목명
+    ('prev_close', '<i8'),   # 전일종가 (-1: 미조회, 0: 조회 실패)
+    ('buy_price', '<i8'),    # 매수 기준가 (호가 단위 내림)
+    ('buy_qty', '<i8'),      # 매수 수량
+    ('sell_price', '<i8'),   # 매도 기준가 (호가 단위 올림)
+    ('selected', '?'),       # 매수 대상 선정 여부
+])
+
+
+def tick_size(price):
+    """
+    가격대별 호가 단위
+
+    Args:
+        price (int | ndarray): 가격
+
+    Returns:
+        int | ndarray: 호가 단위
+    """
+    return TICK_SIZES[np.searchsorted(TICK_BOUNDS, price, side='right')]
+
+
+def floor_tick(price):
+    """호가 단위로 내림 (가격대 경계는 아래 가격대 호가 단위의 배수이므로 가격대가 바뀌지 않음)"""
+    price = np.asarray(price, dtype=np.int64)
+    return price - price % tick_size(price)
+
+
+def ceil_tick(price):
+    """호가 단위로 올림 (경계를 넘으면 경계 가격, 경계 가격은 위 가격대에서도 유효)"""
+    price = np.asarray(price, dtype=np.int64)
+    tick = tick_size(price)
+    return -(-price // tick) * tick
+
+
+def load_universe(path, held_codes=()):
+    """
+    GENPORT 후보 CSV 를 후보 표로 변환 (보유 종목 제외, CSV 순서 유지)
+
+    Args:
+        path (str): 후보 CSV 경로 (priority, name, code 열)
+        held_codes (iterable): 보유 종목코드 (매수 후보에서 제외)
+
+    Returns:
+        ndarray: CANDIDATE_DTYPE 배열 (prev_close 는 -1)
+    """
+    df = pd.read_csv(path, dtype=str)
+    df = df[~df['code'].isin(list(held_codes))]
+    table = np.zeros(len(df), dtype=CANDIDATE_DTYPE)
+    table['priority'] = df['priority'].to_numpy()
+    table['code'] = df['code'].to_numpy()
+    table['name'] = df['name'].to_numpy()
+    table['prev_close'] = -1
+    return table
+
+
+def screen(table, buy_amount, buy_target_percent, sell_target_percent, num_tobuy):
+    """
+    기준가/수량 계산 및 매수 대상 선정 (표를 제자리에서 갱신)
+    전일종가를 조회한 행을 CSV 순서로 보면서 조회 실패(0)는 건너뛰고, 매수 수량이 1주 미만인 행이
+    나오면 그 뒤는 선정하지 않으며, num_tobuy 개까지 선정한다.
+
+    Args:
+        table (ndarray): CANDIDATE_DTYPE 배열 (조회한 앞부분만 넘겨도 됨)
+        buy_amount (int): 종목당 매수 금액
+        buy_target_percent (float): 매수 목표 (전일종가 대비, 예: -0.02)
+        sell_target_percent (float): 매도 목표 (매수 기준가 대비, 예: 0.08)
+        num_tobuy (int): 매수할 종목 수
+
+    Returns:
+        bool: 선정 확정 여부 (num_tobuy 개가 채워졌거나 1주 미만 행이 나와 뒤 행을 조회할 필요 없음)
+    """
+    close = table['prev_close']
+    valid = close > 0
+    buy_price = floor_tick(np.trunc(np.where(valid, close, 0) * (1 + float(buy_target_percent))).astype(np.int64))
+    buy_qty = np.where(buy_price > 0, int(buy_amount) // np.maximum(buy_price, 1), 0)
+    sell_price = ceil_tick(np.trunc(buy_price * (1 + float(sell_target_percent))).astype(np.int64))
+
+    stop = valid & (buy_qty < 1)
+    cut = int(np.argmax(stop)) if stop.any() else len(table)
+    eligible = valid & (np.arange(len(table)) < cut)
+    selected = eligible & (np.cumsum(eligible) <= num_tobuy)
+
+    table['buy_price'] = np.where(valid, buy_price, 0)
+    table['buy_qty'] = np.where(valid, buy_qty, 0)
+    table['sell_price'] = np.where(valid, sell_price, 0)
+    table['selected'] = selected
+    return bool(stop.any() or selected.sum() >= num_tobuy)
@@ -0,0 +1,139 @@
+"""
+장 운영 이벤트 스케줄러
+실시간 수신 루프에서 매 메시지마다 시각을 확인하던 방식 대신, 힙(heap) 기반 스케줄러가
+장 시작/청산/계좌 정보 갱신/종료 이벤트를 틱 유무와 관계없이 정확히 한 번씩 실행한다.
+
+주요 기능:
+1. 일회성 이벤트 등록 (at)
+2. 주기 이벤트 등록 (every) - 지연으로 놓친 회차는 한 번만 실행하고 다음 회차로 이동
+3. 폴링 실행 (run_pending) 및 백그라운드 스레드 실행 (start/stop)
+"""
+
+import heapq
+import datetime
+import itertools
+import threading
+import logging
+
+logger = logging.getLogger()
+
+
+class SessionScheduler:
+    """
+    힙 기반 이벤트 스케줄러
+
+    Attributes:
+        _clock (callable): 현재 시각 함수 (datetime 반환)
+        _heap (list): (실행 시각, 순번, 이름, 콜백, 주기, 종료 시각)
+        _lock (Lock): 힙 보호용 락
+        _wakeup (Event): 이벤트 추가/정지 시 대기 중인 스레드를 깨우는 이벤트
+        _thread (Thread): 백그라운드 실행 스레드
+    """
+    def __init__(self, clock=datetime.datetime.now):
+        self._clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def at(self, when, name, callback):
+        """
+        일회성 이벤트 등록 (이미 지난 시각이면 등록하지 않음)
+
+        Args:
+            when (datetime): 실행 시각
+            name (str): 이벤트 이름
+            callback (callable): 실행할 함수 (인자 없음)
+
+        Returns:
+            bool: 등록 여부
+        """
+        if when < self._clock():
+            return False
+        self._push(when, name, callback, None, None)
+        return True
+
+    def every(self, start, interval, name, callback, until=None):
+        """
+        주기 이벤트 등록 (start 이후 interval 간격, until 전까지)
+        이미 지난 회차는 건너뛰고 다음 회차부터 실행
+
+        Args:
+            start (datetime): 첫 회차 시각
+            interval (timedelta): 실행 간격
+            name (str): 이벤트 이름
+            callback (callable): 실행할 함수 (인자 없음)
+            until (datetime): 종료 시각 (이 시각 이후 회차는 실행하지 않음)
+        """
+        when = self._next_occurrence(start, interval, self._clock())
+        if until is None or when < until:
+            self._push(when, name, callback, interval, until)
+
+    def _push(self, when, name, callback, interval, until):
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._seq), name, callback, interval, until))
+        self._wakeup.set()
+
+    @staticmethod
+    def _next_occurrence(when, interval, now):
+        """now 이상인 가장 이른 회차 시각"""
+        if when >= now:
+            return when
+        missed = (now - when) // interval
+        when = when + missed * interval
+        return when if when >= now else when + interval
+
+    def next_due(self):
+        """다음 이벤트 실행 시각 (없으면 None)"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now=None):
+        """
+        실행 시각이 된 이벤트를 모두 실행 (각 회차는 정확히 한 번)
+
+        Args:
+            now (datetime): 기준 시각 (None 이면 clock)
+
+        Returns:
+            list: 실행한 이벤트 이름
+        """
+        now = now or self._clock()
+        fired = []
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                when, _, name, callback, interval, until = heapq.heappop(self._heap)
+                if interval is not None:
+                    next_when = self._next_occurrence(when + interval, interval, now)
+                    if until is None or next_when < until:
+                        heapq.heappush(self._heap, (next_when, next(self._seq), name, callback, interval, until))
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Scheduled event error [{name}]: {e}")
+            fired.append(name)
+        return fired
+
+    def start(self):
+        """백그라운드 스레드에서 스케줄러 실행"""
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='session-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """백그라운드 스레드 정지"""
+        self._stopped = True
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            next_when = self.next_due()
+            timeout = None if next_when is None else max(0.0, (next_when - self._clock()).total_seconds())
+            if self._wakeup.wait(timeout):
+                self._wakeup.clear()
+                continue
+            self.run_pending()
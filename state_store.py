@@ -0,0 +1,422 @@
+"""
+종목 상태 저장 모듈 (write-behind)
+매매 스레드는 변경된 종목 정보를 메모리에 표시만 하고, 백그라운드 스레드가 짧은 주기로 모아서 기록한다.
+
+주요 기능:
+1. 변경 표시 (put, record_transition, record_fill) - I/O 없음
+2. 주기적/종료 시 일괄 기록 (flush) - 같은 종목의 여러 변경은 마지막 값 한 번만 기록
+3. JSONStateStore: 종목별 JSON 파일 (임시 파일 + os.replace 로 원자적 교체)
+4. SQLiteStateStore: WAL 모드 SQLite (종목 정보 upsert, 상태 전이/체결 이력, 매매 중 조회 가능)
+"""
+
+import os
+import abc
+import json
+import sqlite3
+import datetime
+import atexit
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger()
+
+# 현재 프로세스에서 생성된 저장소 (종료 시 일괄 기록)
+_STORES = []
+
+
+def write_JSON_atomic(data, file_name, sort_key=True):
+    """
+    JSON 파일을 원자적으로 저장 (임시 파일에 쓴 뒤 교체)
+
+    Args:
+        data (dict): 저장할 데이터
+        file_name (str): 파일 경로
+        sort_key (bool): 키 정렬 여부
+    """
+    directory = os.path.dirname(file_name) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent="\t", sort_keys=sort_key)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_name)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBehindStore(abc.ABC):
+    """
+    종목 정보 write-behind 저장소 공통 부분
+    put 은 스냅샷만 메모리에 남기고, 백그라운드 스레드가 flush_interval 마다 모아서
+    _write_batch 로 기록한다. 실제 기록 방식은 하위 클래스가 구현한다.
+
+    Attributes:
+        _flush_interval (float): 기록 주기(초)
+        _dirty (dict): 아직 기록되지 않은 종목 정보 스냅샷 {code: dict}
+        _cache (dict): 마지막으로 저장 요청된 종목 정보 {code: dict}
+        _events (list): 아직 기록되지 않은 상태 전이/체결 이벤트
+    """
+    def __init__(self, flush_interval=0.5):
+        self._flush_interval = flush_interval
+        self._dirty = {}
+        self._cache = {}
+        self._events = []
+        self._pid = None
+        _STORES.append(self)
+
+    def _state(self):
+        """프로세스로 넘길 생성 인자 (락/스레드/연결 제외)"""
+        return {'flush_interval': self._flush_interval}
+
+    def __getstate__(self):
+        # 프로세스로 넘기기 전에 남은 변경을 기록하고, 락/스레드는 넘기지 않음
+        self.flush()
+        return self._state()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _ensure_started(self):
+        """현재 프로세스에서 기록 스레드가 돌고 있지 않으면 시작 (fork 이후 포함)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        if self not in _STORES:  # close 후 다시 사용
+            _STORES.append(self)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._open()
+        self._thread = threading.Thread(target=self._run, name='state-store', daemon=True)
+        self._thread.start()
+
+    def put(self, code, data):
+        """
+        종목 정보 변경 표시 (스냅샷만 저장, I/O 없음)
+
+        Args:
+            code (str): 종목코드
+            data (dict): 종목 정보
+        """
+        self._ensure_started()
+        snapshot = dict(data)
+        with self._lock:
+            self._dirty[code] = snapshot
+            self._cache[code] = snapshot
+
+    def pending(self):
+        """아직 기록되지 않은 종목 정보/이벤트 수"""
+        return len(self._dirty) + len(self._events)
+
+    def get(self, code):
+        """
+        종목 정보 조회 (기록 대기 중인 값이 있으면 그 값, 없으면 저장된 값)
+
+        Args:
+            code (str): 종목코드
+
+        Returns:
+            dict: 종목 정보
+        """
+        self._ensure_started()
+        with self._lock:
+            if code in self._cache:
+                return dict(self._cache[code])
+        with self._flush_lock:
+            return self._load(code)
+
+    def delete(self, code):
+        """
+        종목 정보 삭제 (기록 대기 중인 값 포함)
+
+        Args:
+            code (str): 종목코드
+        """
+        self._ensure_started()
+        with self._flush_lock:
+            with self._lock:
+                self._dirty.pop(code, None)
+                self._cache.pop(code, None)
+            self._remove(code)
+
+    def record_transition(self, code, from_state, to_state):
+        """
+        상태 전이 기록 요청 (I/O 없음)
+
+        Args:
+            code (str): 종목코드
+            from_state (str): 이전 상태
+            to_state (str): 새 상태
+        """
+        self._ensure_started()
+        with self._lock:
+            self._events.append(('transition', _now(), code, from_state, to_state))
+
+    def record_fill(self, code, side, qty, price, fill_time=None):
+        """
+        체결 기록 요청 (I/O 없음)
+
+        Args:
+            code (str): 종목코드
+            side (str): 'BUY' 또는 'SELL'
+            qty (int): 체결수량
+            price (int): 체결단가
+            fill_time (str): 체결시간 (HHMMSS)
+        """
+        self._ensure_started()
+        with self._lock:
+            self._events.append(('fill', _now(), code, side, int(qty), int(price), fill_time))
+
+    def flush(self):
+        """기록 대기 중인 종목 정보와 이벤트를 모두 기록"""
+        if self._pid != os.getpid():
+            return
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                events, self._events = self._events, []
+            if dirty or events:
+                self._write_batch(dirty, events)
+
+    def close(self):
+        """기록 스레드 정지 후 남은 변경 기록, 연결을 닫고 종료 시 일괄 기록 대상에서 제외"""
+        if self in _STORES:
+            _STORES.remove(self)
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._flush_lock:
+            self._close()
+        self._pid = None
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    # 하위 클래스 구현
+    def _open(self):
+        pass
+
+    def _close(self):
+        pass
+
+    @abc.abstractmethod
+    def _load(self, code):
+        """저장된 종목 정보 1건 읽기 (없으면 예외)"""
+
+    @abc.abstractmethod
+    def _remove(self, code):
+        """저장된 종목 정보 1건 삭제"""
+
+    @abc.abstractmethod
+    def _write_batch(self, dirty, events):
+        """모은 종목 정보 스냅샷 {code: dict} 와 이벤트 목록을 한 번에 기록"""
+
+
+class JSONStateStore(WriteBehindStore):
+    """
+    종목별 JSON 파일 저장소 (stocks/<code>.json)
+    상태 전이/체결 이벤트는 기록하지 않는다.
+
+    Attributes:
+        _directory (str): 종목 정보 저장 디렉토리
+    """
+    def __init__(self, directory, flush_interval=0.5):
+        self._directory = directory
+        super().__init__(flush_interval)
+
+    def _state(self):
+        return {'directory': self._directory, 'flush_interval': self._flush_interval}
+
+    def _path(self, code):
+        return os.path.join(self._directory, f'{code}.json')
+
+    def _load(self, code):
+        with open(self._path(code), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _remove(self, code):
+        try:
+            os.remove(self._path(code))
+        except FileNotFoundError:
+            pass
+
+    def _write_batch(self, dirty, events):
+        for code, data in dirty.items():
+            try:
+                write_JSON_atomic(data, self._path(code))
+            except Exception as e:
+                logger.error(f"State flush error [{code}]: {e}")
+
+
+class SQLiteStateStore(WriteBehindStore):
+    """
+    SQLite(WAL) 저장소
+    종목 정보(stock_info), 상태 전이(state_transitions), 체결(fills)을 한 파일에 기록한다.
+    WAL 모드이므로 매매 중에도 다른 프로세스에서 읽기 전용으로 조회할 수 있다.
+
+        sqlite3 "file:ID_ACCOUNT/<name>/state.db?mode=ro" "select code, state from stock_info"
+
+    Attributes:
+        _db_path (str): DB 파일 경로
+        _conn (Connection): 현재 프로세스의 DB 연결 (기록 스레드와 공유, _flush_lock 으로 보호)
+    """
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS stock_info (
+            code TEXT PRIMARY KEY,
+            state TEXT,
+            positions TEXT,
+            info TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS state_transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            code TEXT NOT NULL,
+            from_state TEXT,
+            to_state TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS fills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            code TEXT NOT NULL,
+            side TEXT NOT NULL,
+            qty INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            fill_time TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_transitions_code ON state_transitions (code)",
+        "CREATE INDEX IF NOT EXISTS idx_fills_code ON fills (code)",
+    )
+    UPSERT = (
+        "INSERT INTO stock_info (code, state, positions, info, updated_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(code) DO UPDATE SET state=excluded.state, positions=excluded.positions, "
+        "info=excluded.info, updated_at=excluded.updated_at"
+    )
+
+    def __init__(self, db_path, flush_interval=0.5):
+        self._db_path = db_path
+        super().__init__(flush_interval)
+
+    def _state(self):
+        return {'db_path': self._db_path, 'flush_interval': self._flush_interval}
+
+    def _open(self):
+        self._conn = self.connect(self._db_path)
+
+    def _close(self):
+        self._conn.close()
+        self._conn = None
+
+    @classmethod
+    def connect(cls, db_path):
+        """
+        WAL 모드 DB 연결 생성 (테이블이 없으면 생성)
+
+        Args:
+            db_path (str): DB 파일 경로
+
+        Returns:
+            Connection: sqlite3 연결
+        """
+        conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL 에서는 커밋 단위 원자성 유지
+        with conn:
+            for statement in cls.SCHEMA:
+                conn.execute(statement)
+        return conn
+
+    @staticmethod
+    def _row(code, data, ts):
+        return (code, data.get('state'), str(data.get('positions')),
+                json.dumps(data, ensure_ascii=False, sort_keys=True), ts)
+
+    def upsert(self, stock_infos):
+        """
+        여러 종목 정보를 한 트랜잭션으로 즉시 기록 (장 시작 전 초기화용)
+
+        Args:
+            stock_infos (dict): {종목코드: 종목 정보}
+        """
+        self._ensure_started()
+        ts = _now()
+        with self._flush_lock:
+            with self._conn:
+                self._conn.executemany(self.UPSERT, [self._row(code, data, ts) for code, data in stock_infos.items()])
+
+    def replace_all(self, stock_infos):
+        """
+        종목 정보 테이블을 주어진 종목으로 교체 (이력 테이블은 유지)
+
+        Args:
+            stock_infos (dict): {종목코드: 종목 정보}
+        """
+        self._ensure_started()
+        ts = _now()
+        with self._flush_lock:
+            with self._lock:
+                self._dirty.clear()
+                self._cache.clear()
+            with self._conn:
+                self._conn.execute("DELETE FROM stock_info")
+                self._conn.executemany(self.UPSERT, [self._row(code, data, ts) for code, data in stock_infos.items()])
+
+    def load_all(self):
+        """
+        저장된 전체 종목 정보 조회
+
+        Returns:
+            dict: {종목코드: 종목 정보}
+        """
+        self.flush()
+        self._ensure_started()
+        with self._flush_lock:
+            rows = self._conn.execute("SELECT code, info FROM stock_info ORDER BY code").fetchall()
+        return {code: json.loads(info) for code, info in rows}
+
+    def _load(self, code):
+        row = self._conn.execute("SELECT info FROM stock_info WHERE code = ?", (code,)).fetchone()
+        if row is None:
+            raise KeyError(code)
+        return json.loads(row[0])
+
+    def _remove(self, code):
+        with self._conn:
+            self._conn.execute("DELETE FROM stock_info WHERE code = ?", (code,))
+
+    def _write_batch(self, dirty, events):
+        ts = _now()
+        try:
+            with self._conn:
+                if dirty:
+                    self._conn.executemany(self.UPSERT, [self._row(code, data, ts) for code, data in dirty.items()])
+                transitions = [event[1:] for event in events if event[0] == 'transition']
+                if transitions:
+                    self._conn.executemany(
+                        "INSERT INTO state_transitions (ts, code, from_state, to_state) VALUES (?, ?, ?, ?)", transitions)
+                fills = [event[1:] for event in events if event[0] == 'fill']
+                if fills:
+                    self._conn.executemany(
+                        "INSERT INTO fills (ts, code, side, qty, price, fill_time) VALUES (?, ?, ?, ?, ?, ?)", fills)
+        except sqlite3.Error as e:
+            logger.error(f"State flush error: {e}")
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+@atexit.register
+def flush_stores():
+    """현재 프로세스의 모든 저장소의 남은 변경 기록 (프로세스 종료 시 자동 호출)"""
+    for store in list(_STORES):
+        store.flush()
@@ -14,7 +14,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 # from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-from tr_functions import get_access_TOKEN, get_approval, inquire_balance, inquire_psbl_order, inquire_price, inquire_daily_price, inquire_daily_itemchartprice
+from token_broker import TokenBroker
+from tr_functions import inquire_balance, inquire_psbl_order, inquire_price, inquire_daily_price, inquire_daily_itemchartprice
 from utility_asycio import import_CONFIG, read_JSON, write_JSON, Send_message, create_Folder, delete_Folder
 
 logger = logging.getLogger()
@@ -34,8 +35,7 @@ class StockInfo_to_Trade:
         self._t_trading_end = datetime.datetime.now().replace(hour=15, minute=41, second=0).strftime("%Y-%m-%d %H:%M:%S")
         self._t_liquidation = datetime.datetime.now().replace(hour=15, minute=25, second=0).strftime("%Y-%m-%d %H:%M:%S")
 
-        self._info['ACCESS_TOKEN'] = get_access_TOKEN(**self._info) # API 토큰 발급
-        self._info['APPROVAL_KEY'] = get_approval(**self._info) # 웹소켓 키 발급
+        TokenBroker(self._info).ensure() # API 토큰/웹소켓 키 (앱 키별 토큰 파일 공유)
         write_JSON(self._info, f'{self._directory}/info.json')
    
     def _get_stockinfo_ACCOUNT(self):
@@ -6,6 +6,9 @@
 1. 계좌 보유 종목 정보 생성
 2. 매수 대상 종목 정보 생성
 3. 종목별 거래 설정 (매수/매도 가격, 수량, 시간 등)
+4. 계좌/종목 조회 동시 실행 (앱 키별 속도 제한 안에서, 매수 대상이 num_tobuy 개 채워지면 조회 중단)
+5. 전일종가/2차 저항 조회는 계좌 공용 일별 캐시(price_cache) 우선 사용 (종가 0/빈 output 응답은 저장하지 않음)
+6. 매수 후보 기준가/수량/호가 단위/선정은 후보 표(screening.CANDIDATE_DTYPE) 전체를 한 번에 계산
 """
 
 import os
@@ -15,7 +18,7 @@ import math
 import time
 import logging
 import datetime
-import pandas as pd
+import concurrent.futures
 from pprint import pprint
 # from selenium import webdriver
 # from selenium.webdriver.support import expected_conditions as EC
@@ -23,11 +26,23 @@ from pprint import pprint
 # from selenium.webdriver.support.ui import WebDriverWait
 # from selenium.webdriver.chrome.service import Service as ChromeService
 # from webdriver_manager.chrome import ChromeDriverManager
-from tr_functions import get_access_TOKEN, get_approval, inquire_balance, inquire_psbl_order, inquire_price, inquire_daily_price, inquire_daily_itemchartprice
+from tr_functions import inquire_balance, inquire_psbl_order, inquire_price, inquire_daily_price, inquire_daily_itemchartprice
+from state_store import SQLiteStateStore
+from rate_limiter import get_rate_limiter
+from price_cache import get_price_cache
+import screening
+from token_broker import TokenBroker
 from utility_multiprocessing import import_CONFIG, read_JSON, write_JSON, Send_message, create_Folder, delete_Folder
 
 logger = logging.getLogger()
 
+FETCH_WORKERS = 4  # 계좌별 동시 조회 수 (tr_functions 커넥션 풀 크기, 초당 호출 수는 속도 제한기가 조절)
+
+
+def _has_output(response):
+    """현재가 응답에 output 이 있는지 (캐시 저장 검사)"""
+    return bool(response.get('output'))
+
 class StockInfo_to_Trade:
     """
     거래 종목 정보를 생성하고 관리하는 클래스
@@ -43,6 +58,8 @@ class StockInfo_to_Trade:
         _t_buy_start (str): 매수 시작 시간
         _t_trading_end (str): 거래 종료 시간
         _t_liquidation (str): 청산 시간
+        _price_cache (PriceCache): 계좌 공용 일별 시세 캐시 (ID_ACCOUNT/price_cache.db)
+        _candidates (ndarray): 조회한 매수 후보 표 (screening.CANDIDATE_DTYPE, _get_stockinfo_GENPORT 이후)
     """
     def __init__(self, info):
         self._info = info
@@ -50,6 +67,7 @@ class StockInfo_to_Trade:
         self._l = logger.getChild(self._info['CANO'])
         self._directory = os.path.join(self._PATH, "ID_ACCOUNT", self._info['NAME'])
         create_Folder(self._directory)
+        self._price_cache = get_price_cache(os.path.join(self._PATH, "ID_ACCOUNT", "price_cache.db"))
 
         # 거래 설정 초기화
         self._order_type = "market"
@@ -59,27 +77,68 @@ class StockInfo_to_Trade:
         self._t_trading_end = datetime.datetime.now().replace(hour=15, minute=41, second=0).strftime("%Y-%m-%d %H:%M:%S")
         self._t_liquidation = datetime.datetime.now().replace(hour=15, minute=25, second=0).strftime("%Y-%m-%d %H:%M:%S")
 
-        # API 토큰 발급 및 저장
-        if not self._info.get('ACCESS_TOKEN') or self._is_token_expired():
-            self._info['ACCESS_TOKEN'], self._info['ACCESS_TOKEN_TOKEN_EXPIRED'] = get_access_TOKEN(**self._info)  
-            self._info['APPROVAL_KEY'] = get_approval(**self._info) 
-            config_files_path = self._info.get('CONFIG_FILES_PATH')
-            config_file = self._info.get('CONFIG_FILE')
-            write_JSON(info, f'{config_files_path}/{config_file}')
-        else:
-            print("✅ 기존 토큰을 유지합니다.")
+        # API 토큰 (앱 키별 토큰 파일에 유효한 토큰이 있으면 재사용, 없거나 곧 만료되면 발급)
+        TokenBroker(self._info).ensure()
 
         print(self._info)
 
-    def _get_stockinfo_ACCOUNT(self):
+    def _fetch_daily(self, fn, code, key_params=None, validate=None, **kwargs):
+        """
+        거래일 동안 바뀌지 않는 시세 조회 (계좌 공용 캐시 우선, 없으면 API 호출 후 저장)
+        응답은 서버(모의/실전)와 장 시작 전/후에 따라 달라지므로 캐시 키에 포함한다.
+
+        Args:
+            fn (callable): tr_functions 조회 함수
+            code (str): 종목코드
+            key_params (dict): 캐시 키에 넣을 조회 조건 (호출 시각처럼 매번 바뀌는 인자는 제외)
+            validate (callable): 캐시에 저장해도 되는 응답인지 검사하는 함수 (PriceCache.put 참고)
+            **kwargs: 조회 함수에 넘길 나머지 인자
+
+        Returns:
+            dict: 응답 JSON
+        """
+        t_now = datetime.datetime.now()
+        phase = "pre_open" if t_now <= t_now.replace(hour=9, minute=0, second=0, microsecond=0) else "session"
+        params = dict(key_params or {}, URL_BASE=self._info['URL_BASE'], phase=phase)
+        return self._price_cache.fetch(fn.__name__, code, lambda: fn(**self._info, code=code, **kwargs).json(), params,
+                                       validate)
+
+    def _read_prev_close(self, stock, pre_open):
+        """
+        일봉 응답에서 전일종가 추출 (장 시작 전에는 당일 봉 대신 전일 봉의 종가)
+
+        Returns:
+            int: 전일종가
+        """
+        if pre_open:
+            if self._info['ACNT_TYPE'] == 'paper':
+                return int(stock.get('output1', {}).get('stck_clpr', 0))  # 모의투자
+            return int(stock['output2']['stck_clpr'])  # 실전투자
+        if self._info['ACNT_TYPE'] == 'paper':
+            return int(stock.get('output1', {}).get('stck_prdy_clpr', 0))  # 모의투자
+        return int(stock['output1']['stck_prdy_clpr'])  # 실전투자
+
+    def _valid_prev_close(self, stock, pre_open):
+        """일봉 응답의 전일종가가 0 이 아닌지 (캐시 저장 검사)"""
+        try:
+            return self._read_prev_close(stock, pre_open) > 0
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return False
+
+    def _get_stockinfo_ACCOUNT(self, balance_response=None):
         """
         계좌 보유 종목 정보 조회 및 생성
+        전일 매수 종목의 현재가(2차 저항) 조회는 동시에 실행한다.
         
+        Args:
+            balance_response (dict): 잔고 조회 응답 (None 이면 조회)
+            
         Returns:
             dict: 보유 종목 정보 딕셔너리
         """
         try:
-            balance_response = inquire_balance(**self._info).json()
+            if balance_response is None:
+                balance_response = inquire_balance(**self._info).json()
             
             # 모의투자와 실전투자 구분하여 데이터 처리
             if self._info['ACNT_TYPE'] == 'paper':
@@ -92,6 +151,13 @@ class StockInfo_to_Trade:
                 
             # print(self._stocks_account)
             data_account = {}
+
+            # 전일 매수 종목 현재가 동시 조회
+            with concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='price') as executor:
+                price_futures = {stock['pdno']: executor.submit(self._fetch_daily, inquire_price, stock['pdno'],
+                                                                validate=_has_output)
+                                 for stock in self._stocks_account
+                                 if int(stock['hldg_qty']) > 0 and int(stock['thdt_buyqty']) < 1}
                 
             # 보유 종목 정보 생성
             for idx in range(len(self._stocks_account)):
@@ -126,7 +192,7 @@ class StockInfo_to_Trade:
                     else: # 전일 매수한 경우
                         data_account[code]['bought_day'] = "YESTERDAY"
                         try:
-                            price_response = inquire_price(**self._info, code=code).json()
+                            price_response = price_futures[code].result()
                             if self._info['ACNT_TYPE'] == 'paper':
                                 data_account[code]['pvt_scnd_dmrs_prc'] = price_response.get('output', {}).get('pvt_scnd_dmrs_prc', 0)
                             else:
@@ -147,20 +213,48 @@ class StockInfo_to_Trade:
             self._l.error(f"계좌 정보 조회 중 오류 발생: {e}")
             return {}
 
-    def _get_stockinfo_GENPORT(self, genport_1to50_selected, num_tobuy):
+    def _get_prev_close(self, code, today, pre_open):
+        """
+        전일종가 조회 (일봉, 계좌 공용 캐시 우선)
+        
+        Args:
+            code (str): 종목코드
+            today (str): 조회 구간 (시작=끝)
+            pre_open (bool): 장 시작 전 여부 (장 시작 전에는 당일 봉 대신 전일 봉의 종가를 사용)
+            
+        Returns:
+            int: 전일종가 (조회 실패 시 0)
+        """
+        try:
+            stock = self._fetch_daily(inquire_daily_itemchartprice, code, key_params={"D_W_M": "D", "adj": "0"},
+                                      validate=lambda response: self._valid_prev_close(response, pre_open),
+                                      start=today, end=today, D_W_M="D", adj="0")
+            전일종가 = self._read_prev_close(stock, pre_open)
+            if 전일종가 == 0:
+                self._l.warning(f"전일종가를 가져올 수 없음: {code}")
+            return 전일종가
+        except Exception as e:
+            self._l.error(f"종목 정보 조회 중 오류 발생 ({code}): {e}")
+            return 0
+
+    def _get_stockinfo_GENPORT(self, candidates, num_tobuy, balance_response=None):
         """
         매수 대상 종목 정보 생성
+        일봉(전일종가) 조회는 우선순위 순서로 남은 매수 종목 수만큼씩 동시에 요청하고, 조회할 때마다
+        조회한 후보 전체의 기준가/수량/선정을 screening.screen 으로 한 번에 계산한다
+        (num_tobuy 개가 채워지거나 1주 미만 종목이 나오면 남은 후보는 조회하지 않음).
         
         Args:
-            genport_1to50_selected (list): 선정된 종목 리스트
+            candidates (ndarray): 보유 종목을 제외한 후보 표 (screening.CANDIDATE_DTYPE, 제자리에서 갱신)
             num_tobuy (int): 매수할 종목 수
+            balance_response (dict): 잔고 조회 응답 (None 이면 조회)
             
         Returns:
             dict: 매수 대상 종목 정보 딕셔너리
         """
         try:
-            time.sleep(1)
-            balance_response = inquire_balance(**self._info).json()
+            if balance_response is None:
+                balance_response = inquire_balance(**self._info).json()
             # print(balance_response)
             
             # 모의투자와 실전투자 구분
@@ -184,67 +278,45 @@ class StockInfo_to_Trade:
             t_market_closed = t_now.replace(hour=15, minute=40, second=00, microsecond=00)
 
             today = f"[{t_now.strftime('%H%M%S')}]"
-            stock_info = {}
             
-            # 선정된 종목에 대해 정보 생성
-            for name, code, priority in genport_1to50_selected:         
-                try:
-                    time.sleep(1)
-                    stock = inquire_daily_itemchartprice(**self._info, code=code, start=today, end=today, D_W_M="D", adj="0").json()
-                    # print(name, code, priority)
-                    # pprint(stock)
-                    
-                    # 전일종가 값을 가져옴
-                    if t_now <= t_market_open:
-                        if self._info['ACNT_TYPE'] == 'paper':
-                            전일종가 = stock.get('output1', {}).get('stck_clpr', 0)  # 모의투자
-                        else:
-                            전일종가 = stock['output2']['stck_clpr']  # 실전투자
-                    else:
-                        if self._info['ACNT_TYPE'] == 'paper':
-                            전일종가 = stock.get('output1', {}).get('stck_prdy_clpr', 0)  # 모의투자
-                        else:
-                            전일종가 = stock['output1']['stck_prdy_clpr']  # 실전투자
-                    
-                    if 전일종가 == 0:
-                        self._l.warning(f"전일종가를 가져올 수 없음: {code}")
-                        time.sleep(1)
-                        continue
-                    
-                    # print(전일종가, self._buy_target_percent, self._buy_amount)
-                    buy_price_ori = str(math.trunc(float(전일종가) * (1 + float(self._buy_target_percent))))
-                    buy_qty_ori = str(math.trunc(float(self._buy_amount) / float(buy_price_ori)))
-                    sell_price_ori = str(math.trunc(float(buy_price_ori) * (1 + float(self._sell_target_percent))))
-                    
-                    # print(buy_qty_ori, len(stock_info.keys()), num_tobuy)
-                    if int(buy_qty_ori) >= 1 and len(stock_info.keys()) < num_tobuy:
-                        stock_info[code] = {
-                            'name': name,
-                            'code': code,
-                            'priority': priority,
-                            'buy_amount': str(self._buy_amount),
-                            'buy_price_ori': buy_price_ori,
-                            'buy_price_modi': "0",
-                            'buy_qty_ori': buy_qty_ori,
-                            'buy_qty_modi': "0",
-                            'buy_qty_submitted': "0",
-                            'sell_price_ori': sell_price_ori,
-                            'sell_price_modi': "0",
-                            'bought_price_ave': "None",
-                            'bought_day': "None",
-                            'sell_target_percent': self._sell_target_percent,           
-                            'timepoint_trading_start': str(self._t_buy_start),
-                            'timepoint_trading_end': str(self._t_trading_end),
-                            'time_liquidation': "None",
-                            'order_type': self._order_type,
-                            'state': "TO_BUY"
-                        }
-                        Send_message(**self._info, msg=f'{priority}, {name} ({code}) 선택됨', timestamp='False')
-                    else:
+            # 우선순위 순서로 남은 매수 종목 수만큼씩 전일종가를 동시 조회하고, 조회한 앞부분 전체를 한 번에 선별
+            pre_open = t_now <= t_market_open
+            fetched = 0
+            with concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='chart') as executor:
+                while fetched < len(candidates):
+                    wave = candidates[fetched:fetched + max(num_tobuy - int(candidates['selected'][:fetched].sum()), 1)]
+                    wave['prev_close'] = list(executor.map(lambda code: self._get_prev_close(code, today, pre_open), wave['code']))
+                    fetched += len(wave)
+                    if screening.screen(candidates[:fetched], self._buy_amount, self._buy_target_percent,
+                                        self._sell_target_percent, num_tobuy):
                         break
-                except Exception as e:
-                    self._l.error(f"종목 정보 조회 중 오류 발생 ({code}): {e}")
-                    continue
+            self._candidates = candidates[:fetched]
+
+            stock_info = {}
+            for row in self._candidates[self._candidates['selected']]:
+                name, code, priority = str(row['name']), str(row['code']), str(row['priority'])
+                stock_info[code] = {
+                    'name': name,
+                    'code': code,
+                    'priority': priority,
+                    'buy_amount': str(self._buy_amount),
+                    'buy_price_ori': str(row['buy_price']),
+                    'buy_price_modi': "0",
+                    'buy_qty_ori': str(row['buy_qty']),
+                    'buy_qty_modi': "0",
+                    'buy_qty_submitted': "0",
+                    'sell_price_ori': str(row['sell_price']),
+                    'sell_price_modi': "0",
+                    'bought_price_ave': "None",
+                    'bought_day': "None",
+                    'sell_target_percent': self._sell_target_percent,           
+                    'timepoint_trading_start': str(self._t_buy_start),
+                    'timepoint_trading_end': str(self._t_trading_end),
+                    'time_liquidation': "None",
+                    'order_type': self._order_type,
+                    'state': "TO_BUY"
+                }
+                Send_message(**self._info, msg=f'{priority}, {name} ({code}) 선택됨', timestamp='False')
             
             write_JSON(stock_info, f'{self._directory}/stockinfo_GENPORT.json', sort_key=False)
             return stock_info
@@ -259,49 +331,49 @@ class StockInfo_to_Trade:
         - 보유 종목 정보 생성
         - 매수 대상 종목 정보 생성
         - 전체 종목 정보 통합 및 저장
+        (잔고 조회는 한 번만 하여 보유 종목/매수 대상 생성에 같이 사용)
+        
+        Returns:
+            float: 생성 소요 시간(초)
         """
-        self._stockinfo_tosell = self._get_stockinfo_ACCOUNT()
+        t_start = time.perf_counter()
+        try:
+            balance_response = inquire_balance(**self._info).json()
+        except Exception as e:
+            self._l.error(f"잔고 조회 중 오류 발생: {e}")
+            balance_response = None
+        self._stockinfo_tosell = self._get_stockinfo_ACCOUNT(balance_response)
         num_tobuy = 10 - len(self._stockinfo_tosell.keys())
 
-        genport_1to50 = pd.read_csv(f'./NEWSYSTOCK/stockinfo_GENPORT_1to50.csv', dtype=str)
-
-        genport_1to50_selected = []
-        for idx in range(len(genport_1to50)):
-            if genport_1to50.loc[idx]['code'] not in self._stockinfo_tosell.keys():
-                genport_1to50_selected.append([genport_1to50.loc[idx]['name'], genport_1to50.loc[idx]['code'], genport_1to50.loc[idx]['priority']])
-            else: pass
-
-        # print(genport_1to50_selected, num_tobuy)
+        candidates = screening.load_universe('./NEWSYSTOCK/stockinfo_GENPORT_1to50.csv', self._stockinfo_tosell.keys())
 
-        self._stockinfo_tobuy = self._get_stockinfo_GENPORT(genport_1to50_selected, num_tobuy)
+        self._stockinfo_tobuy = self._get_stockinfo_GENPORT(candidates, num_tobuy, balance_response)
         self._stockinfo_tobuy.update(self._stockinfo_tosell)
         write_JSON(self._stockinfo_tobuy, f'{self._directory}/stocksinfo_TOTAL.json')
-        MESSAGE = f'[Program Start] StockInfo regenerated(%s)' % (self._info['NAME'])
+        # 매매 전에도 DB 에서 조회할 수 있도록 상태 저장소에 기록
+        store = SQLiteStateStore(os.path.join(self._directory, "state.db"))
+        store.upsert(self._stockinfo_tobuy)
+        store.close()
+        elapsed = time.perf_counter() - t_start
+        MESSAGE = f'[Program Start] StockInfo regenerated(%s, %.1fs)' % (self._info['NAME'], elapsed)
         Send_message(**self._info, msg=MESSAGE)
+        return elapsed
         
-    def _is_token_expired(self):
-        """
-        API 토큰 만료 여부 확인
-        
-        Returns:
-            bool: 토큰 만료 여부
-        """
-        try:
-            token_expiry = self._info.get('ACCESS_TOKEN_TOKEN_EXPIRED')
-            if not token_expiry:
-                return True
-            if isinstance(token_expiry, str):
-                token_expiry = datetime.datetime.strptime(token_expiry, "%Y-%m-%d %H:%M:%S")
-            return token_expiry < datetime.datetime.now()
-        except Exception as e:
-            print(f"[Error] 토큰 만료 시간 확인 실패: {e}")
-            return True  # 예외 발생 시 새 토큰 요청
+def _generation_account(info):
+    """계좌 1개의 종목 정보 생성 (계좌별 스레드에서 실행)"""
+    MESSAGE = f'[%s]' % (info['NAME'])
+    Send_message(**info, msg=MESSAGE)
+    return StockInfo_to_Trade(info)._generation_stockinfo()
 
 def stockinfo_generation_on_trading():
     """
     거래 시작 전 종목 정보 생성 실행
     - CONFIG_FILES 디렉토리의 설정 파일들을 읽어서
-    - 각 계좌별로 종목 정보를 생성
+    - 모든 계좌의 종목 정보를 동시에 생성 (호출 수는 앱 키별 속도 제한기가 조절)
+    - 계좌별/전체 소요 시간 출력
+    
+    Returns:
+        dict: {계좌 이름: 생성 소요 시간(초)} (실패한 계좌는 None)
     """
     CONFIG_FILES_PATH = os.path.join(os.getcwd(), "CONFIG_FILES")
 
@@ -312,6 +384,8 @@ def stockinfo_generation_on_trading():
     if not config_files:
         print(f"📂 {CONFIG_FILES_PATH} 폴더에 JSON 파일이 없습니다.")
         return
+    t_start = time.perf_counter()
+    infos = []
     for config_file in config_files:
         if not config_file.endswith(".json"):
             print(f"⚠️ 스킵됨 (JSON 아님): {config_file}")
@@ -322,9 +396,26 @@ def stockinfo_generation_on_trading():
             info['CONFIG_FILE'] = config_file
         except Exception as e:
             print(f"❌ 오류 발생 ({config_file}): {e}")
-        MESSAGE = f'[%s]' % (info['NAME'])
-        Send_message(**info, msg=MESSAGE)
-        StockInfo_to_Trade(info)._generation_stockinfo()
+            continue
+        # 같은 앱 키를 쓰는 계좌가 하나의 제한기를 공유하도록 스레드 시작 전에 생성
+        get_rate_limiter(**info)
+        infos.append(info)
+
+    elapsed = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(infos), 1), thread_name_prefix='stockinfo') as executor:
+        futures = {info['NAME']: executor.submit(_generation_account, info) for info in infos}
+        for name, future in futures.items():
+            try:
+                elapsed[name] = future.result()
+            except Exception as e:
+                logger.error(f"[{name}] 종목 정보 생성 중 오류 발생: {e}")
+                elapsed[name] = None
+    cache = get_price_cache(os.path.join(os.getcwd(), "ID_ACCOUNT", "price_cache.db"))
+    print("✅ 종목 정보 생성 완료: 계좌 %d개, 총 %.1f초 (%s), 시세 캐시 적중 %d / 조회 %d" % (
+        len(infos), time.perf_counter() - t_start,
+        ", ".join("%s %s" % (name, "실패" if t is None else "%.1f초" % t) for name, t in elapsed.items()),
+        cache.hits, cache.misses))
+    return elapsed
 
 if __name__ == '__main__':
     stockinfo_generation_on_trading()
@@ -0,0 +1,298 @@
+"""
+웹소켓 구독 분할 관리
+KIS 는 세션(앱 키)당 실시간 등록 수를 약 41건으로 제한하므로, 필요한 등록(체결 통보 1건 + 종목당 3건)을
+세션별로 나누어 연결하고 여러 세션의 수신을 하나의 큐로 합친다.
+추가 세션은 계좌 설정의 EXTRA_APP_KEYS (앱 키/시크릿 목록)로 연결하며, 앱 키가 모자라
+구독하지 못한 종목은 로그와 Discord 로 알린다.
+
+설정 예 (CONFIG_FILES/*.json):
+    "EXTRA_APP_KEYS": [{"APP_KEY": "...", "APP_SECRET": "..."}, ...]
+
+주요 기능:
+1. 세션별 등록 계획 (plan_registrations, 종목의 TR 3건은 같은 세션에 배치)
+2. 세션 1개 연결 및 파이프라인 구독 (subscribe_session, 구독 중 도착한 프레임은 BufferedWebSocket 으로 전달)
+3. 여러 세션 수신 병합 (MergedWebSocket, recv/close 는 websocket 과 동일하게 사용)
+4. 분할 연결 (connect_sharded)
+5. 끊김 감지용 수신 제한 시간과 재연결 대기 시간 (RECV_TIMEOUT, backoff_delay)
+"""
+
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import collections
+import websocket
+
+from tr_functions import get_approval
+from discord_notifier import notify
+
+logger = logging.getLogger()
+
+MAX_REGISTRATIONS = 41                         # 세션당 실시간 등록 한도
+SUBSCRIBE_RATE = 20.0                          # 구독 요청 초당 전송 수 (버스트 초과분)
+SUBSCRIBE_BURST = MAX_REGISTRATIONS            # 대기 없이 연속 전송하는 구독 요청 수
+ACK_TIMEOUT = 5.0                              # 구독 응답 대기 시간(초)
+QUOTE_TRS = ("H0STASP0", "H0STCNT0", "H0STVI0")  # 종목별 구독 TR (호가, 체결, VI)
+NOTICE_TRS = ("K0STCNI0", "K0STCNI9", "H0STCNI0", "H0STCNI9")
+RECV_TIMEOUT = 90.0                            # 수신이 없으면 끊긴 연결로 보는 시간(초, PINGPONG 주기의 수 배)
+RECONNECT_DELAY = 1.0                          # 재연결 첫 대기 시간(초)
+RECONNECT_MAX_DELAY = 60.0                     # 재연결 최대 대기 시간(초)
+PAPER_URL_BASE = "https://openapivts.koreainvestment.com:29443"
+
+
+def notice_tr_id(info):
+    """계좌 종류별 체결 통보 TR (모의: H0STCNI9, 실전: H0STCNI0)"""
+    return 'H0STCNI9' if info['URL_BASE'] == PAPER_URL_BASE else 'H0STCNI0'
+
+
+def backoff_delay(attempt, base=RECONNECT_DELAY, cap=RECONNECT_MAX_DELAY):
+    """
+    재연결 대기 시간 (실패할 때마다 2배, 최대 cap, 여러 워커가 동시에 붙지 않도록 0.8~1배 무작위)
+
+    Args:
+        attempt (int): 연속 실패 횟수 (0부터)
+    """
+    return min(cap, base * 2 ** min(attempt, 32)) * random.uniform(0.8, 1.0)
+
+
+def plan_registrations(info, stock_infos, notice=True, quotes=True, max_per_session=MAX_REGISTRATIONS):
+    """
+    세션별 등록 목록 계산
+
+    Args:
+        info (dict): API 접속 정보
+        stock_infos (dict): 모니터링할 종목 정보
+        notice (bool): 체결 통보 구독 여부 (첫 번째 세션에 배치)
+        quotes (bool): 종목별 호가/체결/VI 구독 여부
+        max_per_session (int): 세션당 등록 한도
+
+    Returns:
+        list: 세션별 [(tr_id, tr_key), ...]
+    """
+    sessions = []
+    current = [(notice_tr_id(info), info['HTS_ID'])] if notice else []
+    for code in (stock_infos.keys() if quotes else ()):
+        registrations = [(tr_id, code) for tr_id in QUOTE_TRS]
+        if current and len(current) + len(registrations) > max_per_session:
+            sessions.append(current)
+            current = []
+        current.extend(registrations)
+    if current or not sessions:
+        sessions.append(current)
+    return sessions
+
+
+def session_credentials(info, count):
+    """
+    세션별 접속 키 (기본 앱 키 + EXTRA_APP_KEYS 순서, 최대 count 개)
+    추가 앱 키의 웹소켓 접속키는 처음 사용할 때 발급하여 설정 항목에 보관한다.
+
+    Returns:
+        list: [{'APP_KEY', 'APP_SECRET', 'APPROVAL_KEY'}, ...]
+    """
+    credentials = [{'APP_KEY': info['APP_KEY'], 'APP_SECRET': info.get('APP_SECRET'), 'APPROVAL_KEY': info['APPROVAL_KEY']}]
+    for extra in info.get('EXTRA_APP_KEYS') or ():
+        if len(credentials) >= count:
+            break
+        if not extra.get('APPROVAL_KEY'):
+            try:
+                extra['APPROVAL_KEY'] = get_approval(info['URL_BASE'], extra['APP_KEY'], extra['APP_SECRET'])
+            except Exception as e:
+                logger.error(f"[{info['NAME']}] 추가 앱 키 접속키 발급 실패 ({extra['APP_KEY'][:6]}...): {e}")
+                continue
+        credentials.append(extra)
+    return credentials[:count]
+
+
+def subscribe_session(info, approval_key, registrations, rate=SUBSCRIBE_RATE, burst=SUBSCRIBE_BURST,
+                      ack_timeout=ACK_TIMEOUT, recv_timeout=None):
+    """
+    웹소켓 1개 연결 후 등록 목록 구독 (파이프라인 방식)
+    - 구독 요청은 응답을 기다리지 않고 연속 전송 (burst 건 이후는 초당 rate 건)
+    - 응답은 (tr_id, tr_key)로 요청과 맞추어 처리
+    - 응답을 기다리는 동안 도착한 실시간 프레임은 버리지 않고 recv 로 먼저 전달
+    - 체결 통보 구독 응답도 recv 로 전달하여, 재연결 시 수신 처리기가 새 AES 키를 프레임 순서대로 반영
+
+    Args:
+        info (dict): API 접속 정보 (SOCKET_URL, NAME)
+        approval_key (str): 웹소켓 접속키
+        registrations (list): [(tr_id, tr_key), ...]
+        rate (float): 버스트 이후 초당 구독 요청 수
+        burst (int): 대기 없이 연속 전송하는 구독 요청 수
+        ack_timeout (float): 모든 구독 응답을 기다리는 최대 시간(초)
+        recv_timeout (float): 구독 후 recv 제한 시간(초, None 이면 무제한) - 초과 시 WebSocketTimeoutException
+
+    Returns:
+        tuple: (websocket 객체, AES 암호화 키, AES 초기화 벡터) - 체결 통보를 구독하지 않으면 키는 None
+    """
+    aes_key = aes_iv = None
+    ws = websocket.WebSocket()
+    ws.connect(info['SOCKET_URL'], ping_interval=60)  # 60초마다 ping 전송
+
+    # 구독 요청 연속 전송
+    pending = {}
+    t_start = time.monotonic()
+    for i, (tr_id, tr_key) in enumerate(registrations):
+        if i >= burst:
+            wait = t_start + (i - burst + 1) / rate - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        ws.send('{"header":{"approval_key": "%s","custtype":"P","tr_type":"%s","content-type":"utf-8"},"body":{"input":{"tr_id":"%s","tr_key":"%s"}}}' % (approval_key, '1', tr_id, tr_key))
+        pending[(tr_id, tr_key)] = True
+
+    # 구독 응답 처리 (먼저 도착한 실시간 프레임은 보관)
+    early = []
+    deadline = time.monotonic() + ack_timeout
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ws.settimeout(remaining)
+            data = ws.recv()
+            if data[0] == '0' or data[0] == '1':
+                early.append(data)
+                continue
+            jsonObject = json.loads(data)
+            header = jsonObject["header"]
+            trid = header["tr_id"]
+            if trid == "PINGPONG":
+                print("[%s] RECV [%s]" % (info['NAME'], trid))
+                continue
+            key = (trid, header.get("tr_key"))
+            if key not in pending:  # tr_key 가 없는 응답은 같은 TR 의 가장 오래된 요청과 맞춤
+                key = next((k for k in pending if k[0] == trid), key)
+            pending.pop(key, None)
+            rt_cd = jsonObject["body"]["rt_cd"]
+            if rt_cd == '1':    # 에러 응답 처리
+                print("[%s] ERROR RETURN CODE [%s] TR [%s/%s] MSG [%s]" % (info['NAME'], rt_cd, key[0], key[1], jsonObject["body"]["msg1"]))
+            elif rt_cd == '0':  # 정상 응답 처리
+                # 웹소켓 연결 키 발급 TR인 경우 (응답 출력은 수신 처리기가 담당)
+                if trid in NOTICE_TRS:
+                    aes_key = jsonObject["body"]["output"]["key"]    # AES 암호화 키
+                    aes_iv = jsonObject["body"]["output"]["iv"]      # AES 초기화 벡터
+                    early.append(data)
+                else:
+                    print("[%s] RETURN CODE [%s] MSG [%s]" % (info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
+    except websocket.WebSocketTimeoutException:
+        pass
+    finally:
+        ws.settimeout(recv_timeout)
+    if pending:
+        logger.error(f"[{info['NAME']}] 구독 응답 없음 ({len(pending)}건): " + ", ".join("%s/%s" % k for k in pending))
+    if early:
+        return BufferedWebSocket(ws, early), aes_key, aes_iv
+    return ws, aes_key, aes_iv
+
+
+class BufferedWebSocket:
+    """
+    구독 응답을 기다리는 동안 먼저 도착한 실시간 프레임을 recv 로 먼저 돌려주는 웹소켓
+    보관한 프레임을 모두 돌려준 뒤에는 recv 가 원래 websocket 의 recv 로 바뀐다.
+    """
+    def __init__(self, ws, frames):
+        self._ws = ws
+        self._frames = collections.deque(frames)
+
+    def recv(self):
+        if self._frames:
+            data = self._frames.popleft()
+            if not self._frames:
+                self.recv = self._ws.recv
+            return data
+        return self._ws.recv()
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
+
+
+class MergedWebSocket:
+    """
+    여러 웹소켓 세션의 수신을 하나의 큐로 합친 연결
+    세션마다 수신 스레드가 프레임을 큐에 넣고, recv 는 큐에서 꺼낸다 (websocket.WebSocket 대신 사용).
+
+    Attributes:
+        _sockets (list): 세션별 websocket 객체
+        _queue (Queue): 병합 수신 큐 (프레임 또는 수신 스레드의 예외)
+    """
+    def __init__(self, sockets, maxsize=100000):
+        self._sockets = sockets
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+        self._threads = [threading.Thread(target=self._Read, args=(ws,), name=f'ws-session-{i}', daemon=True)
+                         for i, ws in enumerate(sockets)]
+        for thread in self._threads:
+            thread.start()
+
+    def _Read(self, ws):
+        while not self._closed:
+            try:
+                data = ws.recv()
+            except Exception as e:
+                if not self._closed:
+                    self._queue.put(e)
+                return
+            self._queue.put(data)
+
+    def recv(self):
+        """다음 수신 프레임 (세션 중 하나라도 끊기면 그 예외를 발생)"""
+        data = self._queue.get()
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    def send(self, data):
+        """첫 번째 세션(체결 통보 세션)으로 전송"""
+        return self._sockets[0].send(data)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._closed = True
+        for ws in self._sockets:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        try:
+            self._queue.put_nowait(ConnectionError("websocket closed"))
+        except queue.Full:
+            pass
+
+
+def connect_sharded(info, stock_infos, notice=True, quotes=True, max_per_session=MAX_REGISTRATIONS, recv_timeout=None):
+    """
+    필요한 등록 수만큼 세션을 나누어 연결
+    앱 키가 모자라 연결하지 못한 세션의 종목은 로그와 Discord 로 알린다.
+
+    Args:
+        info (dict): API 접속 정보 (APPROVAL_KEY, SOCKET_URL, HTS_ID, EXTRA_APP_KEYS 등)
+        stock_infos (dict): 모니터링할 종목 정보
+        notice (bool): 체결 통보 구독 여부
+        quotes (bool): 종목별 호가/체결/VI 구독 여부
+        max_per_session (int): 세션당 등록 한도
+        recv_timeout (float): 세션별 recv 제한 시간(초, None 이면 무제한)
+
+    Returns:
+        tuple: (websocket 또는 MergedWebSocket, AES 암호화 키, AES 초기화 벡터)
+    """
+    plan = plan_registrations(info, stock_infos, notice, quotes, max_per_session)
+    credentials = session_credentials(info, len(plan))
+    if len(plan) > len(credentials):
+        missing = sorted({tr_key for registrations in plan[len(credentials):] for _, tr_key in registrations})
+        message = (f"[{info['NAME']}] 실시간 등록 한도 초과: {len(missing)}개 종목 미구독 "
+                   f"(세션 {len(plan)}개 필요, 앱 키 {len(credentials)}개) - EXTRA_APP_KEYS 추가 필요: {', '.join(missing)}")
+        logger.error(message)
+        notify(info.get('DISCORD_WEBHOOK_URL'), message)
+        plan = plan[:len(credentials)]
+
+    sessions = [subscribe_session(info, credential['APPROVAL_KEY'], registrations, recv_timeout=recv_timeout)
+                for credential, registrations in zip(credentials, plan)]
+    ws, aes_key, aes_iv = sessions[0]
+    if len(sessions) == 1:
+        return ws, aes_key, aes_iv
+    logger.info(f"[{info['NAME']}] 실시간 구독 세션 {len(sessions)}개: " + ", ".join(str(len(r)) for r in plan))
+    return MergedWebSocket([session[0] for session in sessions]), aes_key, aes_iv
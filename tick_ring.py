@@ -0,0 +1,199 @@
+"""
+공유 메모리 틱 링 버퍼 (생산자 1, 소비자 N)
+시세 허브 프로세스가 파싱한 틱을 고정 크기 슬롯에 기록하고, 계좌 워커들이 각자의 커서로 읽는다.
+생산자는 소비자를 기다리지 않으므로 느린 소비자는 링이 한 바퀴 돌면 밀린 틱을 건너뛰고 dropped 로 센다.
+
+메모리 구조:
+    헤더 (64 bytes): 게시된 틱 수(head), 슬롯 수
+    슬롯 (256 bytes): 일련번호, 수신 시각(perf_counter_ns), TR_ID, 종목코드, 값 개수, 원문 길이, int 값 4개, 원문 184 bytes
+
+슬롯 기록 순서 (seqlock 방식):
+    일련번호 0 기록 -> 본문 기록 -> 일련번호 기록 -> head 증가
+    소비자는 본문 전후의 일련번호가 같고 기대값일 때만 읽은 값을 사용한다.
+
+주요 기능:
+1. 링 생성/연결 (TickRing.create, TickRing.attach)
+2. 틱 게시 (publish)
+3. 소비자별 커서로 새 틱 읽기 (TickReader.poll)
+"""
+
+import os
+import sys
+import struct
+from multiprocessing import shared_memory
+
+HEADER = struct.Struct('<QQ')                 # head, capacity
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<QQ8s8sHH4x4q')  # seq, recv_ns, tr_id, code, n_values, raw_len, values
+SLOT_SIZE = 256
+RAW_SIZE = SLOT_SIZE - SLOT_HEADER.size
+MAX_VALUES = 4
+_SEQ = struct.Struct('<Q')
+_ZERO_VALUES = (0,) * MAX_VALUES
+
+
+def attach_shared_memory(name, track=True):
+    """
+    다른 프로세스가 만든 공유 메모리에 연결
+    허브/워커는 메인 프로세스의 자식이라 resource_tracker 를 공유하므로 삭제(unlink)는 생성한 쪽만 한다.
+
+    Args:
+        name (str): 공유 메모리 이름
+        track (bool): False 면 resource_tracker 에서 제외
+            (관련 없는 프로세스(대시보드 등)가 종료할 때 메모리를 지우지 않도록)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if not track and os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class TickRing:
+    """
+    공유 메모리 틱 링
+
+    Attributes:
+        name (str): 공유 메모리 이름 (다른 프로세스에서 attach 할 때 사용)
+        capacity (int): 슬롯 수
+        _shm (SharedMemory): 공유 메모리
+        _head (int): 생산자가 게시한 틱 수 (생산자 프로세스 기준)
+    """
+    def __init__(self, shm, capacity, owner=False):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.capacity = capacity
+        self._owner = owner
+        self._head = HEADER.unpack_from(self._buf, 0)[0]
+
+    @classmethod
+    def create(cls, capacity=16384, name=None):
+        """
+        링 생성 (메인 프로세스에서 한 번 호출)
+
+        Args:
+            capacity (int): 슬롯 수 (기본 16384 = 4MB)
+            name (str): 공유 메모리 이름 (None 이면 자동)
+
+        Returns:
+            TickRing: 생성한 링 (unlink 책임을 가짐)
+        """
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity * SLOT_SIZE)
+        shm.buf[:HEADER_SIZE + capacity * SLOT_SIZE] = bytes(HEADER_SIZE + capacity * SLOT_SIZE)
+        HEADER.pack_into(shm.buf, 0, 0, capacity)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """이미 생성된 링에 연결 (허브/워커 프로세스에서 호출)"""
+        shm = attach_shared_memory(name)
+        capacity = HEADER.unpack_from(shm.buf, 0)[1]
+        return cls(shm, capacity)
+
+    def head(self):
+        """게시된 틱 수"""
+        return _SEQ.unpack_from(self._buf, 0)[0]
+
+    def publish(self, recv_ns, tr_id, code, values=(), raw=b''):
+        """
+        틱 1건 게시 (생산자 전용)
+
+        Args:
+            recv_ns (int): 프레임 수신 시각 (perf_counter_ns)
+            tr_id (str): TR ID
+            code (str): 종목코드
+            values (tuple): 파싱한 int 값 (최대 4개)
+            raw (bytes): 파싱하지 않은 TR 의 레코드 원문 ('^' 구분, 184 bytes 초과분은 잘림)
+        """
+        seq = self._head + 1
+        offset = HEADER_SIZE + (self._head % self.capacity) * SLOT_SIZE
+        buf = self._buf
+        _SEQ.pack_into(buf, offset, 0)
+        n_values = len(values)
+        raw = raw[:RAW_SIZE]
+        SLOT_HEADER.pack_into(buf, offset, 0, recv_ns, tr_id.encode(), code.encode(), n_values, len(raw),
+                              *(tuple(values) + _ZERO_VALUES)[:MAX_VALUES])
+        if raw:
+            start = offset + SLOT_HEADER.size
+            buf[start:start + len(raw)] = raw
+        _SEQ.pack_into(buf, offset, seq)
+        _SEQ.pack_into(buf, 0, seq)
+        self._head = seq
+
+    def reader(self, from_start=False):
+        """
+        소비자 생성
+
+        Args:
+            from_start (bool): True 면 링에 남아 있는 가장 오래된 틱부터, False 면 이후 게시되는 틱부터 읽음
+        """
+        head = self.head()
+        return TickReader(self, max(0, head - self.capacity) if from_start else head)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        """공유 메모리 삭제 (생성한 프로세스에서 종료 시 호출)"""
+        if self._owner:
+            self._shm.unlink()
+
+
+class TickReader:
+    """
+    링 소비자 (워커마다 하나)
+
+    Attributes:
+        cursor (int): 다음에 읽을 틱 번호
+        dropped (int): 링이 한 바퀴 돌아 건너뛴 틱 수
+    """
+    def __init__(self, ring, cursor):
+        self._ring = ring
+        self.cursor = cursor
+        self.dropped = 0
+
+    def poll(self, max_items=4096):
+        """
+        새로 게시된 틱 읽기
+
+        Args:
+            max_items (int): 한 번에 읽을 최대 틱 수
+
+        Returns:
+            list: [(recv_ns, tr_id, code, values, raw), ...] - raw 는 원문이 없으면 None
+        """
+        ring = self._ring
+        buf = ring._buf
+        capacity = ring.capacity
+        head = _SEQ.unpack_from(buf, 0)[0]
+        cursor = self.cursor
+        if head - cursor > capacity:
+            self.dropped += head - capacity - cursor
+            cursor = head - capacity
+        end = min(head, cursor + max_items)
+        ticks = []
+        unpack_slot = SLOT_HEADER.unpack_from
+        unpack_seq = _SEQ.unpack_from
+        while cursor < end:
+            offset = HEADER_SIZE + (cursor % capacity) * SLOT_SIZE
+            seq, recv_ns, tr_id, code, n_values, raw_len, *values = unpack_slot(buf, offset)
+            raw = None
+            if raw_len:
+                start = offset + SLOT_HEADER.size
+                raw = bytes(buf[start:start + raw_len]).decode('utf-8', 'replace')
+            if seq != cursor + 1 or unpack_seq(buf, offset)[0] != seq:
+                # 읽는 중에 생산자가 이 슬롯을 덮어씀 (한 바퀴 밀림): 최신 위치로 이동
+                head = unpack_seq(buf, 0)[0]
+                skip_to = max(cursor + 1, head - capacity + 1)
+                self.dropped += skip_to - cursor
+                cursor = skip_to
+                end = min(head, cursor + max_items)
+                continue
+            ticks.append((recv_ns, tr_id.rstrip(b'\0').decode(), code.rstrip(b'\0').decode(), tuple(values[:n_values]), raw))
+            cursor += 1
+        self.cursor = cursor
+        return ticks
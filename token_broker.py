@@ -0,0 +1,181 @@
+"""
+접근 토큰/웹소켓 접속키 공유 모듈
+앱 키별로 발급받은 토큰을 만료 시각과 함께 파일(ID_ACCOUNT/tokens/)에 보관하고, 같은 앱 키를 쓰는
+프로세스(종목 정보 생성, 계좌 워커, 시세 허브)가 파일 잠금으로 조율하여 한 번만 발급받는다.
+각 프로세스의 백그라운드 스레드가 만료 전에 미리 갱신하여 info 딕셔너리를 제자리에서 바꾸므로,
+TR 호출(**info)은 토큰 발급을 기다리거나 만료된 토큰으로 실패하지 않는다.
+
+KIS 제약:
+    접근 토큰: 24시간 유효, 발급은 1분에 1회 (같은 앱 키로 다시 발급하면 이전 토큰은 갱신됨)
+    웹소켓 접속키: 24시간 유효
+
+주요 기능:
+1. 파일 캐시 + 프로세스 간 잠금 (TokenBroker.ensure)
+2. 만료 refresh_ahead 전 백그라운드 갱신 (start/stop)
+3. 웹소켓 접속키 강제 재발급 (refresh_approval)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import datetime
+import threading
+
+from tr_functions import get_access_TOKEN, get_approval
+from state_store import write_JSON_atomic
+from metrics import METRICS
+import clock
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger()
+
+TOKEN_DIR = os.path.join("ID_ACCOUNT", "tokens")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+APPROVAL_LIFETIME = datetime.timedelta(hours=24)
+REFRESH_AHEAD = datetime.timedelta(hours=1)   # 만료 몇 시간 전에 갱신할지
+CHECK_INTERVAL = 60.0                         # 백그라운드 확인 주기(초, 다른 프로세스가 갱신한 파일 반영)
+RETRY_INTERVAL = 65.0                         # 발급 실패 시 재시도 간격(초, 토큰 발급 1분 1회 제한)
+
+
+class _FileLock:
+    """프로세스 간 배타 잠금 (posix: flock, Windows: msvcrt.locking)"""
+    def __init__(self, path):
+        self._path = path
+
+    def __enter__(self):
+        self._file = open(self._path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK 은 10초 후 실패하므로 계속 시도
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+
+
+class TokenBroker:
+    """
+    앱 키별 토큰 공유/갱신
+
+    Attributes:
+        _info (dict): API 접속 정보 (ACCESS_TOKEN, ACCESS_TOKEN_TOKEN_EXPIRED, APPROVAL_KEY 를 제자리에서 갱신)
+        _path (str): 토큰 파일 경로 (ID_ACCOUNT/tokens/<URL_BASE+APP_KEY 해시>.json)
+        _refresh_ahead (timedelta): 만료 전 갱신 여유
+        _thread (Thread): 백그라운드 갱신 스레드 (start 이후)
+    """
+    def __init__(self, info, token_dir=TOKEN_DIR, refresh_ahead=REFRESH_AHEAD):
+        self._info = info
+        self._refresh_ahead = refresh_ahead
+        os.makedirs(token_dir, exist_ok=True)
+        digest = hashlib.sha256(f"{info['URL_BASE']}|{info['APP_KEY']}".encode()).hexdigest()[:16]
+        self._path = os.path.join(token_dir, f"{digest}.json")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _due(self, tokens):
+        """
+        갱신이 필요한 항목
+
+        Returns:
+            tuple: (접근 토큰 갱신 여부, 접속키 갱신 여부)
+        """
+        limit = clock.now() + self._refresh_ahead
+        try:
+            token_due = (not tokens.get('ACCESS_TOKEN')
+                         or datetime.datetime.strptime(tokens['ACCESS_TOKEN_TOKEN_EXPIRED'], TIME_FORMAT) <= limit)
+        except (KeyError, TypeError, ValueError):
+            token_due = True
+        try:
+            approval_due = (not tokens.get('APPROVAL_KEY')
+                            or datetime.datetime.strptime(tokens['APPROVAL_KEY_ISSUED'], TIME_FORMAT) + APPROVAL_LIFETIME <= limit)
+        except (KeyError, TypeError, ValueError):
+            approval_due = True
+        return token_due, approval_due
+
+    def _read(self):
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def ensure(self, force_approval=False):
+        """
+        유효한 토큰을 info 에 반영 (파일에 유효한 토큰이 있으면 사용, 없거나 곧 만료되면 발급 후 저장)
+        잠금 안에서 파일을 다시 읽으므로 같은 앱 키의 다른 프로세스가 먼저 발급했으면 그 토큰을 사용한다.
+
+        Args:
+            force_approval (bool): 웹소켓 접속키 강제 재발급 (재연결이 계속 실패할 때)
+
+        Returns:
+            dict: info
+        """
+        with self._lock:
+            tokens = self._read()
+            token_due, approval_due = self._due(tokens)
+            if token_due or approval_due or force_approval:
+                with _FileLock(self._path + '.lock'):
+                    tokens = self._read()
+                    token_due, approval_due = self._due(tokens)
+                    # 항목마다 발급 직후 저장 (다음 항목 발급이 실패해도 발급받은 토큰은 유지)
+                    if token_due:
+                        tokens['ACCESS_TOKEN'], tokens['ACCESS_TOKEN_TOKEN_EXPIRED'] = get_access_TOKEN(**self._info)
+                        write_JSON_atomic(tokens, self._path)
+                        METRICS.inc('kis_token_refresh_total', (('kind', 'access_token'),))
+                        logger.info(f"[{self._info['NAME']}] 접근 토큰 발급 (만료 {tokens['ACCESS_TOKEN_TOKEN_EXPIRED']})")
+                    if approval_due or force_approval:
+                        tokens['APPROVAL_KEY'] = get_approval(**self._info)
+                        tokens['APPROVAL_KEY_ISSUED'] = clock.now().strftime(TIME_FORMAT)
+                        write_JSON_atomic(tokens, self._path)
+                        METRICS.inc('kis_token_refresh_total', (('kind', 'approval_key'),))
+                        logger.info(f"[{self._info['NAME']}] 웹소켓 접속키 발급")
+            self._info.update(ACCESS_TOKEN=tokens['ACCESS_TOKEN'],
+                              ACCESS_TOKEN_TOKEN_EXPIRED=tokens['ACCESS_TOKEN_TOKEN_EXPIRED'],
+                              APPROVAL_KEY=tokens['APPROVAL_KEY'])
+        return self._info
+
+    def refresh_approval(self):
+        """웹소켓 접속키 재발급 후 info 반영"""
+        return self.ensure(force_approval=True)
+
+    def start(self):
+        """백그라운드 갱신 스레드 시작 (프로세스 안에서 호출, 이미 실행 중이면 그대로 사용)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._Run, name='token-broker', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _Run(self):
+        wait = CHECK_INTERVAL
+        while not self._stop.wait(wait):
+            try:
+                self.ensure()
+                wait = CHECK_INTERVAL
+            except Exception as e:
+                logger.error(f"[{self._info['NAME']}] 토큰 갱신 실패: {e} - {RETRY_INTERVAL:.0f}초 후 재시도")
+                wait = RETRY_INTERVAL
@@ -5,14 +5,86 @@ import Crypto
 import sys
 sys.modules['Crypto'] = Crypto
 from Crypto.Cipher import AES
-from Crypto.Util.Padding import unpad
-from base64 import b64decode
+from Crypto.Util.Padding import pad, unpad
+from base64 import b64decode, b64encode
 import requests
 import json
 import datetime
 import os
 import time
 from pprint import pprint
+from requests.adapters import HTTPAdapter
+from rate_limiter import get_rate_limiter, PRIORITY_ORDER, PRIORITY_QUERY
+from latency_histogram import LATENCY
+from metrics import METRICS, PRIORITY_NAMES
+
+###############################################################
+#### ------------------- [ HTTP Session ] -----------------####
+###############################################################
+
+# (pid, URL_BASE, APP_KEY) 별 keep-alive 세션
+# 프로세스 fork 후 소켓이 공유되지 않도록 pid를 키에 포함
+_SESSIONS = {}
+
+def get_session(URL_BASE, APP_KEY=None, **arg):
+    """
+    계좌(APP_KEY)별 커넥션 풀 세션 반환
+    - 최초 호출 시 세션 생성, 이후 동일 세션 재사용 (TCP+TLS 핸드셰이크 생략)
+
+    Args:
+        URL_BASE (str): API 기본 URL
+        APP_KEY (str): API 앱 키
+
+    Returns:
+        requests.Session: keep-alive 세션
+    """
+    key = (os.getpid(), URL_BASE, APP_KEY)
+    session = _SESSIONS.get(key)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSIONS[key] = session
+    return session
+
+def warmup_session(URL_BASE, APP_KEY=None, **arg):
+    """
+    커넥션 풀 예열 (매수 시작 전 핸드셰이크를 미리 수행)
+
+    Args:
+        URL_BASE (str): API 기본 URL
+        APP_KEY (str): API 앱 키
+
+    Returns:
+        requests.Session: 예열된 세션
+    """
+    session = get_session(URL_BASE, APP_KEY)
+    try:
+        session.head(URL_BASE, timeout=5)
+    except requests.RequestException as e:
+        print(f"세션 예열 중 오류 발생: {e}")
+    return session
+
+def close_sessions():
+    """현재 프로세스의 모든 세션 종료"""
+    pid = os.getpid()
+    for key in [key for key in _SESSIONS if key[0] == pid]:
+        _SESSIONS.pop(key).close()
+
+def _request(method, URL_BASE, APP_KEY, URL, priority=PRIORITY_QUERY, **kwargs):
+    """앱 키별 속도 제한을 거쳐 계좌별 세션으로 REST 요청 전송"""
+    waited = get_rate_limiter(URL_BASE, APP_KEY).acquire(priority)
+    if priority == PRIORITY_ORDER:
+        LATENCY.record('rate_wait', int(waited * 1e9))
+    METRICS.observe('kis_rate_limit_wait_seconds', (('priority', PRIORITY_NAMES.get(priority, priority)),), waited)
+    labels = (('tr_id', (kwargs.get('headers') or {}).get('tr_id') or URL.rsplit('/', 1)[-1]),)
+    t0 = time.perf_counter()
+    try:
+        return get_session(URL_BASE, APP_KEY).request(method, URL, **kwargs)
+    finally:
+        METRICS.inc('kis_rest_requests_total', labels)
+        METRICS.observe('kis_rest_latency_seconds', labels, time.perf_counter() - t0)
 
 ###############################################################
 #### ------------------- [ TR Fucnctions ] ----------------####
@@ -30,7 +102,7 @@ def get_access_TOKEN(URL_BASE, APP_KEY, APP_SECRET, **arg):
     PATH = "oauth2/tokenP"
     URL = f"{URL_BASE}/{PATH}"
 
-    res = requests.post(URL, headers=headers, data=json.dumps(body))
+    res = _request("POST", URL_BASE, APP_KEY, URL, headers=headers, data=json.dumps(body))
     ACCESS_TOKEN = res.json()["access_token"]
     ACCESS_TOKEN_TOKEN_EXPIRED = res.json()["access_token_token_expired"]
     return ACCESS_TOKEN, ACCESS_TOKEN_TOKEN_EXPIRED
@@ -42,11 +114,11 @@ def get_approval(URL_BASE, APP_KEY, APP_SECRET, **arg):
             "secretkey": APP_SECRET}
     PATH = "oauth2/Approval"
     URL = f"{URL_BASE}/{PATH}"
-    res = requests.post(URL, headers=headers, data=json.dumps(body))
+    res = _request("POST", URL_BASE, APP_KEY, URL, headers=headers, data=json.dumps(body))
     APPROVAL_KEY = res.json()["approval_key"]
     return APPROVAL_KEY
 
-def inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, **arg):
+def inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_QUERY, **arg):
     PATH = "uapi/domestic-stock/v1/trading/inquire-psbl-order"
     URL = f"{URL_BASE}/{PATH}"
 
@@ -80,10 +152,10 @@ def inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_P
         "CMA_EVLU_AMT_ICLD_YN": "Y",
         "OVRS_ICLD_YN": "Y"
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res
 
-def inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, **arg):
+def inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_QUERY, **arg):
     PATH = "uapi/domestic-stock/v1/trading/inquire-balance"
     URL = f"{URL_BASE}/{PATH}"
 
@@ -120,10 +192,10 @@ def inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT
         "CTX_AREA_FK100": "",
         "CTX_AREA_NK100": ""
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res
 
-def inquire_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", **arg):
+def inquire_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", priority=PRIORITY_QUERY, **arg):
     """현재가 조회"""
     PATH = "uapi/domestic-stock/v1/quotations/inquire-price"
     URL = f"{URL_BASE}/{PATH}"
@@ -138,10 +210,10 @@ def inquire_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", **
         "fid_cond_mrkt_div_code":"J",
         "fid_input_iscd":str(code),
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res
 
-def inquire_daily_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", start="20220501", end="20220530", D_W_M_Y="D", adj="0", **arg):
+def inquire_daily_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", start="20220501", end="20220530", D_W_M_Y="D", adj="0", priority=PRIORITY_QUERY, **arg):
     """국내주식기간별시세(일/주/월/년)"""
     PATH = "uapi/domestic-stock/v1/quotations/inquire-daily-price"
     URL = f"{URL_BASE}/{PATH}"
@@ -160,10 +232,10 @@ def inquire_daily_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="00593
         "fid_period_div_code":D_W_M_Y,
         "fid_org_adj_prc":adj, # 0:수정주가반영, 1:수정주가미반영
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res
 
-def inquire_daily_itemchartprice(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", start="20220501", end="20220530", D_W_M="D", adj="0", **arg):
+def inquire_daily_itemchartprice(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", start="20220501", end="20220530", D_W_M="D", adj="0", priority=PRIORITY_QUERY, **arg):
     """현재가 조회"""
     PATH = "uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
     URL = f"{URL_BASE}/{PATH}"
@@ -184,7 +256,7 @@ def inquire_daily_itemchartprice(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, co
         "fid_period_div_code":D_W_M,
         "fid_org_adj_prc":adj, # 0:수정주가반영, 1:수정주가미반영
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res
 
 def order_cash_Buy(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, code, qty, price, side='market', **arg):
@@ -212,7 +284,9 @@ def order_cash_Buy(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_
             }
 
         # 해시키 생성
+        t0 = time.perf_counter_ns()
         hashkey_value = hashkey(URL_BASE, APP_KEY, APP_SECRET, data)
+        LATENCY.record('hashkey', time.perf_counter_ns() - t0)
         if hashkey_value is None:
             return {"rt_cd": "1", "msg1": "해시키 생성 실패"}
 
@@ -236,7 +310,9 @@ def order_cash_Buy(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_
                 "custtype":"P",
                 "hashkey": hashkey_value
             }
-        res = requests.post(URL, headers=headers, data=json.dumps(data))
+        t0 = time.perf_counter_ns()
+        res = _request("POST", URL_BASE, APP_KEY, URL, priority=PRIORITY_ORDER, headers=headers, data=json.dumps(data))
+        LATENCY.record('order_post', time.perf_counter_ns() - t0)
         return res.json()
     except Exception as e:
         print(f"매수 주문 중 오류 발생: {e}")
@@ -267,7 +343,9 @@ def order_cash_Sell(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT
             }
 
         # 해시키 생성
+        t0 = time.perf_counter_ns()
         hashkey_value = hashkey(URL_BASE, APP_KEY, APP_SECRET, data)
+        LATENCY.record('hashkey', time.perf_counter_ns() - t0)
         if hashkey_value is None:
             return {"rt_cd": "1", "msg1": "해시키 생성 실패"}
 
@@ -291,7 +369,9 @@ def order_cash_Sell(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT
                 "custtype":"P",
                 "hashkey": hashkey_value
             }
-        res = requests.post(URL, headers=headers, data=json.dumps(data))
+        t0 = time.perf_counter_ns()
+        res = _request("POST", URL_BASE, APP_KEY, URL, priority=PRIORITY_ORDER, headers=headers, data=json.dumps(data))
+        LATENCY.record('order_post', time.perf_counter_ns() - t0)
         return res.json()
     except Exception as e:
         print(f"매도 주문 중 오류 발생: {e}")
@@ -306,7 +386,7 @@ def hashkey(URL_BASE, APP_KEY, APP_SECRET, data, **arg):
             'appKey' : APP_KEY,
             'appSecret' : APP_SECRET,
         }
-        res = requests.post(URL, headers=headers, data=json.dumps(data))
+        res = _request("POST", URL_BASE, APP_KEY, URL, priority=PRIORITY_ORDER, headers=headers, data=json.dumps(data))
         if res.status_code == 200:
             return res.json().get("HASH")
         else:
@@ -316,7 +396,7 @@ def hashkey(URL_BASE, APP_KEY, APP_SECRET, data, **arg):
         print(f"해시키 생성 중 오류 발생: {e}")
         return None
 
-def inquire_asking_price_exp_ccn(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code, **arg):
+def inquire_asking_price_exp_ccn(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code, priority=PRIORITY_QUERY, **arg):
     PATH = "uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn"
     URL = f"{URL_BASE}/{PATH}"
     headers = {
@@ -331,10 +411,10 @@ def inquire_asking_price_exp_ccn(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, co
         "FID_COND_MRKT_DIV_CODE":"J",
         "FID_INPUT_ISCD":str(code),
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res.json()
 
-def check_holiday(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, **arg):
+def check_holiday(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, priority=PRIORITY_QUERY, **arg):
 
     PATH = "uapi/domestic-stock/v1/quotations/chk-holiday"
     URL = f"{URL_BASE}/{PATH}"
@@ -356,7 +436,7 @@ def check_holiday(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, **arg):
         "CTX_AREA_NK":"",
         "CTX_AREA_FK":"",
         }
-    res = requests.get(URL, headers=headers, params=params)
+    res = _request("GET", URL_BASE, APP_KEY, URL, priority=priority, headers=headers, params=params)
     return res.json()
 
 def aes_cbc_base64_dec(key, iv, cipher_text):
@@ -384,3 +464,13 @@ def aes_cbc_base64_dec(key, iv, cipher_text):
     except Exception as e:
         print(f"복호화 중 오류 발생: {e}")
         return None
+
+def aes_cbc_base64_enc(key, iv, plain_text):
+    """
+    :param key:  str type AES256 secret key value
+    :param iv: str type AES256 Initialize Vector
+    :param plain_text: str
+    :return: Base64 encoded AES256 str (체결 통보 형식, 모의 서버/리플레이용)
+    """
+    cipher = AES.new(key.encode('utf-8'), AES.MODE_CBC, iv.encode('utf-8'))
+    return b64encode(cipher.encrypt(pad(plain_text.encode('utf-8'), AES.block_size))).decode('ascii')
@@ -0,0 +1,226 @@
+"""
+tr_functions.py 의 asyncio 버전
+실시간 루프가 주문/조회 응답을 기다리는 동안에도 웹소켓 프레임을 계속 처리할 수 있도록
+동일한 인자 형태의 코루틴을 제공한다.
+
+주요 기능:
+1. 계좌(APP_KEY)별 aiohttp 커넥션 풀 세션
+2. 토큰/웹소켓 키 발급
+3. 잔고/주문가능금액/현재가/일봉 조회
+4. 현금 매수/매도 주문, 해시키 생성, 휴장일 조회
+
+반환값은 모두 파싱된 payload(dict) 이며, 토큰/웹소켓 키 함수만 동기 버전과 같은 형태를 반환한다.
+"""
+
+import json
+import time
+import asyncio
+import aiohttp
+from rate_limiter import get_rate_limiter, PRIORITY_ORDER, PRIORITY_QUERY
+from latency_histogram import LATENCY
+from metrics import METRICS, PRIORITY_NAMES
+
+PAPER_URL_BASE = "https://openapivts.koreainvestment.com:29443"
+
+###############################################################
+#### ------------------- [ HTTP Session ] -----------------####
+###############################################################
+
+# (event loop, URL_BASE, APP_KEY) 별 세션
+_SESSIONS = {}
+
+def get_async_session(URL_BASE, APP_KEY=None, **arg):
+    """
+    계좌(APP_KEY)별 aiohttp 세션 반환 (현재 이벤트 루프 기준)
+
+    Args:
+        URL_BASE (str): API 기본 URL
+        APP_KEY (str): API 앱 키
+
+    Returns:
+        aiohttp.ClientSession: keep-alive 세션
+    """
+    key = (id(asyncio.get_running_loop()), URL_BASE, APP_KEY)
+    session = _SESSIONS.get(key)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=4, keepalive_timeout=60)
+        session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+        _SESSIONS[key] = session
+    return session
+
+async def close_async_sessions():
+    """현재 이벤트 루프의 모든 세션 종료"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [key for key in _SESSIONS if key[0] == loop_id]:
+        await _SESSIONS.pop(key).close()
+
+async def _request(method, URL_BASE, APP_KEY, URL, headers, params=None, data=None, priority=PRIORITY_QUERY):
+    """앱 키별 속도 제한을 거쳐 계좌별 세션으로 REST 요청을 보내고 JSON payload 반환"""
+    waited = await get_rate_limiter(URL_BASE, APP_KEY).acquire_async(priority)
+    if priority == PRIORITY_ORDER:
+        LATENCY.record('rate_wait', int(waited * 1e9))
+    METRICS.observe('kis_rate_limit_wait_seconds', (('priority', PRIORITY_NAMES.get(priority, priority)),), waited)
+    labels = (('tr_id', headers.get('tr_id') or URL.rsplit('/', 1)[-1]),)
+    session = get_async_session(URL_BASE, APP_KEY)
+    t0 = time.perf_counter()
+    try:
+        async with session.request(method, URL, headers=headers, params=params, data=data) as res:
+            return await res.json(content_type=None)
+    finally:
+        METRICS.inc('kis_rest_requests_total', labels)
+        METRICS.observe('kis_rest_latency_seconds', labels, time.perf_counter() - t0)
+
+def _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, tr_id, **extra):
+    """TR 공통 헤더 생성"""
+    headers = {
+        "Content-Type":"application/json",
+        "authorization":f"Bearer {ACCESS_TOKEN}",
+        "appKey":APP_KEY,
+        "appSecret":APP_SECRET,
+        "tr_id":tr_id,
+        "custtype":"P",
+        }
+    headers.update(extra)
+    return headers
+
+def _order_data(CANO, ACNT_PRDT_CD, code, qty, price, side):
+    """현금 주문 body 생성 (시장가/지정가)"""
+    market = side in ["market", "MARKET"]
+    return {
+        "CANO": CANO,
+        "ACNT_PRDT_CD": ACNT_PRDT_CD,
+        "PDNO": str(code),
+        "ORD_DVSN": "01" if market else "00", # 주문구분 (00:지정가, 01:시장가)
+        "ORD_QTY": str(qty),
+        "ORD_UNPR": "0" if market else str(price), # 주문가격 (0: 시장가일 경우)
+    }
+
+###############################################################
+#### ------------------- [ TR Fucnctions ] ----------------####
+###############################################################
+
+async def get_access_TOKEN(URL_BASE, APP_KEY, APP_SECRET, **arg):
+    headers = {"content-type":"application/json"}
+    body = {"grant_type":"client_credentials", "appkey":APP_KEY, "appsecret":APP_SECRET}
+    URL = f"{URL_BASE}/oauth2/tokenP"
+    res = await _request("POST", URL_BASE, APP_KEY, URL, headers, data=json.dumps(body))
+    return res["access_token"], res["access_token_token_expired"]
+
+async def get_approval(URL_BASE, APP_KEY, APP_SECRET, **arg):
+    headers = {"content-type": "application/json"}
+    body = {"grant_type": "client_credentials", "appkey": APP_KEY, "secretkey": APP_SECRET}
+    URL = f"{URL_BASE}/oauth2/Approval"
+    res = await _request("POST", URL_BASE, APP_KEY, URL, headers, data=json.dumps(body))
+    return res["approval_key"]
+
+async def inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_QUERY, **arg):
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/trading/inquire-psbl-order"
+    tr_id = "VTTC8908R" if URL_BASE == PAPER_URL_BASE else "TTTC8908R"
+    params = {
+        "CANO": CANO,
+        "ACNT_PRDT_CD": ACNT_PRDT_CD,
+        "PDNO": "005930",
+        "ORD_UNPR": "65500",
+        "ORD_DVSN": "01",
+        "CMA_EVLU_AMT_ICLD_YN": "Y",
+        "OVRS_ICLD_YN": "Y"
+        }
+    return await _request("GET", URL_BASE, APP_KEY, URL, _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, tr_id), params=params, priority=priority)
+
+async def inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_QUERY, **arg):
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/trading/inquire-balance"
+    tr_id = "VTTC8434R" if URL_BASE == PAPER_URL_BASE else "TTTC8434R"
+    params = {
+        "CANO": CANO,
+        "ACNT_PRDT_CD": ACNT_PRDT_CD,
+        "AFHR_FLPR_YN": "N",
+        "OFL_YN": "",
+        "INQR_DVSN": "02",
+        "UNPR_DVSN": "01",
+        "FUND_STTL_ICLD_YN": "N",
+        "FNCG_AMT_AUTO_RDPT_YN": "N",
+        "PRCS_DVSN": "01",
+        "CTX_AREA_FK100": "",
+        "CTX_AREA_NK100": ""
+        }
+    return await _request("GET", URL_BASE, APP_KEY, URL, _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, tr_id), params=params, priority=priority)
+
+async def inquire_price(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", priority=PRIORITY_QUERY, **arg):
+    """현재가 조회"""
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/quotations/inquire-price"
+    params = {
+        "fid_cond_mrkt_div_code":"J",
+        "fid_input_iscd":str(code),
+        }
+    return await _request("GET", URL_BASE, APP_KEY, URL, _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, "FHKST01010100"), params=params, priority=priority)
+
+async def inquire_daily_itemchartprice(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, code="005930", start="20220501", end="20220530", D_W_M="D", adj="0", priority=PRIORITY_QUERY, **arg):
+    """국내주식기간별시세(일/주/월/년)"""
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+    params = {
+        "fid_cond_mrkt_div_code":"J",
+        "fid_input_iscd":str(code),
+        "FID_INPUT_DATE_1": start,
+        "FID_INPUT_DATE_2": end,
+        "fid_period_div_code":D_W_M,
+        "fid_org_adj_prc":adj, # 0:수정주가반영, 1:수정주가미반영
+        }
+    return await _request("GET", URL_BASE, APP_KEY, URL, _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, "FHKST03010100"), params=params, priority=priority)
+
+async def hashkey(URL_BASE, APP_KEY, APP_SECRET, data, **arg):
+    try:
+        URL = f"{URL_BASE}/uapi/hashkey"
+        headers = {
+            'content-Type' : 'application/json',
+            'appKey' : APP_KEY,
+            'appSecret' : APP_SECRET,
+        }
+        res = await _request("POST", URL_BASE, APP_KEY, URL, headers, data=json.dumps(data), priority=PRIORITY_ORDER)
+        return res.get("HASH")
+    except Exception as e:
+        print(f"해시키 생성 중 오류 발생: {e}")
+        return None
+
+async def _order_cash(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, data, tr_id):
+    """해시키 생성 후 현금 주문 전송"""
+    t0 = time.perf_counter_ns()
+    hashkey_value = await hashkey(URL_BASE, APP_KEY, APP_SECRET, data)
+    LATENCY.record('hashkey', time.perf_counter_ns() - t0)
+    if hashkey_value is None:
+        return {"rt_cd": "1", "msg1": "해시키 생성 실패"}
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/trading/order-cash"
+    headers = _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, tr_id, hashkey=hashkey_value)
+    t0 = time.perf_counter_ns()
+    res = await _request("POST", URL_BASE, APP_KEY, URL, headers, data=json.dumps(data), priority=PRIORITY_ORDER)
+    LATENCY.record('order_post', time.perf_counter_ns() - t0)
+    return res
+
+async def order_cash_Buy(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, code, qty, price, side='market', **arg):
+    try:
+        data = _order_data(CANO, ACNT_PRDT_CD, code, qty, price, side)
+        tr_id = "VTTC0802U" if URL_BASE == PAPER_URL_BASE else "TTTC0802U"
+        return await _order_cash(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, data, tr_id)
+    except Exception as e:
+        print(f"매수 주문 중 오류 발생: {e}")
+        return {"rt_cd": "1", "msg1": str(e)}
+
+async def order_cash_Sell(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, code, qty, price, side='market', **arg):
+    try:
+        data = _order_data(CANO, ACNT_PRDT_CD, code, qty, price, side)
+        tr_id = "VTTC0801U" if URL_BASE == PAPER_URL_BASE else "TTTC0801U"
+        return await _order_cash(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, data, tr_id)
+    except Exception as e:
+        print(f"매도 주문 중 오류 발생: {e}")
+        return {"rt_cd": "1", "msg1": str(e)}
+
+async def check_holiday(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, priority=PRIORITY_QUERY, **arg):
+    if URL_BASE == PAPER_URL_BASE:
+        print("Unable to check holiday with Paper Account")
+        return False
+    URL = f"{URL_BASE}/uapi/domestic-stock/v1/quotations/chk-holiday"
+    params = {
+        "BASS_DT":"20230625",
+        "CTX_AREA_NK":"",
+        "CTX_AREA_FK":"",
+        }
+    return await _request("GET", URL_BASE, APP_KEY, URL, _headers(APP_KEY, APP_SECRET, ACCESS_TOKEN, "CTCA0903R"), params=params, priority=priority)
@@ -9,10 +9,8 @@
 4. 메시지 전송 (Discord)
 """
 
-import websocket
 import shutil
 import json
-import requests
 import time
 import Crypto
 import sys
@@ -21,7 +19,6 @@ sys.modules['Crypto'] = Crypto
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 from base64 import b64decode
-import requests
 import json
 import datetime
 import time
@@ -29,6 +26,8 @@ from pprint import pprint
 import yaml
 import logging
 from tr_functions import *
+from discord_notifier import notify
+from subscription_manager import connect_sharded
 
 logger = logging.getLogger()
 
@@ -77,12 +76,12 @@ def Account_detail(NAME, URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT
     name = f"@ {NAME}"
     
     # 주문 가능 금액 조회
-    res = inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD)
+    res = inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_REPORT)
     cash = res.json()['output']['ord_psbl_cash']
     available_cash = '{0:<18} {1:>20,}'.format('Available Balance:', int(cash))
     
     # 계좌 잔고 조회
-    res = inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD)
+    res = inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_REPORT)
     stock_list = res.json()['output1']
     evaluation = res.json()['output2'] 
 
@@ -122,7 +121,7 @@ def Get_balance(NAME, URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PR
     Returns:
         str: 주문 가능 금액
     """
-    res = inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD,  **arg)
+    res = inquire_psbl_order(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_REPORT)
     cash = res.json()['output']['ord_psbl_cash']
     Send_message(DISCORD_WEBHOOK_URL, msg='{0}'.format(NAME))
     Send_message(DISCORD_WEBHOOK_URL, msg="=" * (40), timestamp='False')
@@ -145,7 +144,7 @@ def Get_stock_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PR
     Returns:
         dict: 보유 종목 정보 딕셔너리
     """
-    res = inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD)
+    res = inquire_balance(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD, priority=PRIORITY_REPORT)
     stock_list = res.json()['output1']
     evaluation = res.json()['output2']  
     stock_dict = {}
@@ -216,7 +215,7 @@ def Liquidation(URL_BASE, APP_KEY, APP_SECRET, ACCESS_TOKEN, CANO, ACNT_PRDT_CD,
 
 def Send_message(DISCORD_WEBHOOK_URL, msg, timestamp='True', **arg):
     """
-    Discord로 메시지 전송
+    Discord로 메시지 전송 (큐에 넣고 바로 반환, 전송은 discord_notifier 스레드가 담당)
     
     Args:
         DISCORD_WEBHOOK_URL (str): Discord 웹훅 URL
@@ -226,92 +225,28 @@ def Send_message(DISCORD_WEBHOOK_URL, msg, timestamp='True', **arg):
     now = datetime.datetime.now()
     if timestamp == 'True':
         message = f"[{now.strftime('%H:%M:%S')}] {str(msg)}"
-        message_discode = {"content": message}
     elif timestamp == 'False':
         message = f"{str(msg)}"
-        message_discode = {"content": message}
     else: pass
-    requests.post(DISCORD_WEBHOOK_URL, data=message_discode)
+    notify(DISCORD_WEBHOOK_URL, message)  # 백그라운드 전송 (대기하지 않음)
     print(message)
 
-def Web_socket_connect(info, stock_infos):
+def Web_socket_connect(info, stock_infos, notice=True, quotes=True, recv_timeout=None):
     """
     한국투자증권 웹소켓 연결 및 실시간 데이터 구독을 설정하는 함수
+    세션당 등록 한도를 넘으면 여러 세션(EXTRA_APP_KEYS)으로 나누어 연결하고 수신을 하나로 합친다.
     
     Args:
         info (dict): API 접속 정보 (APPROVAL_KEY, URL_BASE, HTS_ID 등)
         stock_infos (dict): 모니터링할 종목 정보
+        notice (bool): 체결 통보 구독 여부 (시세 허브는 False)
+        quotes (bool): 종목별 호가/체결/VI 구독 여부 (시세 허브를 쓰는 워커는 False)
+        recv_timeout (float): recv 제한 시간(초, 초과 시 예외 - 멈춘 연결 감지용, None 이면 무제한)
     
     Returns:
         tuple: (websocket 객체, AES 암호화 키, AES 초기화 벡터)
     """
-    # 웹소켓 구독할 TR 목록 초기화
-    code_list_websocket = []
-    
-    # 모의투자/실전투자 구분하여 웹소켓 연결 TR 설정
-    if info['URL_BASE'] == "https://openapivts.koreainvestment.com:29443":  # 모의투자
-        code_list_websocket.append(['1','H0STCNI9', info['HTS_ID']])
-    else:  # 실전투자
-        code_list_websocket.append(['1','H0STCNI0', info['HTS_ID']])
-        
-    # 각 종목별 실시간 데이터 구독 TR 추가
-    for sym in stock_infos.keys():
-        code_list_websocket.append(['1','H0STASP0',sym])  # 실시간 호가
-        code_list_websocket.append(['1','H0STCNT0',sym])  # 실시간 체결
-        code_list_websocket.append(['1','H0STVI0',sym])   # 실시간 VI 정보
-
-    # 웹소켓 연결 요청 데이터 생성
-    senddata_list=[]
-    for i,j,k in code_list_websocket:
-        # TR 요청 데이터 포맷: tr_type, tr_id, tr_key
-        temp = '{"header":{"approval_key": "%s","custtype":"P","tr_type":"%s","content-type":"utf-8"},"body":{"input":{"tr_id":"%s","tr_key":"%s"}}}'%(info['APPROVAL_KEY'],i,j,k)
-        senddata_list.append(temp)
-        time.sleep(0.2)  # API 호출 간격 조절
-
-    # 기존 웹소켓 연결 종료
-    try: 
-        ws.close()
-    except: 
-        pass
-
-    # 새로운 웹소켓 연결 생성
-    ws = websocket.WebSocket()
-    ws.connect(info['SOCKET_URL'], ping_interval=60)  # 60초마다 ping 전송
-
-    # 각 TR 요청 데이터 전송 및 응답 처리
-    for senddata in senddata_list:
-        try: 
-            ws.send(senddata)  # TR 요청 전송
-            data = ws.recv()   # 응답 수신
-            
-            # 실시간 데이터인 경우 처리하지 않음
-            if data[0] == '0' or data[0] == '1':
-                pass
-            else:
-                # JSON 응답 파싱
-                jsonObject = json.loads(data)
-                trid = jsonObject["header"]["tr_id"]
-                
-                # PINGPONG이 아닌 경우 처리
-                if trid != "PINGPONG":
-                    rt_cd = jsonObject["body"]["rt_cd"]
-                    if rt_cd == '1':    # 에러 응답 처리
-                        print("[%s] ERROR RETURN CODE [%s] MSG [%s]" % (info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
-                    elif rt_cd == '0':  # 정상 응답 처리
-                        print("[%s] RETURN CODE [%s] MSG [%s]" % (info['NAME'], rt_cd, jsonObject["body"]["msg1"]))
-                        # 웹소켓 연결 키 발급 TR인 경우
-                        if trid == "K0STCNI0" or trid == "K0STCNI9" or trid == "H0STCNI0" or trid == "H0STCNI9":
-                            aes_key = jsonObject["body"]["output"]["key"]    # AES 암호화 키
-                            aes_iv = jsonObject["body"]["output"]["iv"]      # AES 초기화 벡터
-                            print("[%s] TRID [%s] KEY[%s] IV[%s]" % (info['NAME'], trid, aes_key, aes_iv))
-                # PINGPONG 메시지 처리
-                elif trid == "PINGPONG":
-                    print("[%s] RECV [%s]" % (info['NAME'], trid))
-                    print("[%s] SEND [%s]" % (info['NAME'], trid))
-        except Exception as e: 
-            print(e)
-    
-    return ws, aes_key, aes_iv  # 웹소켓 객체와 암호화 키 반환
+    return connect_sharded(info, stock_infos, notice=notice, quotes=quotes, recv_timeout=recv_timeout)
   
 def write_JSON(data, file_name, sort_key=True):
     """